@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('answers', '0001_initial'),
+        ('assessments', '0002_assessment_total_score'),
+        ('questions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessmentanswer',
+            index=models.Index(fields=['created_at', 'id'], name='answer_created_id_idx'),
+        ),
+    ]
@@ -12,5 +12,10 @@ class AssessmentAnswer(models.Model):
     score_value = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='answer_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"Assessment {self.assessment_id} - Q{self.question_id}: {self.selected_text} ({self.score_value})"
\ No newline at end of file
@@ -10,4 +10,16 @@ class AssessmentAnswerSerializer(serializers.ModelSerializer):
             # In replace endpoint, assessment is provided separately; allow omission in items
             'assessment': { 'required': False },
             'created_at': { 'read_only': True },
-        }
\ No newline at end of file
+        }
+
+
+class AnswerItemSerializer(serializers.Serializer):
+    """One item of the replace payload.
+
+    ``question`` is a plain id so that a whole payload can be checked with a
+    single query instead of one lookup per item; ``score_value`` is accepted
+    for compatibility but the stored score always comes from the option.
+    """
+    question = serializers.IntegerField()
+    selected_text = serializers.CharField(max_length=255, allow_blank=True, required=False, default='')
+    score_value = serializers.IntegerField(required=False)
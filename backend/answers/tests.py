@@ -0,0 +1,70 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from answers.models import AssessmentAnswer
+from assessments.models import Assessment
+from categories.models import Category
+from clients.models import Client
+from questions.models import Option, Question
+from users.models import CustomUser
+
+
+class ReplaceAnswersTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username="admin", password="pw", role="admin")
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        category = Category.objects.create(name="Identity")
+        self.questions = [Question.objects.create(category=category, question_text=f"Q{i}?") for i in range(3)]
+        for question in self.questions:
+            Option.objects.create(question=question, option_text="Yes", score_value=30)
+            Option.objects.create(question=question, option_text="No", score_value=0)
+        self.assessment = Assessment.objects.create(client=Client.objects.create(fullName="Ada"), submitted_by=self.admin)
+
+    def replace(self, answers):
+        return self.api.post("/api/answers/replace/", {"assessment": self.assessment.pk, "answers": answers},
+                             format="json")
+
+    def stored(self):
+        return dict(AssessmentAnswer.objects.filter(assessment=self.assessment)
+                    .values_list("question_id", "selected_text"))
+
+    def test_only_differences_are_written(self):
+        q0, q1, q2 = (q.pk for q in self.questions)
+        first = self.replace([{"question": q0, "selected_text": "Yes"}, {"question": q1, "selected_text": "No"}])
+        kept_id = AssessmentAnswer.objects.get(question_id=q0).pk
+
+        second = self.replace([
+            {"question": q0, "selected_text": "Yes"},
+            {"question": q2, "selected_text": "No"},
+            # Repeated question: the last item wins
+            {"question": q2, "selected_text": "Yes", "score_value": 100},
+        ])
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((first.data["created"], first.data["total_score"]), (2, 30))
+        self.assertEqual(second.status_code, 201)
+        counts = {key: second.data[key] for key in ("created", "updated", "deleted", "unchanged")}
+        self.assertEqual(counts, {"created": 1, "updated": 0, "deleted": 1, "unchanged": 1})
+        self.assertEqual(self.stored(), {q0: "Yes", q2: "Yes"})
+        self.assertEqual(AssessmentAnswer.objects.get(question_id=q0).pk, kept_id)
+        self.assertEqual(second.data["total_score"], 60)
+
+        third = self.replace([{"question": q0, "selected_text": "No"}, {"question": q2, "selected_text": "Yes"}])
+        self.assertEqual((third.data["updated"], third.data["unchanged"]), (1, 1))
+        self.assertEqual(AssessmentAnswer.objects.get(question_id=q0).score_value, 0)
+
+    def test_unknown_question_is_rejected(self):
+        q0 = self.questions[0].pk
+        self.replace([{"question": q0, "selected_text": "Yes"}])
+
+        response = self.replace([{"question": q0, "selected_text": "No"}, {"question": 0, "selected_text": "Yes"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("question", response.data)
+        self.assertEqual(self.stored(), {q0: "Yes"})
+
+    def test_malformed_payload_is_rejected(self):
+        self.assertEqual(self.replace({"question": self.questions[0].pk}).status_code, 400)
+        self.assertEqual(self.replace([{"selected_text": "Yes"}]).status_code, 400)
+        self.assertFalse(AssessmentAnswer.objects.exists())
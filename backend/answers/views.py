@@ -1,13 +1,19 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from assessments.models import Assessment
+from assessments.scoring import score_assessment
+from questions.models import Option, Question
 from .models import AssessmentAnswer
-from .serializers import AssessmentAnswerSerializer
+from .serializers import AnswerItemSerializer, AssessmentAnswerSerializer
 
 
 class AssessmentAnswerViewSet(viewsets.ModelViewSet):
     queryset = AssessmentAnswer.objects.all()
     serializer_class = AssessmentAnswerSerializer
+    cursor_field = 'created_at'
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('assessment__client')
@@ -35,13 +41,70 @@ class AssessmentAnswerViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='replace')
     def replace(self, request):
+        """Make the assessment's answers match the posted list.
+
+        Only rows that differ are written: new questions are inserted, changed
+        answers updated and answers missing from the list deleted, all in one
+        transaction. When a question appears more than once, the last item wins.
+        """
         assessment = request.data.get('assessment')
         answers = request.data.get('answers')
         if not assessment or not isinstance(answers, list):
             return Response({'detail': 'Provide assessment and answers list.'}, status=status.HTTP_400_BAD_REQUEST)
-        serializer = AssessmentAnswerSerializer(data=answers, many=True)
+        serializer = AnswerItemSerializer(data=answers, many=True)
         serializer.is_valid(raise_exception=True)
-        AssessmentAnswer.objects.filter(assessment_id=assessment).delete()
-        objs = [AssessmentAnswer(assessment_id=assessment, **item) for item in serializer.validated_data]
-        AssessmentAnswer.objects.bulk_create(objs)
-        return Response({'replaced': len(objs)}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        wanted = {item['question']: item['selected_text'] for item in serializer.validated_data}
+
+        known = set(Question.objects.filter(id__in=wanted).values_list('id', flat=True))
+        unknown = sorted(set(wanted) - known)
+        if unknown:
+            return Response({'question': [f'Invalid question id(s): {unknown}']}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Store the option's own score rather than the one posted by the browser
+        option_scores = dict(
+            ((question_id, text), score)
+            for question_id, text, score in Option.objects.filter(question__in=wanted)
+            .order_by('-id').values_list('question_id', 'option_text', 'score_value')
+        )
+
+        with transaction.atomic():
+            # Locking the assessment serialises concurrent autosaves of the same draft
+            assessment = get_object_or_404(Assessment.objects.select_for_update(), pk=assessment)
+            to_create, to_update, to_delete = [], [], []
+            seen = set()
+            for answer in AssessmentAnswer.objects.filter(assessment=assessment).order_by('id'):
+                question_id = answer.question_id
+                if question_id not in wanted or question_id in seen:
+                    to_delete.append(answer.id)
+                    continue
+                seen.add(question_id)
+                text = wanted[question_id]
+                score = option_scores.get((question_id, text), 0)
+                if (answer.selected_text, answer.score_value) != (text, score):
+                    answer.selected_text, answer.score_value = text, score
+                    to_update.append(answer)
+            for question_id, text in wanted.items():
+                if question_id not in seen:
+                    to_create.append(AssessmentAnswer(
+                        assessment=assessment, question_id=question_id, selected_text=text,
+                        score_value=option_scores.get((question_id, text), 0),
+                    ))
+
+            if to_delete:
+                AssessmentAnswer.objects.filter(id__in=to_delete).delete()
+            if to_update:
+                AssessmentAnswer.objects.bulk_update(to_update, ['selected_text', 'score_value'])
+            if to_create:
+                AssessmentAnswer.objects.bulk_create(to_create)
+            if to_delete or to_update or to_create:
+                score_assessment(assessment)
+
+        return Response({
+            'replaced': len(wanted),
+            'created': len(to_create),
+            'updated': len(to_update),
+            'deleted': len(to_delete),
+            'unchanged': len(seen) - len(to_update),
+            'total_score': assessment.total_score,
+            'risk_level': assessment.risk_level,
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from assessments.models import Assessment
+from assessments.scoring import DEFAULT_RESCORE_BATCH_SIZE, rescore_assessments
+
+
+class Command(BaseCommand):
+    help = "Recompute total_score and risk_level of assessments from their stored answers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='append', choices=[c for c, _ in Assessment.STATUS_CHOICES],
+                            help="Only rescore assessments with this status (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_RESCORE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing.")
+
+    def handle(self, *args, **options):
+        qs = Assessment.objects.all()
+        if options['status']:
+            qs = qs.filter(status__in=options['status'])
+        report = rescore_assessments(qs, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = "would change" if options['dry_run'] else "changed"
+        self.stdout.write(
+            f"{report['assessments']} assessments: {report['scored']} scored, {report['changed']} {verb} "
+            f"in {report['seconds']}s ({report['per_second']} assessments/s)"
+        )
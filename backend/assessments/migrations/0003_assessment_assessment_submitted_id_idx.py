@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0002_assessment_total_score'),
+        ('clients', '0007_rename_distributionchannel_old_client_distributionchannel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessment',
+            index=models.Index(fields=['submitted_at', 'id'], name='assessment_submitted_id_idx'),
+        ),
+    ]
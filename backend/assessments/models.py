@@ -23,5 +23,11 @@ class Assessment(models.Model):
     risk_level = models.CharField(max_length=10, choices=RISK_LEVEL_CHOICES, blank=True, null=True)
     total_score = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order: (submitted_at, id)
+            models.Index(fields=['submitted_at', 'id'], name='assessment_submitted_id_idx'),
+        ]
+
     def __str__(self):
         return f'Assessment for {self.client.fullName}'
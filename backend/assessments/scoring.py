@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from answers.models import AssessmentAnswer
+from questions.models import Option
+from .models import Assessment
+from .signals import assessments_bulk_updated
+
+# Same cut-offs the questionnaire page used when it scored in the browser
+DEFAULT_RISK_THRESHOLDS = {'high': 70, 'medium': 40}
+DEFAULT_RESCORE_BATCH_SIZE = 2000
+SCORE_FIELDS = ['total_score', 'risk_level']
+
+
+def risk_thresholds():
+    return {**DEFAULT_RISK_THRESHOLDS, **getattr(settings, 'ASSESSMENT_RISK_THRESHOLDS', {})}
+
+
+def risk_level_for(score, thresholds=None):
+    thresholds = thresholds or risk_thresholds()
+    if score >= thresholds['high']:
+        return 'high'
+    if score >= thresholds['medium']:
+        return 'medium'
+    return 'low'
+
+
+def answer_score():
+    """Expression for an answer's score: the ``score_value`` of the option it selected.
+
+    Answers are matched to options by question and option text; free-text
+    answers and options that no longer exist score 0. The score posted with
+    the answer is never trusted.
+    """
+    option_score = (
+        Option.objects.filter(question_id=OuterRef('question_id'), option_text=OuterRef('selected_text'))
+        .order_by('id')
+        .values('score_value')[:1]
+    )
+    return Coalesce(Subquery(option_score, output_field=IntegerField()), Value(0))
+
+
+def compute_score(assessment_id):
+    """Return ``(total_score, answer_count)`` for one assessment using a single aggregate query."""
+    result = AssessmentAnswer.objects.filter(assessment_id=assessment_id).aggregate(
+        total=Sum(answer_score()), answers=Count('id'),
+    )
+    return result['total'] or 0, result['answers']
+
+
+def score_assessment(assessment):
+    """Recompute ``total_score`` and ``risk_level`` from the stored answers and save them.
+
+    Assessments without answers (e.g. results pushed from outside) keep their
+    current values. Returns True if anything changed.
+    """
+    total, answers = compute_score(assessment.pk)
+    if not answers:
+        return False
+    risk_level = risk_level_for(total)
+    if (assessment.total_score, assessment.risk_level) == (total, risk_level):
+        return False
+    assessment.total_score = total
+    assessment.risk_level = risk_level
+    assessment.save(update_fields=SCORE_FIELDS)
+    return True
+
+
+def _rescore_batch(ids, thresholds, report, dry_run):
+    totals = dict(
+        AssessmentAnswer.objects.filter(assessment_id__in=ids)
+        .values('assessment_id')
+        .annotate(total=Sum(answer_score()))
+        .order_by()
+        .values_list('assessment_id', 'total')
+    )
+    if not totals:
+        return
+
+    with transaction.atomic():
+        changed = []
+        assessments = (
+            Assessment.objects.filter(id__in=totals)
+            .select_related('client')
+            .only('id', 'client_id', 'status', 'risk_level', 'total_score', 'submitted_at', 'client__distributionChannel')
+        )
+        for assessment in assessments:
+            total = totals[assessment.id] or 0
+            risk_level = risk_level_for(total, thresholds)
+            if (assessment.total_score, assessment.risk_level) != (total, risk_level):
+                assessment.total_score = total
+                assessment.risk_level = risk_level
+                changed.append(assessment)
+
+        if changed and not dry_run:
+            Assessment.objects.bulk_update(changed, SCORE_FIELDS)
+            assessments_bulk_updated.send(sender=Assessment, instances=changed, fields=SCORE_FIELDS)
+
+    report['scored'] += len(totals)
+    report['changed'] += len(changed)
+
+
+def rescore_assessments(queryset=None, batch_size=DEFAULT_RESCORE_BATCH_SIZE, dry_run=False):
+    """Recompute scores for many assessments with grouped SQL instead of one query per assessment.
+
+    Assessments are walked in id order, ``batch_size`` at a time. Each batch
+    costs one grouped aggregate over its answers, one read of the affected
+    assessments and one ``bulk_update`` of those whose score or risk level
+    changed. Assessments without answers are skipped.
+
+    Returns a report with the number of assessments seen, scored and changed,
+    the elapsed seconds and assessments per second.
+    """
+    queryset = Assessment.objects.all() if queryset is None else queryset
+    thresholds = risk_thresholds()
+    report = {'assessments': 0, 'scored': 0, 'changed': 0}
+    started = time.monotonic()
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        report['assessments'] += len(ids)
+        _rescore_batch(ids, thresholds, report, dry_run)
+    elapsed = time.monotonic() - started
+    report['seconds'] = round(elapsed, 3)
+    report['per_second'] = round(report['assessments'] / elapsed, 1) if elapsed > 0 else None
+    return report
@@ -12,6 +12,9 @@ class AssessmentSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'submitted_at': { 'read_only': True },
             'submitted_by': { 'read_only': True },
+            # Computed server-side from the answers (assessments/scoring.py)
+            'total_score': { 'read_only': True },
+            'risk_level': { 'read_only': True },
         }
 
     def get_submitted_by_name(self, obj):
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after Assessment rows are rewritten with bulk_update (e.g. by the
+# rescore command), which skips post_save. Receivers get ``instances`` and
+# ``fields``; the instances still carry the state they were loaded with.
+assessments_bulk_updated = Signal()
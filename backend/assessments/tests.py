@@ -1,3 +1,89 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from answers.models import AssessmentAnswer
+from backend.sql_instrumentation import query_budget
+from categories.models import Category
+from clients.models import Client
+from questions.models import Option, Question
+from users.models import CustomUser
+
+from .models import Assessment
+from .scoring import compute_score, rescore_assessments, risk_level_for
+
+
+class RiskLevelTests(TestCase):
+    def test_default_thresholds(self):
+        self.assertEqual([risk_level_for(score) for score in (0, 39, 40, 69, 70, 100)],
+                         ["low", "low", "medium", "medium", "high", "high"])
+
+    @override_settings(ASSESSMENT_RISK_THRESHOLDS={"high": 50})
+    def test_settings_override_one_threshold(self):
+        self.assertEqual([risk_level_for(score) for score in (39, 40, 49, 50)], ["low", "medium", "medium", "high"])
+
+
+class ScoringTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="clerk", password="pw")
+        category = Category.objects.create(name="Identity")
+        self.q1 = Question.objects.create(category=category, question_text="Country of residence?")
+        self.q2 = Question.objects.create(category=category, question_text="Source of funds?")
+        Option.objects.create(question=self.q1, option_text="Abroad", score_value=50)
+        Option.objects.create(question=self.q1, option_text="Local", score_value=0)
+        self.cash = Option.objects.create(question=self.q2, option_text="Cash", score_value=30)
+        self.client_obj = Client.objects.create(fullName="Ada Lovelace")
+
+    def assess(self, *answers, **fields):
+        assessment = Assessment.objects.create(client=self.client_obj, submitted_by=self.user, **fields)
+        for question, text in answers:
+            # The posted score is never trusted
+            AssessmentAnswer.objects.create(assessment=assessment, question=question, selected_text=text, score_value=99)
+        return assessment
+
+    def test_compute_score_uses_option_scores_in_one_query(self):
+        assessment = self.assess((self.q1, "Abroad"), (self.q2, "Cash"), (self.q2, "Something else"))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(compute_score(assessment.pk), (80, 3))
+        self.assertEqual(len(queries), 1)
+
+    def test_rescore_follows_option_changes(self):
+        high = self.assess((self.q1, "Abroad"), (self.q2, "Cash"), risk_level="high", total_score=80)
+        medium = self.assess((self.q1, "Abroad"), risk_level="low", total_score=0)
+        pushed = self.assess(risk_level="medium", total_score=45)
+        self.cash.score_value = 0
+        self.cash.save()
+
+        report = rescore_assessments(batch_size=1)
+
+        self.assertEqual((report["assessments"], report["scored"], report["changed"]), (3, 2, 2))
+        values = dict(Assessment.objects.values_list("pk", "risk_level"))
+        # Assessments without answers keep what they were given
+        self.assertEqual((values[high.pk], values[medium.pk], values[pushed.pk]), ("medium", "medium", "medium"))
+        self.assertEqual(Assessment.objects.get(pk=high.pk).total_score, 50)
+
+    @override_settings(ASSESSMENT_RISK_THRESHOLDS={"high": 50, "medium": 20})
+    def test_rescore_applies_configured_thresholds(self):
+        assessment = self.assess((self.q1, "Abroad"), risk_level="medium", total_score=50)
+
+        self.assertEqual(rescore_assessments(dry_run=True)["changed"], 1)
+        self.assertEqual(Assessment.objects.get(pk=assessment.pk).risk_level, "medium")
+        rescore_assessments()
+        self.assertEqual(Assessment.objects.get(pk=assessment.pk).risk_level, "high")
+
+
+class AssessmentListQueryTests(TestCase):
+    def test_list_reads_clients_and_submitters_with_the_page(self):
+        admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        for i in range(10):
+            user = CustomUser.objects.create_user(username=f"agent{i}", password="pw")
+            Assessment.objects.create(client=Client.objects.create(fullName=f"Client {i}"), submitted_by=user)
+        api = APIClient()
+        api.force_authenticate(admin)
+
+        with query_budget(5, max_repeats=1):
+            response = api.get("/api/assessments/", {"page_size": 50})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 10)
@@ -3,15 +3,18 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Assessment
+from .scoring import score_assessment
 from .serializers import AssessmentSerializer
-from clients.external_db import is_external_db_enabled, push_results_to_external
+from clients.external_db import is_external_db_enabled
+from clients.outbox import enqueue_external_result
 
 class AssessmentViewSet(viewsets.ModelViewSet):
     queryset = Assessment.objects.all()
     serializer_class = AssessmentSerializer
+    cursor_field = 'submitted_at'
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related('client')
+        qs = super().get_queryset().select_related('client', 'submitted_by')
         user = self.request.user
         
         # Admin and compliance can see all assessments
@@ -35,13 +38,20 @@ class AssessmentViewSet(viewsets.ModelViewSet):
             if not user.distribution_channel or not client or client.distributionChannel != user.distribution_channel:
                 raise ValidationError({'client': 'Client does not belong to your distribution channel'})
         
-        serializer.save(submitted_by=self.request.user)
+        assessment = serializer.save(submitted_by=self.request.user)
+        score_assessment(assessment)
+
+    def perform_update(self, serializer):
+        # Scores are always derived from the stored answers, never taken from the request
+        assessment = serializer.save()
+        score_assessment(assessment)
 
     @action(detail=True, methods=["post"], url_path="push-external")
     def push_external(self, request, pk=None):
-        """Push this assessment's summary to the external database.
+        """Queue this assessment's summary for the external database.
 
-        Returns JSON with whether the external write succeeded.
+        The row is written by the flush_external_outbox worker; pushing an
+        unchanged assessment again reuses the queued message.
         """
         assessment = self.get_object()
         client = assessment.client
@@ -62,10 +72,13 @@ class AssessmentViewSet(viewsets.ModelViewSet):
             "submitted_at": assessment.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
         }
 
-        external_ok = push_results_to_external(None, payload)
+        message, _ = enqueue_external_result(payload, f"assessment-{assessment.id}")
 
         return Response({
             "ok": True,
             "assessmentId": assessment.id,
-            "externalPushed": external_ok,
+            "externalPushed": message.status == "sent",
+            "queued": True,
+            "outboxId": message.id,
+            "outboxStatus": message.status,
         })
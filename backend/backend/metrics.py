@@ -0,0 +1,358 @@
+import glob
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .sql_instrumentation import QueryRecorder
+
+# Upper bounds of the latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+INITIAL_FILE_SIZE = 1024 * 1024
+# Header of a value file: bytes used (uint32), padded to 8
+HEADER_SIZE = 8
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Other request methods share the label 'other', so clients cannot add series
+STANDARD_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+class LocalValues:
+    """Values of this process only (no METRICS_DIR: runserver, tests, a single worker)."""
+
+    def __init__(self):
+        self.values = {}
+
+    def inc(self, key, amount):
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+
+def _entries(data):
+    """``(key, value, offset)`` of the entries in the bytes of a value file."""
+    used = min(struct.unpack_from('<I', data, 0)[0], len(data)) if len(data) >= HEADER_SIZE else 0
+    pos = HEADER_SIZE
+    while pos < used:
+        length = struct.unpack_from('<I', data, pos)[0]
+        key = data[pos + 4:pos + 4 + length].decode()
+        offset = pos + 4 + _padded(length)
+        yield key, struct.unpack_from('<d', data, offset)[0], offset
+        pos = offset + 8
+
+
+def _padded(length):
+    # Keeps every value 8-byte aligned, so it is written in one store
+    return length + (-(length + 4) % 8)
+
+
+class MmapValues:
+    """Values of this process in a memory-mapped file, ``<METRICS_DIR>/<pid>.db``.
+
+    Each entry is a length-prefixed key followed by a float64. Only the
+    owning process writes the file: new keys are appended, known ones
+    updated in place. The header's used size is written last, so a reader
+    in another process never sees a half-written entry.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size < INITIAL_FILE_SIZE:
+            self.file.truncate(size := INITIAL_FILE_SIZE)
+        self.capacity = size
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = struct.unpack_from('<I', self.map, 0)[0] or HEADER_SIZE
+        self.positions = {key: offset for key, _, offset in _entries(self.map)}
+
+    def inc(self, key, amount):
+        offset = self.positions.get(key)
+        if offset is None:
+            offset = self._append(key)
+        value = struct.unpack_from('<d', self.map, offset)[0]
+        struct.pack_into('<d', self.map, offset, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        entry = struct.pack(f'<I{_padded(len(encoded))}sd', len(encoded), encoded, 0.0)
+        if self.used + len(entry) > self.capacity:
+            self._grow(self.used + len(entry))
+        self.map[self.used:self.used + len(entry)] = entry
+        offset = self.used + len(entry) - 8
+        self.used += len(entry)
+        struct.pack_into('<I', self.map, 0, self.used)
+        self.positions[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        while self.capacity < needed:
+            self.capacity *= 2
+        self.map.close()
+        self.file.truncate(self.capacity)
+        self.map = mmap.mmap(self.file.fileno(), self.capacity)
+
+
+def read_values(directory):
+    """Values summed over the files of every process (live or exited) in ``directory``."""
+    totals = {}
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        for key, value, _ in _entries(data):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def clear_metrics_dir(directory=None):
+    """Delete the value files, e.g. from gunicorn's ``on_starting`` hook (see gunicorn.conf.py)."""
+    directory = directory or metrics_dir()
+    if directory:
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+class Registry:
+    """The metrics of this codebase and where this process stores their values.
+
+    Counters and histograms are stored per process and summed on scrape,
+    so every gunicorn worker (and the queue workers) counts towards the
+    same totals when they share METRICS_DIR. Files of exited workers are
+    kept: their counts stay part of the totals. Gauges are read from the
+    database when scraped, so they need no storage.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+        self.store = None
+        self.pid = None
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def _store(self):
+        # Re-opened after a fork: each worker writes its own file
+        if self.pid != os.getpid():
+            directory = metrics_dir()
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+                self.store = MmapValues(os.path.join(directory, f'{os.getpid()}.db'))
+            else:
+                self.store = LocalValues()
+            self.pid = os.getpid()
+        return self.store
+
+    def inc(self, key, amount):
+        with self.lock:
+            self._store().inc(key, amount)
+
+    def values(self):
+        directory = metrics_dir()
+        if directory:
+            return read_values(directory)
+        with self.lock:
+            return dict(self._store().values)
+
+    def exposition(self):
+        """All metrics in the Prometheus text format."""
+        stored = {}
+        for key, value in self.values().items():
+            name, labels = json.loads(key)
+            stored.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples(stored))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _key(name, labels):
+    return json.dumps([name, labels])
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _sample(name, labels, value):
+    label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f'{name}{{{label_text}}} {value!r}' if labels else f'{name} {value!r}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.registry = registry
+        registry.register(self)
+
+    def _labels(self, values):
+        if set(values) != set(self.labels):
+            raise ValueError(f"{self.name} takes the labels {self.labels}, got {tuple(values)}")
+        return [[label, str(values[label])] for label in self.labels]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.inc(_key(self.name, self._labels(labels)), amount)
+
+    def samples(self, stored):
+        return sorted(_sample(self.name, labels, value) for labels, value in stored.get(self.name, ()))
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labels, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        index = bisect_left(self.buckets, value)
+        bound = repr(float(self.buckets[index])) if index < len(self.buckets) else '+Inf'
+        # Buckets are stored non-cumulative and summed up on scrape
+        self.registry.inc(_key(f'{self.name}_bucket', labels + [['le', bound]]), 1)
+        self.registry.inc(_key(f'{self.name}_sum', labels), value)
+        self.registry.inc(_key(f'{self.name}_count', labels), 1)
+
+    def samples(self, stored):
+        bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+        counts = {}
+        for labels, value in stored.get(f'{self.name}_bucket', ()):
+            *series, (_, bound) = labels
+            counts.setdefault(tuple(map(tuple, series)), {})[bound] = value
+        sums = {tuple(map(tuple, labels)): value for labels, value in stored.get(f'{self.name}_sum', ())}
+        lines = []
+        for series in sorted(counts):
+            cumulative = 0.0
+            for bound in bounds:
+                cumulative += counts[series].get(bound, 0.0)
+                lines.append(_sample(f'{self.name}_bucket', [*series, ('le', bound)], cumulative))
+            lines.append(_sample(f'{self.name}_sum', series, sums.get(series, 0.0)))
+            lines.append(_sample(f'{self.name}_count', series, cumulative))
+        return lines
+
+
+class Gauge(Metric):
+    """A value read when scraped: ``collect()`` returns ``[(labels_dict, value)]``."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, collect, labels=(), registry=REGISTRY):
+        super().__init__(name, documentation, labels, registry)
+        self.collect = collect
+
+    def samples(self, stored):
+        return [_sample(self.name, self._labels(labels), float(value)) for labels, value in self.collect()]
+
+
+def _queue_depths(model, statuses):
+    from django.db.models import Count
+
+    counts = dict(model.objects.filter(status__in=statuses).values_list('status').annotate(n=Count('id')))
+    return [({'status': status}, counts.get(status, 0)) for status in statuses]
+
+
+def _outbox_depths():
+    from clients.models import OutboxMessage
+
+    return _queue_depths(OutboxMessage, ('pending', 'dead'))
+
+
+def _email_depths():
+    from users.models import OutgoingEmail
+
+    return _queue_depths(OutgoingEmail, ('pending', 'dead'))
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to build the response, by URL name and method.', ['route', 'method'],
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent in database queries per request.', ['route', 'method'],
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Responses by URL name, method and status code.', ['route', 'method', 'status'],
+)
+EXTERNAL_PUSHES = Counter(
+    'external_db_push_messages_total',
+    'Results written to the external database, by outcome (sent, failed: retried later, dead: given up).',
+    ['outcome'],
+)
+OUTBOX_DEPTH = Gauge(
+    'external_outbox_messages', 'External DB outbox messages waiting to be sent (pending) or given up (dead).',
+    _outbox_depths, ['status'],
+)
+EMAIL_QUEUE_DEPTH = Gauge(
+    'outgoing_email_messages', 'Queued emails waiting to be sent (pending) or given up (dead).',
+    _email_depths, ['status'],
+)
+
+
+def route_name(request):
+    """Label for the matched URL pattern: its name (``answers-replace``), else the route itself."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Unmatched paths (404s) share one label, so scanners cannot add series
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """Records the latency, DB time and status of every request (off with ``METRICS_ENABLED = False``)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        recorder = QueryRecorder(fingerprints=False)
+        with recorder.record():
+            response = self.get_response(request)
+        route = route_name(request)
+        method = request.method if request.method in STANDARD_METHODS else 'other'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, route=route, method=method)
+        REQUEST_DB_TIME.observe(recorder.seconds, route=route, method=method)
+        REQUESTS.inc(route=route, method=method, status=response.status_code)
+        return response
+
+
+def metrics_view(request):
+    """``/metrics`` for Prometheus; needs ``Authorization: Bearer <METRICS_TOKEN>``.
+
+    Without a METRICS_TOKEN it is only served with DEBUG on: a scrape runs
+    queries, so it is not left open to anyone.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return HttpResponseForbidden('Metrics token required')
+    elif not settings.DEBUG:
+        return HttpResponseForbidden('Set METRICS_TOKEN to enable /metrics')
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
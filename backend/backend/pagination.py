@@ -0,0 +1,119 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in keyset (cursor) pagination ordered by ``(<cursor_field>, id)`` descending.
+
+    Views choose the timestamp column with a ``cursor_field`` attribute and fall
+    back to ``id`` alone. Each page is a single indexed range scan, so fetching
+    page 10,000 costs the same as page 1.
+
+    While ``PAGINATION_COMPAT_MODE`` is on, requests that send neither ``cursor``
+    nor ``page_size`` get the full unpaginated list, as before.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.base_url = request.build_absolute_uri()
+        if (getattr(settings, 'PAGINATION_COMPAT_MODE', True)
+                and self.cursor_query_param not in params
+                and self.page_size_query_param not in params):
+            return None
+
+        self.page_size = self.get_page_size(request)
+        self.field_name = getattr(view, 'cursor_field', None) or 'pk'
+        field = queryset.model._meta.pk if self.field_name == 'pk' else queryset.model._meta.get_field(self.field_name)
+
+        if field.primary_key:
+            ordering = ['-pk']
+        elif field.null:
+            ordering = [F(self.field_name).desc(nulls_last=True), '-pk']
+        else:
+            ordering = ['-' + self.field_name, '-pk']
+        queryset = queryset.order_by(*ordering)
+
+        encoded = params.get(self.cursor_query_param)
+        if encoded:
+            value, pk = self.decode_cursor(encoded, field)
+            queryset = queryset.filter(self.position_filter(field, value, pk))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        default = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 50
+        maximum = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 500)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, maximum))
+
+    def position_filter(self, field, value, pk):
+        """Rows strictly after ``(value, pk)`` in descending order."""
+        if field.primary_key:
+            return Q(pk__lt=pk)
+        name = self.field_name
+        if value is None:
+            # Already inside the trailing block of NULL timestamps
+            return Q(**{f'{name}__isnull': True, 'pk__lt': pk})
+        after = Q(**{f'{name}__lt': value}) | Q(**{name: value, 'pk__lt': pk})
+        if field.null:
+            after |= Q(**{f'{name}__isnull': True})
+        return after
+
+    def encode_cursor(self, obj):
+        value = None if self.field_name == 'pk' else getattr(obj, self.field_name)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        raw = json.dumps([value, obj.pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, encoded, field):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            pk = int(pk)
+            if value is not None and not field.primary_key:
+                value = field.to_python(value)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('page_size', self.page_size),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,10 +49,16 @@ INSTALLED_APPS = [
     'reports',
     'answers',
     'companies',
+    'dashboard',
+    'screening',
+    # Synthetic data generator and API benchmarks (management commands only)
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'backend.sql_instrumentation.SQLInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +69,52 @@ MIDDLEWARE = [
     'companies.middleware.DistributionChannelContextMiddleware',
 ]
 
+# Prometheus metrics (backend/metrics.py), scraped from /metrics: request
+# latency and DB time by URL name and method, external DB push outcomes and
+# queue depths. Under gunicorn set METRICS_DIR to a directory shared by all
+# workers and the queue workers (e.g. on tmpfs) so their counts add up;
+# gunicorn.conf.py empties it when the server starts. Without it each
+# process reports only its own counts. Scrapers must send METRICS_TOKEN as a
+# bearer token; without one, /metrics is only served with DEBUG on.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Per-request SQL instrumentation (backend/sql_instrumentation.py), off by
+# default: query count and DB time as Server-Timing headers and one JSON log
+# line per request on the 'backend.sql' logger. A query fingerprint repeated
+# SQL_N_PLUS_ONE_THRESHOLD times in one request is flagged as an N+1.
+SQL_INSTRUMENTATION = False
+SQL_N_PLUS_ONE_THRESHOLD = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.sql': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Per-process cache used by DistributionChannelContextMiddleware for
+# (user, channel) membership checks. Local changes invalidate it immediately;
+# other worker processes see them after CHANNEL_CACHE_TTL seconds.
+CHANNEL_CACHE_TTL = 30
+CHANNEL_CACHE_SIZE = 10000
+
+# Questionnaire snapshots (questions/snapshot.py): how long a process trusts
+# its cached questionnaire version before re-reading it, and how long the
+# rendered snapshot for a version is kept.
+QUESTIONNAIRE_VERSION_TTL = 5
+QUESTIONNAIRE_SNAPSHOT_TTL = 24 * 3600
+
+# Score cut-offs used by assessments/scoring.py: a total score at or above
+# 'high' is high risk, at or above 'medium' is medium risk, otherwise low.
+# Run `manage.py rescore_assessments` after changing them.
+ASSESSMENT_RISK_THRESHOLDS = {'high': 70, 'medium': 40}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -71,6 +124,8 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# Chunks of resumable KYC uploads carry their position in this header
+CORS_ALLOW_HEADERS = (*default_headers, 'upload-offset')
 
 ROOT_URLCONF = 'backend.urls'
 
@@ -126,10 +181,36 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'users.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+# Keyset pagination (backend/pagination.py): upper bound for ?page_size, and
+# whether list endpoints still return a plain list when the caller sends
+# neither ?cursor nor ?page_size (keeps the existing frontend pages working).
+PAGINATION_MAX_PAGE_SIZE = 500
+PAGINATION_COMPAT_MODE = True
+
+# JWT requests (users/authentication.py) take the user's active flag, role and
+# channel from a cached copy of the account instead of loading the row on
+# every request. Saving or deleting a user drops the entry; with a per-process
+# cache, other processes see the change after USER_AUTH_CACHE_TTL seconds.
+USER_AUTH_CACHE_TTL = 60
+
+# Watchlist screening (screening/): client names scoring at least
+# SCREENING_MIN_SCORE against an active sanctions/PEP list become hits for
+# review. Clients are screened once their save commits (SCREENING_ON_SAVE);
+# a screening error is logged and never undoes the save. Loading a new list
+# rescreens everybody with SCREENING_WORKERS processes (None: one per CPU).
+# Each process rebuilds its in-memory index within SCREENING_INDEX_TTL
+# seconds of a list change.
+SCREENING_ON_SAVE = True
+SCREENING_MIN_SCORE = 0.85
+SCREENING_WORKERS = None
+SCREENING_INDEX_TTL = 60
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -151,6 +232,42 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resumable KYC uploads (clients/uploads.py). Part files are kept in
+# KYC_UPLOAD_TEMP_DIR, which should be on the same filesystem as MEDIA_ROOT
+# so that committing an upload is a rename. Sessions untouched for
+# KYC_UPLOAD_SESSION_TTL seconds are removed by `manage.py sweep_kyc_uploads`.
+# A request writing a chunk holds the session for at most
+# KYC_UPLOAD_CHUNK_TIMEOUT seconds; other chunks get a 409 meanwhile.
+KYC_UPLOAD_TEMP_DIR = BASE_DIR / 'kyc_uploads'
+KYC_UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+KYC_UPLOAD_SESSION_TTL = 24 * 3600
+KYC_UPLOAD_CHUNK_TIMEOUT = 600
+
+# KYC downloads (/api/kyc-documents/<id>/download/). Set KYC_DOWNLOAD_OFFLOAD
+# to 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd) to let the
+# web server send the file once Django has checked access; for nginx,
+# KYC_DOWNLOAD_ACCEL_PREFIX must be an `internal` location aliased to
+# MEDIA_ROOT. Left empty, Django streams the file itself.
+KYC_DOWNLOAD_OFFLOAD = os.environ.get('KYC_DOWNLOAD_OFFLOAD', '')
+KYC_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+# Lifetime in seconds of the signed links the frontend opens documents with
+# (/api/kyc-files/<token>/): long enough for a PDF viewer's range requests
+# while the document is open, short enough that a leaked link soon expires.
+KYC_SIGNED_URL_TTL = 300
+
+# Outgoing mail (users/mail_queue.py). Registration and approval emails are
+# queued in the database and sent by `manage.py send_queued_email --loop`
+# over one connection per batch. A failed message is retried after
+# MAIL_QUEUE_BACKOFF_BASE seconds, doubling up to MAIL_QUEUE_BACKOFF_MAX, and
+# marked dead after MAIL_QUEUE_MAX_ATTEMPTS tries.
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+MAIL_QUEUE_BACKOFF_BASE = 30
+MAIL_QUEUE_BACKOFF_MAX = 3600
+
+# Worker processes used to hash temporary passwords in
+# /api/users/approvals/bulk_approve/ (users/approvals.py); None uses every CPU.
+APPROVAL_HASH_WORKERS = None
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -158,6 +275,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 USERNAME_FIELD = 'email'
 
+# External MySQL connector (clients/external_db.py). Besides ENABLED, HOST,
+# PORT, NAME, USER, PASSWORD, CLIENTS_QUERY and RESULTS_TABLE, the connection
+# pool reads POOL_SIZE (5), POOL_MAX_LIFETIME (3600s), POOL_MAX_IDLE (300s)
+# and POOL_TIMEOUT (10s). The result outbox (clients/outbox.py) reads
+# OUTBOX_MAX_ATTEMPTS (10), OUTBOX_BACKOFF_BASE (5s), OUTBOX_BACKOFF_MAX
+# (3600s), OUTBOX_LEASE (300s: how long a flusher may take to push a claimed
+# batch before others retry it) and OUTBOX_KEY_COLUMN: set it to a unique
+# column of the results table to store idempotency keys there and make
+# re-sent rows overwrite the earlier copy (an upsert) instead of duplicating.
 EXTERNAL_DB = {
 
 }
@@ -0,0 +1,165 @@
+import json
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('backend.sql')
+
+# Quoted strings, numbers and placeholder lists vary between otherwise identical queries
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+LIST_RE = re.compile(r'\((?:\s*(?:%s|\?|\d+|NULL)\s*,)+\s*(?:%s|\?|\d+|NULL)\s*\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+SELECT_LIST_RE = re.compile(r'^SELECT (?:DISTINCT )?.+? FROM ', re.IGNORECASE)
+# Longest fingerprint written to a log line
+MAX_LOGGED_SQL = 300
+
+
+def abbreviate(sql):
+    """Shorten a query for a log line: the column list rarely tells which query it was."""
+    return SELECT_LIST_RE.sub('SELECT ... FROM ', sql, count=1)[:MAX_LOGGED_SQL]
+
+
+def fingerprint(sql):
+    """``sql`` with its literal values and IN lists collapsed, so repeats of one query compare equal."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = LIST_RE.sub('(...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Counts and times the SQL run inside ``record()``, on every database connection.
+
+    Installed with ``connection.execute_wrapper``, so it sees the queries
+    Django actually sends (including ones run by middleware and
+    serializers) at the cost of one timer call per query. Queries are
+    grouped by ``fingerprint``: the same fingerprint many times in one
+    request is the usual shape of an N+1 (one query per row of a list).
+    """
+
+    def __init__(self, fingerprints=True):
+        # Without fingerprints only the count and total time are kept
+        self.keep_fingerprints = fingerprints
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_seconds = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if self.keep_fingerprints:
+                key = fingerprint(sql)
+                self.fingerprints[key] += 1
+                self.fingerprint_seconds[key] += elapsed
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            # Wrapping does not open a database connection
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def repeated(self, threshold):
+        """``[(fingerprint, count, seconds)]`` of queries run at least ``threshold`` times, most frequent first."""
+        return [
+            (key, count, self.fingerprint_seconds[key])
+            for key, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+def n_plus_one_threshold():
+    return getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 10)
+
+
+class SQLInstrumentationMiddleware:
+    """Per-request query count, DB time and N+1 flags (opt-in with ``SQL_INSTRUMENTATION``).
+
+    Adds ``Server-Timing`` entries for the database time (with the query
+    count), the whole request, and, when a query fingerprint repeats at
+    least ``SQL_N_PLUS_ONE_THRESHOLD`` times, the number of such patterns;
+    browser dev tools show these next to the request. Every request is also
+    logged as one JSON line on the ``backend.sql`` logger, at WARNING when
+    an N+1 pattern was flagged.
+
+    Queries run while a streamed response is being sent (csv/ndjson report
+    exports) happen after the middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.seconds * 1000
+        repeated = recorder.repeated(n_plus_one_threshold())
+
+        timings = [f'db;dur={db_ms:.1f};desc="{recorder.count} queries"', f'app;dur={total_ms:.1f}']
+        if repeated:
+            timings.append(f'nplusone;desc="{len(repeated)} repeated queries"')
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(db_ms, 1),
+            'total_ms': round(total_ms, 1),
+        }
+        if repeated:
+            record['repeated'] = [
+                {'sql': abbreviate(key), 'count': count, 'db_ms': round(seconds * 1000, 1)}
+                for key, count, seconds in repeated
+            ]
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record))
+        return response
+
+
+@contextmanager
+def query_budget(max_queries, max_repeats=None):
+    """Fail a test when the block runs more than ``max_queries`` queries.
+
+    With ``max_repeats`` it also fails when any query fingerprint runs more
+    than that many times (an N+1). Unlike ``assertNumQueries`` the budget is
+    an upper bound, so an endpoint that gets cheaper keeps passing::
+
+        with query_budget(10, max_repeats=3):
+            self.client.get('/api/clients/?page_size=50')
+
+    The AssertionError lists the most repeated queries.
+    """
+    recorder = QueryRecorder()
+    with recorder.record():
+        yield recorder
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f"{recorder.count} queries, budget {max_queries}")
+    repeats = recorder.repeated(max_repeats + 1) if max_repeats is not None else []
+    if repeats:
+        problems.append(f"{len(repeats)} query(ies) repeated more than {max_repeats} times")
+    if problems:
+        details = '\n'.join(f"  {count}x {abbreviate(key)}" for key, count, _ in recorder.repeated(2)[:5])
+        raise AssertionError('; '.join(problems) + (f"\nMost repeated:\n{details}" if details else ''))
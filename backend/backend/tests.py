@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from screening.models import ScreeningHit, WatchlistEntry, WatchlistVersion
+from users.models import CustomUser
+
+from . import metrics
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+    def walk(self, url):
+        """Ids of every row reached by following ``next`` links from ``url``."""
+        seen = []
+        while url:
+            response = self.api.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        return seen
+
+    def test_compat_mode_returns_the_whole_list(self):
+        for i in range(3):
+            Client.objects.create(fullName=f"Client {i}")
+        response = self.api.get("/api/clients/")
+        self.assertEqual(len(response.json()), 3)
+
+        with override_settings(PAGINATION_COMPAT_MODE=False):
+            page = self.api.get("/api/clients/").json()
+        self.assertEqual((len(page["results"]), page["next"]), (3, None))
+
+    def test_ties_on_the_cursor_field(self):
+        version = WatchlistVersion.objects.create(name="eu", source_file="eu.csv", sha256="0" * 64)
+        entry = WatchlistEntry.objects.create(version=version, name="Vladimir Petrov")
+        client = Client.objects.create(fullName="Vladimir Petrov")
+        scores = [0.9, 0.95, 0.9, 0.9, 0.9, 0.92, 0.9]
+        for i, score in enumerate(scores):
+            ScreeningHit.objects.create(client=client, entry=entry, field=f"ubo{i}", screened_name="Vladimir Petrov",
+                                        matched_name="Vladimir Petrov", score=score)
+
+        seen = self.walk("/api/screening-hits/?page_size=2")
+
+        # Best score first; equal scores by id, each exactly once
+        expected = ScreeningHit.objects.order_by("-score", "-id").values_list("id", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_nullable_cursor_field(self):
+        clients = [Client.objects.create(fullName=f"Client {i}") for i in range(9)]
+        Client.objects.filter(pk__in=[c.pk for c in clients[2:5]]).update(createdAt=None)
+        Client.objects.filter(pk__in=[c.pk for c in clients[6:8]]).update(createdAt=clients[5].createdAt)
+
+        seen = self.walk("/api/clients/?page_size=2")
+
+        self.assertEqual(sorted(seen), sorted(c.pk for c in clients))
+        # Rows without a timestamp come last
+        self.assertEqual(set(seen[-3:]), {c.pk for c in clients[2:5]})
+
+    def test_malformed_cursor(self):
+        for cursor in ("zzz", "W10=", "WyJub3QtYS1kYXRlIiwxXQ=="):
+            self.assertEqual(self.api.get("/api/clients/", {"cursor": cursor}).status_code, 404)
+
+
+class MetricsStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def worker(self):
+        """The metrics as one worker process defines them, in its own registry."""
+        registry = metrics.Registry()
+        latency = metrics.Histogram("t_seconds", "Latency", ["route"], buckets=(0.5, 2), registry=registry)
+        requests = metrics.Counter("t_total", "Requests", ["status"], registry=registry)
+        return registry, latency, requests
+
+    def test_workers_are_summed(self):
+        with override_settings(METRICS_DIR=self.directory):
+            # Each worker writes <pid>.db
+            with mock.patch("backend.metrics.os.getpid", return_value=1001):
+                first, latency, requests = self.worker()
+                latency.observe(0.25, route="r")
+                latency.observe(1.5, route="r")
+                requests.inc(status=200)
+            with mock.patch("backend.metrics.os.getpid", return_value=1002):
+                second, latency, requests = self.worker()
+                latency.observe(0.25, route="r")
+                latency.observe(4, route="r")
+                requests.inc(2, status=200)
+                requests.inc(status=500)
+
+            text = first.exposition()
+            self.assertEqual(second.exposition(), text)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["1001.db", "1002.db"])
+        lines = text.splitlines()
+        # Buckets are stored per bucket and made cumulative on scrape
+        for line in (
+            't_seconds_bucket{route="r",le="0.5"} 2.0',
+            't_seconds_bucket{route="r",le="2.0"} 3.0',
+            't_seconds_bucket{route="r",le="+Inf"} 4.0',
+            't_seconds_sum{route="r"} 6.0',
+            't_seconds_count{route="r"} 4.0',
+            't_total{status="200"} 3.0',
+            't_total{status="500"} 1.0',
+        ):
+            self.assertIn(line, lines)
+
+    def test_file_grows_and_reopens(self):
+        path = os.path.join(self.directory, "1.db")
+        values = metrics.MmapValues(path)
+        keys = [f'["k", [["x", "{i:060d}"]]]' for i in range(20000)]
+        for key in keys:
+            values.inc(key, 1)
+        values.inc(keys[0], 5)
+
+        self.assertGreater(values.capacity, metrics.INITIAL_FILE_SIZE)
+        totals = metrics.read_values(self.directory)
+        self.assertEqual((len(totals), totals[keys[0]], totals[keys[-1]]), (20000, 6.0, 1.0))
+        # A restarted process with the same pid keeps counting in place
+        reopened = metrics.MmapValues(path)
+        reopened.inc(keys[-1], 1)
+        self.assertEqual(metrics.read_values(self.directory)[keys[-1]], 2.0)
+
+
+class MetricsViewTests(TestCase):
+    def test_needs_token_or_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", response.content.decode())
@@ -8,6 +8,7 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 from users.views import CustomTokenObtainPairView
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -19,13 +20,17 @@ urlpatterns = [
     path('api/', include('answers.urls')),
     path('api/reports/', include('reports.urls')),
     path('api/', include('companies.urls')),
+    path('api/dashboard/', include('dashboard.urls')),
+    path('api/', include('screening.urls')),
     
 
     # JWT token endpoints
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
-    
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.synthetic import SyntheticDataGenerator, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a reproducible synthetic dataset (channels, users, questionnaire, clients, assessments, answers, "
+        "KYC document metadata) for benchmarking, e.g. --clients 1000000 --answers-per-assessment 10. "
+        "Rows are added to the configured database; never run it against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--channels', type=int, default=20)
+        parser.add_argument('--users', type=int, default=200, help="The first one is an admin superuser.")
+        parser.add_argument('--questions', type=int, default=40,
+                            help="Questions to create; 0 answers the existing questionnaire.")
+        parser.add_argument('--clients', type=int, default=10000)
+        parser.add_argument('--assessments', type=int, help="Defaults to one per client.")
+        parser.add_argument('--answers-per-assessment', type=int, default=10)
+        parser.add_argument('--documents', type=int, help="KYC documents; defaults to one per two clients.")
+        parser.add_argument('--days', type=int, default=730, help="Spread creation dates over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild search terms, match keys, dashboard counters and screening hits.")
+        parser.add_argument('--force', action='store_true', help="Run even with DEBUG off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("DEBUG is off; this looks like a production database. Use --force to add synthetic data anyway.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        started = time.monotonic()
+        generator = SyntheticDataGenerator(
+            seed=options['seed'], batch_size=options['batch_size'], days=options['days'], log=self.stdout.write,
+        )
+        counts = generator.generate(
+            channels=options['channels'], users=options['users'], questions=options['questions'],
+            clients=options['clients'], assessments=options['assessments'],
+            answers_per_assessment=options['answers_per_assessment'], documents=options['documents'],
+        )
+        if not options['skip_derived']:
+            rebuild_derived(log=self.stdout.write)
+
+        summary = ', '.join(f"{count} {label}" for label, count in counts.items())
+        self.stdout.write(f"Generated {summary} in {time.monotonic() - started:.1f}s (seed {options['seed']}).")
@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.suite import BenchmarkSuite, compare
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot API endpoints in-process (latency percentiles, query counts, peak memory) and write "
+        "the results as JSON, optionally comparing them with an earlier run. answers_replace writes to the "
+        "database; run it against a generate_synthetic_data dataset, not production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', action='append', metavar='ENDPOINT',
+                            help="Benchmark only this endpoint (repeatable), e.g. clients_list.")
+        parser.add_argument('--user', help="Username to call the API as; defaults to the first active superuser.")
+        parser.add_argument('--output', default='benchmark-results.json', help="Where to write the results ('-' for stdout).")
+        parser.add_argument('--compare', metavar='PREVIOUS_JSON', help="Results of an earlier run to compare with.")
+        parser.add_argument('--max-regression', type=float, metavar='PERCENT',
+                            help="With --compare, fail when any p50/p95 got slower by more than this.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1")
+        users = CustomUser.objects.filter(is_active=True)
+        if options['user']:
+            user = users.filter(username=options['user']).first()
+        else:
+            user = users.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError("No such active user; pass --user or create a superuser (generate_synthetic_data makes one).")
+
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        suite = BenchmarkSuite(user, iterations=options['iterations'], warmup=options['warmup'],
+                               seed=options['seed'], log=self.stdout.write)
+        try:
+            result = suite.run(options['only'])
+        except ValueError as exc:
+            raise CommandError(f"{exc}; choose from {', '.join(suite.endpoints)}")
+
+        document = json.dumps(result, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(document)
+        else:
+            with open(options['output'], 'w') as f:
+                f.write(document + '\n')
+            self.stdout.write(f"Wrote {len(result['endpoints'])} endpoint result(s) to {options['output']}.")
+
+        if previous is not None:
+            lines, worst = compare(previous, result)
+            for line in lines:
+                self.stdout.write(line)
+            if options['max_regression'] is not None and worst > options['max_regression']:
+                raise CommandError(f"Slowest regression {worst:.0f}% exceeds --max-regression {options['max_regression']:g}%.")
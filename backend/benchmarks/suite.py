@@ -0,0 +1,267 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client as TestClient, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from answers.models import AssessmentAnswer
+from assessments.models import Assessment
+from backend.sql_instrumentation import QueryRecorder, n_plus_one_threshold
+from clients.models import Client, KycDocument
+from questions.models import Option
+from users.models import CustomUser
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULT_FORMAT = 1
+PERCENTILES = (50, 90, 95, 99)
+# Extra calls per endpoint whose queries are captured (not timed)
+QUERY_SAMPLES = 5
+# Assessments the answer autosave benchmark writes to
+REPLACE_ASSESSMENTS = 200
+REPLACE_ANSWERS = 10
+REPORT_DAYS = 30
+# Relative difference in row counts below which two datasets count as the same
+DATASET_TOLERANCE = 0.01
+
+
+def percentile(values, pct):
+    """``pct``-th percentile of ``values`` with linear interpolation between ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def dataset_counts():
+    return {
+        'users': CustomUser.objects.count(),
+        'clients': Client.objects.count(),
+        'assessments': Assessment.objects.count(),
+        'answers': AssessmentAnswer.objects.count(),
+        'kyc_documents': KycDocument.objects.count(),
+    }
+
+
+class BenchmarkSuite:
+    """Times the hot API endpoints through Django's test client, in-process.
+
+    Each endpoint is called ``warmup`` times untimed, then ``iterations``
+    times timed; a few more calls record the SQL queries (count, DB time,
+    N+1 patterns, see backend/sql_instrumentation.py), and one runs
+    under tracemalloc for the peak Python memory of a request. Requests are
+    authenticated as ``user`` with a JWT (API views) and a session (report
+    views), and run with DEBUG off. The request parameters (search words,
+    assessments written) come from a seeded generator, so two runs against
+    the same dataset send the same requests.
+
+    ``answers_replace`` writes: it rewrites the answers of a few of the most
+    recent assessments.
+    """
+
+    def __init__(self, user, iterations=50, warmup=5, seed=0, log=None):
+        self.user = user
+        self.iterations = iterations
+        self.warmup = warmup
+        self.seed = seed
+        self.log = log or (lambda message: None)
+        self.client = TestClient(raise_request_exception=False)
+        self.client.force_login(user)
+        self.endpoints = {
+            'clients_list': self.clients_list,
+            'clients_search': self.clients_search,
+            'assessments_list': self.assessments_list,
+            'answers_replace': self.answers_replace,
+            'reports_monthly': self.reports_monthly,
+            'dashboard_stats': self.dashboard_stats,
+        }
+
+    # Requests: each returns (method, path, data) for one call
+
+    def clients_list(self):
+        return 'get', '/api/clients/', {'page_size': 50}
+
+    def clients_search(self):
+        if not hasattr(self, '_search_words'):
+            names = Client.objects.order_by('-pk').exclude(fullName='').values_list('fullName', flat=True)[:500]
+            self._search_words = sorted({word for name in names for word in name.split() if len(word) > 2}) or ['smith']
+        word = self.random.choice(self._search_words)
+        # Typed so far: a prefix of three letters or more
+        return 'get', '/api/clients/search/', {'q': word[:self.random.randint(3, len(word))]}
+
+    def assessments_list(self):
+        return 'get', '/api/assessments/', {'page_size': 50}
+
+    def answers_replace(self):
+        if not hasattr(self, '_replace_targets'):
+            self._replace_targets = list(Assessment.objects.order_by('-pk').values_list('pk', flat=True)[:REPLACE_ASSESSMENTS])
+            options = {}
+            for question_id, text in Option.objects.order_by('question_id', 'id').values_list('question_id', 'option_text'):
+                options.setdefault(question_id, []).append(text)
+            self._replace_options = options
+        if not self._replace_targets or not self._replace_options:
+            return None
+        questions = self.random.sample(sorted(self._replace_options), min(REPLACE_ANSWERS, len(self._replace_options)))
+        answers = [{'question': q, 'selected_text': self.random.choice(self._replace_options[q])} for q in questions]
+        return 'post', '/api/answers/replace/', {'assessment': self.random.choice(self._replace_targets), 'answers': answers}
+
+    def reports_monthly(self):
+        today = timezone.localdate()
+        return 'get', '/api/reports/monthly/', {
+            'start_date': (today - timedelta(days=REPORT_DAYS)).isoformat(), 'end_date': today.isoformat(),
+        }
+
+    def dashboard_stats(self):
+        return 'get', '/api/dashboard/stats/', {}
+
+    # Running
+
+    def _call(self, build):
+        request = build()
+        if request is None:
+            return None, None
+        method, path, data = request
+        if method == 'get':
+            response = self.client.get(path, data)
+        else:
+            response = self.client.generic(method.upper(), path, json.dumps(data), content_type='application/json')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, len(body)
+
+    def measure(self, name):
+        build = self.endpoints[name]
+        self.random = random.Random(f"{self.seed}:{name}")
+        # A fresh token per endpoint, so long runs do not outlive it
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        for _ in range(self.warmup):
+            self._call(build)
+
+        timings, statuses, size = [], set(), 0
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            status, size = self._call(build)
+            timings.append((time.perf_counter() - started) * 1000)
+            statuses.add(status)
+        if statuses == {None}:
+            return {'skipped': 'no data to build requests from'}
+
+        queries, query_ms, repeated = [], [], 0
+        for _ in range(QUERY_SAMPLES):
+            with QueryRecorder().record() as recorder:
+                self._call(build)
+            queries.append(recorder.count)
+            query_ms.append(recorder.seconds * 1000)
+            repeated = max(repeated, len(recorder.repeated(n_plus_one_threshold())))
+
+        tracemalloc.start()
+        try:
+            self._call(build)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'status': sorted(statuses),
+            'response_bytes': size,
+            'iterations': self.iterations,
+            'latency_ms': {
+                'min': round(min(timings), 3),
+                'mean': round(statistics.fmean(timings), 3),
+                **{f"p{pct}": round(percentile(timings, pct), 3) for pct in PERCENTILES},
+                'max': round(max(timings), 3),
+            },
+            'queries': int(statistics.median(queries)),
+            'max_queries': max(queries),
+            'query_ms': round(statistics.median(query_ms), 3),
+            # Query fingerprints the SQL instrumentation would flag as N+1
+            'repeated_queries': repeated,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, names=None):
+        """Benchmark ``names`` (default: all endpoints); returns the result document."""
+        names = names or list(self.endpoints)
+        unknown = sorted(set(names) - set(self.endpoints))
+        if unknown:
+            raise ValueError(f"Unknown endpoint(s): {', '.join(unknown)}")
+        result = {
+            'format': RESULT_FORMAT,
+            'started_at': timezone.now().isoformat(),
+            'git_commit': git_commit(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'platform': platform.platform(),
+            },
+            'dataset': dataset_counts(),
+            'settings': {'iterations': self.iterations, 'warmup': self.warmup, 'seed': self.seed},
+            'endpoints': {},
+        }
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        # Timed without the per-request instrumentation; measure() records queries itself
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=hosts, SQL_INSTRUMENTATION=False):
+            for name in names:
+                result['endpoints'][name] = stats = self.measure(name)
+                if 'latency_ms' in stats:
+                    latency = stats['latency_ms']
+                    self.log(f"{name}: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+                             f"{stats['queries']} queries ({stats['repeated_queries']} repeated), peak {stats['peak_memory_kb']:.0f} KiB, status {stats['status']}")
+                else:
+                    self.log(f"{name}: skipped ({stats['skipped']})")
+        if resource is not None:
+            # Linux reports KiB, macOS bytes
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            result['environment']['max_rss_kb'] = max_rss // 1024 if platform.system() == 'Darwin' else max_rss
+        return result
+
+
+def compare(previous, current, metrics=('p50', 'p95')):
+    """Lines describing how ``current`` differs from ``previous``, plus the worst slowdown of any metric in %."""
+    lines, worst = [], 0.0
+    for name, stats in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if 'latency_ms' not in stats or not before or 'latency_ms' not in before:
+            lines.append(f"{name}: no previous result")
+            continue
+        parts = []
+        for metric in metrics:
+            old, new = before['latency_ms'][metric], stats['latency_ms'][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worst = max(worst, change)
+            parts.append(f"{metric} {old:.1f} -> {new:.1f} ms ({change:+.0f}%)")
+        if before.get('queries') != stats['queries']:
+            parts.append(f"queries {before.get('queries')} -> {stats['queries']}")
+        lines.append(f"{name}: {', '.join(parts)}")
+    # answers_replace adds and removes a few answers; only flag real dataset changes
+    old_counts, new_counts = previous.get('dataset', {}), current['dataset']
+    changed = [f"{name} {old_counts.get(name)} -> {count}" for name, count in new_counts.items()
+               if abs(count - old_counts.get(name, 0)) > DATASET_TOLERANCE * max(count, 1)]
+    if changed:
+        lines.append(f"note: the dataset differs ({', '.join(changed)})")
+    return lines, worst
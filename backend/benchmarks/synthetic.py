@@ -0,0 +1,377 @@
+import io
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from answers.models import AssessmentAnswer
+from assessments.models import Assessment
+from assessments.scoring import risk_level_for, risk_thresholds
+from categories.models import Category
+from clients.duplicates import rebuild_match_keys
+from clients.models import Client, KycBlob, KycDocument, ReferenceSequence
+from clients.search import rebuild_search_index
+from clients.storage import blob_name
+from companies.models import DistributionChannel, DistributionChannelMembership
+from questions.models import Option, Question
+from questions.snapshot import bump_version
+from screening.models import WatchlistVersion
+from screening.screener import rescreen_clients
+from users.models import CustomUser
+
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Ahmed', 'Fatima',
+    'Mohammed', 'Aisha', 'Wei', 'Li', 'Raj', 'Priya', 'Arjun', 'Ananya', 'Jean', 'Marie',
+    'Pierre', 'Sophie', 'Luc', 'Camille', 'Carlos', 'Maria', 'Jose', 'Ana', 'Kevin', 'Nadia',
+    'Yusuf', 'Leila', 'Hiroshi', 'Yuki', 'Olga', 'Ivan', 'Grace', 'Samuel', 'Chloe', 'Daniel',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Lee', 'Thompson',
+    'Patel', 'Sharma', 'Singh', 'Kumar', 'Gupta', 'Khan', 'Hassan', 'Ali', 'Chen', 'Wang',
+    'Zhang', 'Liu', 'Nguyen', 'Tran', 'Dubois', 'Laurent', 'Lefebvre', 'Moreau', 'Ramgoolam', 'Jugnauth',
+    'Bhugun', 'Appadoo', 'Ramdin', 'Seegoolam', 'Ivanov', 'Petrov', 'Sato', 'Tanaka', 'Okafor', 'Mensah',
+)
+COMPANY_WORDS = (
+    'Ocean', 'Island', 'Coral', 'Summit', 'Atlas', 'Horizon', 'Sunrise', 'Harbour', 'Lagoon', 'Crest',
+    'Pioneer', 'Delta', 'Phoenix', 'Royal', 'Silver', 'Golden', 'Eastern', 'Western', 'Global', 'United',
+)
+COMPANY_SUFFIXES = ('Ltd', 'Ltee', 'Holdings', 'Trading', 'Group', 'Investments', 'Services')
+BUSINESSES = (
+    'Retail', 'Import/Export', 'Construction', 'Tourism', 'Real estate', 'Financial services',
+    'Manufacturing', 'Agriculture', 'Logistics', 'Consulting', 'Textiles', 'Fishing',
+)
+CITIES = (
+    'Port Louis', 'Curepipe', 'Quatre Bornes', 'Vacoas', 'Rose Hill', 'Mahebourg', 'Flacq', 'Grand Baie',
+    'Goodlands', 'Triolet', 'Moka', 'Ebene',
+)
+STREETS = ('Royal Road', 'Main Street', 'Church Street', 'Market Lane', 'Coastal Road', 'Avenue des Palmiers')
+KYC_FILENAMES = (
+    'passport.pdf', 'national_id.jpg', 'proof_of_address.pdf', 'bank_statement.pdf',
+    'brn_certificate.pdf', 'utility_bill.png',
+)
+# Client.distributionChannel / CustomUser.distribution_channel of each channel type
+CHANNEL_TYPES = {'headoffice': 'HeadOffice', 'branch': 'Branch', 'agents': 'Agent'}
+CORPORATE_SHARE = 0.2
+ASSESSMENT_STATUSES = ('pending', 'submitted', 'approved', 'rejected')
+ASSESSMENT_STATUS_WEIGHTS = (15, 15, 60, 10)
+# Option scores of each generated question
+OPTION_SCORES = (0, 3, 6, 10)
+# Share of KYC files uploaded for more than one client (e.g. a shared proof of address)
+SHARED_DOCUMENT_SHARE = 0.05
+
+
+@contextmanager
+def backdating(*fields):
+    """Let bulk_create keep the values set on ``auto_now_add`` fields instead of now()."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences(models):
+    # Rows are inserted with explicit ids; move the backend's sequences past them
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class SyntheticDataGenerator:
+    """Adds a reproducible synthetic dataset next to whatever is already stored.
+
+    Rows get explicit, consecutive primary keys after the current maximum,
+    so related rows (an assessment's client, its answers) are drawn from an
+    id range without holding earlier batches in memory, and bulk_create works the same
+    on backends that do not return ids (MySQL). Every batch is inserted in
+    its own transaction. The same ``seed`` on the same starting data yields
+    the same rows.
+
+    Bulk inserts send no signals, so derived tables (client search terms,
+    duplicate match keys, dashboard counters, screening hits) are not kept
+    up to date while inserting; ``rebuild_derived`` recomputes them
+    afterwards, one pass each.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, days=730, log=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.now = timezone.now()
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def generate(self, channels=20, users=200, questions=40, clients=10000, assessments=None,
+                 answers_per_assessment=10, documents=None):
+        """Create the dataset; ``assessments`` and ``documents`` default to one per client and one per two."""
+        assessments = clients if assessments is None else assessments
+        documents = clients // 2 if documents is None else documents
+        self.create_channels(channels)
+        self.create_users(users)
+        self.create_questionnaire(questions)
+        self.create_clients(clients)
+        self.create_assessments(assessments, answers_per_assessment)
+        self.create_documents(documents)
+        reset_sequences([DistributionChannel, DistributionChannelMembership, CustomUser, Category, Question,
+                         Option, Client, Assessment, AssessmentAnswer, KycDocument])
+        return self.counts
+
+    def _timed(self, label, count, started):
+        self.counts[label] = self.counts.get(label, 0) + count
+        seconds = time.monotonic() - started
+        rate = f", {count / seconds:.0f}/s" if seconds and count else ''
+        self.log(f"{label}: {count} in {seconds:.1f}s{rate}")
+
+    def _past(self):
+        return self.now - timedelta(seconds=self.random.randrange(self.days * 86400))
+
+    def _phone(self):
+        return f"+230 5{self.random.randrange(10000000):07d}"
+
+    def _person(self):
+        return f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}"
+
+    def create_channels(self, count):
+        started = time.monotonic()
+        first = next_id(DistributionChannel)
+        types = list(CHANNEL_TYPES)
+        labels = dict(DistributionChannel.CHANNEL_CHOICES)
+        rows = []
+        for pk in range(first, first + count):
+            # One head office per run, the rest branches and agents
+            channel_type = 'headoffice' if pk == first else self.random.choice(types[1:])
+            rows.append(DistributionChannel(
+                pk=pk, name=f"{self.random.choice(CITIES)} {labels[channel_type]} {pk}", code=f"SYN-{pk}",
+                channel_type=channel_type, address=f"{self.random.randint(1, 200)} {self.random.choice(STREETS)}",
+                phone=self._phone(), email=f"channel{pk}@example.com",
+            ))
+        DistributionChannel.objects.bulk_create(rows, batch_size=self.batch_size)
+        self.channels = [(row.pk, CHANNEL_TYPES[row.channel_type]) for row in rows] or self._existing_channels()
+        self._timed('channels', count, started)
+
+    def _existing_channels(self):
+        return [(pk, CHANNEL_TYPES[channel_type])
+                for pk, channel_type in DistributionChannel.objects.values_list('pk', 'channel_type')]
+
+    def create_users(self, count):
+        """Users spread over the channels; the first of a run is an admin superuser."""
+        started = time.monotonic()
+        first = next_id(CustomUser)
+        password = make_password(None)
+        users, memberships = [], []
+        for pk in range(first, first + count):
+            first_name, last_name = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+            admin = pk == first
+            role = 'admin' if admin else self.random.choices(('compliance', 'user'), (1, 9))[0]
+            channel_id, channel = self.random.choice(self.channels) if self.channels else (None, None)
+            users.append(CustomUser(
+                pk=pk, username=f"synthetic{pk}", first_name=first_name, last_name=last_name,
+                email=f"{first_name}.{last_name}.{pk}@example.com".lower(), password=password, role=role,
+                distribution_channel=channel, is_approved=True, is_staff=admin, is_superuser=admin,
+                phone_number=self._phone(),
+            ))
+            if channel_id:
+                memberships.append(DistributionChannelMembership(user_id=pk, channel_id=channel_id, role=role))
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+            DistributionChannelMembership.objects.bulk_create(memberships, batch_size=self.batch_size)
+        self.users = range(first, first + count) if count else list(CustomUser.objects.values_list('pk', flat=True))
+        self._timed('users', count, started)
+
+    def create_questionnaire(self, count, per_category=8):
+        started = time.monotonic()
+        if not count:
+            self.questions = self._existing_questions()
+            self._timed('questions', 0, started)
+            return
+        first_category, first_question = next_id(Category), next_id(Question)
+        categories = [
+            Category(pk=pk, name=f"Synthetic risk factors {pk}")
+            for pk in range(first_category, first_category + (count + per_category - 1) // per_category)
+        ]
+        questions, options = [], []
+        for n, pk in enumerate(range(first_question, first_question + count)):
+            questions.append(Question(
+                pk=pk, category_id=categories[n // per_category].pk, question_text=f"Synthetic risk question {pk}?",
+                field_type=self.random.choice(('select', 'radio')), display_order=n % per_category,
+            ))
+            options.extend(
+                Option(question_id=pk, option_text=f"Answer {letter}", score_value=score)
+                for letter, score in zip('ABCD', OPTION_SCORES)
+            )
+        with transaction.atomic():
+            Category.objects.bulk_create(categories)
+            Question.objects.bulk_create(questions, batch_size=self.batch_size)
+            Option.objects.bulk_create(options, batch_size=self.batch_size)
+        self.questions = {pk: [(f"Answer {letter}", score) for letter, score in zip('ABCD', OPTION_SCORES)]
+                          for pk in range(first_question, first_question + count)}
+        self._timed('questions', count, started)
+
+    @staticmethod
+    def _existing_questions():
+        questions = {}
+        for question_id, text, score in Option.objects.order_by('question_id', 'score_value', 'id').values_list(
+                'question_id', 'option_text', 'score_value'):
+            questions.setdefault(question_id, []).append((text, score))
+        return questions
+
+    def _answer(self, options):
+        # Lower-scoring (low-risk) options are picked more often
+        return self.random.choices(options, [1 / (n + 1) for n in range(len(options))])[0]
+
+    def _client(self, pk, reference, user_id):
+        channel_id, channel = self.random.choice(self.channels) if self.channels else (None, 'HeadOffice')
+        corporate = reference.startswith('CORP')
+        values = {
+            'pk': pk, 'reference': reference, 'clientType': 'corporate' if corporate else 'individual',
+            'distributionChannel': channel, 'distribution_channel_id': channel_id, 'created_by_id': user_id,
+            'email': '', 'phone': self._phone(), 'city': self.random.choice(CITIES),
+            'address': f"{self.random.randint(1, 200)} {self.random.choice(STREETS)}",
+            'createdAt': self._past(),
+        }
+        if corporate:
+            name = f"{self.random.choice(COMPANY_WORDS)} {self.random.choice(COMPANY_WORDS)} {self.random.choice(COMPANY_SUFFIXES)}"
+            values.update(
+                corporateName=name, ubo=self._person(), natureOfBusiness=self.random.choice(BUSINESSES),
+                brn=f"C{self.random.randrange(10 ** 8):08d}", vat=f"VAT{self.random.randrange(10 ** 8):08d}",
+                email=f"info{pk}@example.com",
+            )
+        else:
+            name = self._person()
+            values.update(
+                fullName=name, nationalId=f"{name[0]}{self.random.randrange(10 ** 12):012d}{self.random.choice('ABCDEFGH')}",
+                email=f"{name.replace(' ', '.').lower()}{pk}@example.com",
+            )
+        return Client(**values)
+
+    def create_clients(self, count):
+        started = time.monotonic()
+        first = next_id(Client)
+        created_at = Client._meta.get_field('createdAt')
+        with backdating(created_at):
+            for start in range(first, first + count, self.batch_size):
+                pks = range(start, min(start + self.batch_size, first + count))
+                corporate = [self.random.random() < CORPORATE_SHARE for _ in pks]
+                references = {
+                    True: iter(ReferenceSequence.reserve('CORP', sum(corporate)) if any(corporate) else ()),
+                    False: iter(ReferenceSequence.reserve('INDI', len(pks) - sum(corporate)) if not all(corporate) else ()),
+                }
+                rows = [
+                    self._client(pk, next(references[is_corporate]), self.random.choice(self.users) if self.users else None)
+                    for pk, is_corporate in zip(pks, corporate)
+                ]
+                with transaction.atomic():
+                    Client.objects.bulk_create(rows)
+        self.clients = range(first, first + count) if count else list(Client.objects.values_list('pk', flat=True))
+        self._timed('clients', count, started)
+
+    def create_assessments(self, count, answers_per_assessment):
+        """Assessments of random clients, each answering a random subset of the questions.
+
+        Scores and risk levels are computed from the options picked, as the
+        questionnaire page would.
+        """
+        started = time.monotonic()
+        if not (self.clients and self.users and self.questions):
+            self._timed('assessments', 0, started)
+            return
+        first = next_id(Assessment)
+        thresholds = risk_thresholds()
+        per_assessment = min(answers_per_assessment, len(self.questions))
+        question_ids = list(self.questions)
+        answer_count = 0
+        submitted_at = Assessment._meta.get_field('submitted_at')
+        answered_at = AssessmentAnswer._meta.get_field('created_at')
+        # Answers dominate the volume: size batches by answers rather than assessments
+        assessment_batch = max(1, self.batch_size // max(per_assessment, 1))
+        with backdating(submitted_at, answered_at):
+            for start in range(first, first + count, assessment_batch):
+                assessments, answers = [], []
+                for pk in range(start, min(start + assessment_batch, first + count)):
+                    when = self._past()
+                    total = 0
+                    for question_id in self.random.sample(question_ids, per_assessment):
+                        text, score = self._answer(self.questions[question_id])
+                        total += score
+                        answers.append(AssessmentAnswer(
+                            assessment_id=pk, question_id=question_id, selected_text=text,
+                            score_value=score, created_at=when,
+                        ))
+                    assessments.append(Assessment(
+                        pk=pk, client_id=self.random.choice(self.clients),
+                        submitted_by_id=self.random.choice(self.users), submitted_at=when,
+                        status=self.random.choices(ASSESSMENT_STATUSES, ASSESSMENT_STATUS_WEIGHTS)[0],
+                        risk_level=risk_level_for(total, thresholds), total_score=total,
+                    ))
+                with transaction.atomic():
+                    Assessment.objects.bulk_create(assessments)
+                    AssessmentAnswer.objects.bulk_create(answers, batch_size=self.batch_size)
+                answer_count += len(answers)
+        self._timed('assessments', count, started)
+        self.counts['answers'] = self.counts.get('answers', 0) + answer_count
+
+    def create_documents(self, count):
+        """KYC document rows and their blob reference counts; no files are written."""
+        started = time.monotonic()
+        if not self.clients:
+            self._timed('kyc_documents', 0, started)
+            return
+        first = next_id(KycDocument)
+        shared = []
+        for start in range(first, first + count, self.batch_size):
+            documents, new_blobs, shared_refs = [], {}, Counter()
+            for pk in range(start, min(start + self.batch_size, first + count)):
+                if shared and self.random.random() < SHARED_DOCUMENT_SHARE:
+                    sha256, size = self.random.choice(shared)
+                    shared_refs[sha256, size] += 1
+                else:
+                    sha256, size = f"{self.random.getrandbits(256):064x}", self.random.randint(20000, 4000000)
+                    new_blobs[sha256] = KycBlob(sha256=sha256, size=size, ref_count=1)
+                documents.append(KycDocument(
+                    pk=pk, client_id=self.random.choice(self.clients), document=blob_name(sha256),
+                    original_filename=self.random.choice(KYC_FILENAMES), upload_date=self._past(), sha256=sha256,
+                ))
+            with transaction.atomic():
+                KycDocument.objects.bulk_create(documents)
+                KycBlob.objects.bulk_create(new_blobs.values())
+                for (sha256, size), refs in shared_refs.items():
+                    KycBlob.add_reference(sha256, size, refs)
+            if len(shared) < 1000:
+                shared.extend((blob.sha256, blob.size) for blob in list(new_blobs.values())[:1000 - len(shared)])
+        self._timed('kyc_documents', count, started)
+
+
+def rebuild_derived(log=None):
+    """Recompute what the bulk inserts skipped: search terms, match keys, dashboard counters, screening."""
+    log = log or (lambda message: None)
+    started = time.monotonic()
+    clients, terms = rebuild_search_index()
+    log(f"search index: {terms} term(s) for {clients} client(s) in {time.monotonic() - started:.1f}s")
+    started = time.monotonic()
+    clients, keys = rebuild_match_keys()
+    log(f"match keys: {keys} key(s) in {time.monotonic() - started:.1f}s")
+    started = time.monotonic()
+    call_command('rebuild_dashboard_counters', stdout=io.StringIO())
+    log(f"dashboard counters: rebuilt in {time.monotonic() - started:.1f}s")
+    if WatchlistVersion.objects.filter(is_active=True).exists():
+        report = rescreen_clients()
+        log(f"screening: {report['hits']} hit(s) for {report['clients']} client(s) in {report['seconds']}s")
+    bump_version()
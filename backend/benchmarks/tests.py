@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from .suite import compare, percentile
+
+
+def result(dataset, **endpoints):
+    return {
+        "dataset": dataset,
+        "endpoints": {
+            name: {"latency_ms": {"p50": p50, "p95": p95}, "queries": queries}
+            for name, (p50, p95, queries) in endpoints.items()
+        },
+    }
+
+
+class PercentileTests(SimpleTestCase):
+    def test_interpolates_between_ranks(self):
+        values = [40, 10, 30, 20]
+        self.assertEqual(percentile(values, 0), 10)
+        self.assertEqual(percentile(values, 50), 25)
+        self.assertAlmostEqual(percentile(values, 90), 37)
+        self.assertEqual(percentile(values, 100), 40)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class CompareTests(SimpleTestCase):
+    def test_reports_the_worst_slowdown(self):
+        previous = result({"clients": 1000}, clients_list=(10.0, 20.0, 3), dashboard_stats=(4.0, 8.0, 2))
+        current = result({"clients": 1000}, clients_list=(15.0, 22.0, 53), dashboard_stats=(2.0, 4.0, 2))
+
+        lines, worst = compare(previous, current)
+
+        self.assertEqual(worst, 50.0)
+        self.assertEqual(lines, [
+            "clients_list: p50 10.0 -> 15.0 ms (+50%), p95 20.0 -> 22.0 ms (+10%), queries 3 -> 53",
+            "dashboard_stats: p50 4.0 -> 2.0 ms (-50%), p95 8.0 -> 4.0 ms (-50%)",
+        ])
+
+    def test_only_speedups_report_no_regression(self):
+        previous = result({}, clients_list=(10.0, 20.0, 3))
+        current = result({}, clients_list=(5.0, 10.0, 3))
+        self.assertEqual(compare(previous, current)[1], 0.0)
+
+    def test_new_endpoints_and_dataset_drift(self):
+        previous = result({"clients": 1000, "answers": 5000}, clients_list=(10.0, 20.0, 3))
+        # A few answers written by answers_replace are within tolerance
+        current = result({"clients": 2000, "answers": 5020}, clients_list=(10.0, 20.0, 3),
+                         clients_search=(1.0, 2.0, 4))
+
+        lines, worst = compare(previous, current)
+
+        self.assertEqual(worst, 0.0)
+        self.assertIn("clients_search: no previous result", lines)
+        self.assertEqual(lines[-1], "note: the dataset differs (clients 1000 -> 2000)")
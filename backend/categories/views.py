@@ -1,7 +1,14 @@
 from rest_framework import viewsets
+from questions.snapshot import snapshot_response
 from .models import Category
 from .serializers import CategorySerializer
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+
+    def list(self, request, *args, **kwargs):
+        # Plain listing is served from the versioned questionnaire snapshot cache
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return snapshot_response(request, 'categories', lambda: CategorySerializer(self.get_queryset(), many=True).data)
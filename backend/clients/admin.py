@@ -1,5 +1,38 @@
 from django.contrib import admin
-from .models import Client, KycDocument
+from django.utils import timezone
+from .models import Client, DuplicateCandidate, KycBlob, KycDocument, KycUploadSession, ReferenceSequence, OutboxMessage
 
 admin.site.register(Client)
 admin.site.register(KycDocument)
+admin.site.register(ReferenceSequence)
+
+
+@admin.register(KycBlob)
+class KycBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at', 'updated_at')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('idempotency_key', 'table_name', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('idempotency_key', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected messages")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} message(s) requeued.")
+
+
+@admin.register(KycUploadSession)
+class KycUploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'client', 'filename', 'size', 'received', 'status', 'created_by', 'updated_at')
+    list_filter = ('status',)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('client', 'duplicate', 'score', 'status', 'reviewed_by', 'reviewed_at', 'updated_at')
+    list_filter = ('status',)
+    raw_id_fields = ('client', 'duplicate', 'reviewed_by')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ClientsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clients'
+
+    def ready(self):
+        # Release content-addressed KYC blobs when documents are deleted
+        from . import signals  # noqa: F401
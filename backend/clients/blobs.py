@@ -0,0 +1,193 @@
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import KycBlob, KycDocument
+from .storage import BLOB_DIR, blob_name, file_sha256, kyc_storage
+
+DEFAULT_MIGRATION_WORKERS = 8
+DEFAULT_MIGRATION_BATCH_SIZE = 500
+DEFAULT_GRACE_PERIOD = timedelta(hours=1)
+MIGRATION_REPORT_FIELDS = ('documents', 'blobs_created', 'missing', 'old_files_deleted', 'bytes_before', 'bytes_after')
+
+
+def _store_legacy_file(name, dry_run=False):
+    """Hash one legacy file and place it at its blob path.
+
+    Returns ``(sha256, size, existed)`` where ``existed`` tells whether the
+    blob was already stored, or None when the legacy file is missing. The
+    blob is hard-linked to the old file where possible, else copied.
+    """
+    path = kyc_storage.path(name)
+    try:
+        size = os.path.getsize(path)
+        sha256 = file_sha256(path)
+    except FileNotFoundError:
+        return None
+    target = kyc_storage.path(blob_name(sha256))
+    existed = os.path.exists(target)
+    if existed or dry_run:
+        return sha256, size, existed
+
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{sha256}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return sha256, size, False
+
+
+def migrate_legacy_documents(workers=DEFAULT_MIGRATION_WORKERS, batch_size=DEFAULT_MIGRATION_BATCH_SIZE,
+                             dry_run=False, keep_old=False):
+    """Move KycDocuments stored under the old ``kyc_docs/...`` names to content-addressed blobs.
+
+    Documents are processed ``batch_size`` at a time; within a batch the
+    files are hashed and linked into place by ``workers`` threads, then the
+    rows are repointed with one ``bulk_update`` and the blob reference counts
+    raised. Old files are deleted after their batch commits unless
+    ``keep_old`` is set. Missing files are counted and left untouched.
+
+    Returns a report with document and blob counts, bytes before and after
+    deduplication and the space saved.
+    """
+    # Every figure is reported, even when there was nothing to move
+    report = Counter(dict.fromkeys(MIGRATION_REPORT_FIELDS, 0))
+    seen_blobs = set()
+    started = time.monotonic()
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            docs = list(
+                KycDocument.objects.filter(id__gt=last_id)
+                .exclude(document__startswith=BLOB_DIR + '/')
+                .exclude(document='')
+                .order_by('id')
+                .values_list('id', 'document')[:batch_size]
+            )
+            if not docs:
+                break
+            last_id = docs[-1][0]
+            names = sorted({name for _, name in docs})
+            results = dict(zip(names, pool.map(partial(_store_legacy_file, dry_run=dry_run), names)))
+
+            for name, result in results.items():
+                if result is None:
+                    continue
+                sha256, size, existed = result
+                report['bytes_before'] += size
+                if sha256 not in seen_blobs:
+                    seen_blobs.add(sha256)
+                    if not existed:
+                        report['blobs_created'] += 1
+                        report['bytes_after'] += size
+
+            updates, references, sizes = [], Counter(), {}
+            for doc_id, name in docs:
+                if results[name] is None:
+                    report['missing'] += 1
+                    continue
+                sha256, size, _ = results[name]
+                updates.append(KycDocument(id=doc_id, document=blob_name(sha256), sha256=sha256))
+                references[sha256] += 1
+                sizes[sha256] = size
+            report['documents'] += len(updates)
+            if dry_run or not updates:
+                continue
+
+            with transaction.atomic():
+                KycDocument.objects.bulk_update(updates, ['document', 'sha256'])
+                for sha256, count in references.items():
+                    KycBlob.add_reference(sha256, sizes[sha256], count)
+
+            if not keep_old:
+                moved = {name for name, result in results.items() if result is not None}
+                # A legacy name still used by a row outside this batch keeps its file
+                moved -= set(KycDocument.objects.filter(document__in=moved).values_list('document', flat=True))
+                for name in moved:
+                    kyc_storage.delete(name)
+                    report['old_files_deleted'] += 1
+
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    report['seconds'] = round(time.monotonic() - started, 3)
+    return dict(report)
+
+
+def _walk_blob_files():
+    root = kyc_storage.path(BLOB_DIR)
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            yield os.path.join(directory, filename), filename
+
+
+def collect_kyc_blobs(grace=DEFAULT_GRACE_PERIOD, dry_run=False):
+    """Delete blobs no document has referenced for at least ``grace``.
+
+    Also removes blob files that never got a KycBlob row (e.g. the document
+    transaction rolled back) and stale temporary files, once older than
+    ``grace``. Returns ``(files_removed, bytes_freed)``.
+    """
+    cutoff = timezone.now() - grace
+    removed = freed = 0
+
+    for sha256 in list(KycBlob.objects.filter(ref_count__lte=0, updated_at__lt=cutoff).values_list('sha256', flat=True)):
+        with transaction.atomic():
+            # Re-checked under the row lock: a document saved meanwhile raised the count
+            blob = KycBlob.objects.select_for_update().filter(pk=sha256, ref_count__lte=0, updated_at__lt=cutoff).first()
+            if blob is None:
+                continue
+            name = blob_name(sha256)
+            if not dry_run:
+                blob.delete()
+                if kyc_storage.exists(name):
+                    kyc_storage.delete(name)
+            removed += 1
+            freed += blob.size
+
+    cutoff_ts = time.time() - grace.total_seconds()
+    batch = []
+
+    def sweep(batch):
+        nonlocal removed, freed
+        known = set(KycBlob.objects.filter(pk__in=[f for _, f in batch]).values_list('sha256', flat=True))
+        for path, filename in batch:
+            if filename not in known:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # Stored again since it was listed (ContentAddressedStorage touches it)
+                if stat.st_mtime >= cutoff_ts:
+                    continue
+                if not dry_run:
+                    os.unlink(path)
+                removed += 1
+                freed += stat.st_size
+
+    for path, filename in _walk_blob_files():
+        try:
+            if os.path.getmtime(path) >= cutoff_ts:
+                continue
+        except FileNotFoundError:
+            continue
+        batch.append((path, filename))
+        if len(batch) >= 1000:
+            sweep(batch)
+            batch = []
+    if batch:
+        sweep(batch)
+    return removed, freed
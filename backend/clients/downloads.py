@@ -0,0 +1,145 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import parse_etags
+from django.utils.http import content_disposition_header
+
+STREAM_BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Types a browser may render inline; anything else (html, svg, ...) is only
+# ever sent as an attachment, so an upload cannot run script in our origin
+INLINE_CONTENT_TYPES = {'application/pdf', 'image/jpeg', 'image/png'}
+SIGNED_URL_SALT = 'clients.kyc-document-download'
+
+
+def document_etag(document, size):
+    if document.sha256:
+        return f'"{document.sha256}"'
+    # Files stored before hashing was introduced: name and size is the best we have
+    return f'W/"{quote(document.document.name, safe="")}-{size}"'
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single ``bytes=`` range.
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges (the whole file is sent instead), and ``False`` when the range
+    lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        return False
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def sign_document(document):
+    """Token for the signed download URL of ``document`` (see ``unsign_document``)."""
+    return signing.dumps(document.pk, salt=SIGNED_URL_SALT)
+
+
+def unsign_document(token):
+    """Document pk of a token from ``sign_document``, or None once it is invalid or older than KYC_SIGNED_URL_TTL."""
+    try:
+        return signing.loads(token, salt=SIGNED_URL_SALT, max_age=getattr(settings, 'KYC_SIGNED_URL_TTL', 300))
+    except signing.BadSignature:
+        return None
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(STREAM_BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def serve_document(request, document, as_attachment=False):
+    """Send a KycDocument's file once the caller's access has been checked.
+
+    Supports conditional requests (``If-None-Match`` against a content-hash
+    ETag) and single byte ranges, so PDF viewers can fetch pages on demand.
+    Only PDF, JPEG and PNG files are shown inline; other types are always
+    sent as attachments.
+    With ``KYC_DOWNLOAD_OFFLOAD`` the body is left to the web server through
+    ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``.
+    """
+    storage = document.document.storage
+    name = document.document.name
+    path = storage.path(name)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+
+    etag = document_etag(document, size)
+    filename = document.original_filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if content_type not in INLINE_CONTENT_TYPES:
+        as_attachment = True
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, no-cache',
+        'X-Content-Type-Options': 'nosniff',
+        'Content-Disposition': content_disposition_header(as_attachment, filename),
+    }
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        for header in ('ETag', 'Cache-Control'):
+            response[header] = headers[header]
+        return response
+
+    offload = getattr(settings, 'KYC_DOWNLOAD_OFFLOAD', '')
+    if offload:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if offload == 'x-accel-redirect':
+            prefix = getattr(settings, 'KYC_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+        else:
+            response['X-Sendfile'] = path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        return HttpResponse(status=416, headers={
+            'Content-Range': f'bytes */{size}', 'ETag': etag, 'X-Content-Type-Options': 'nosniff',
+        })
+    if byte_range is None:
+        del headers['Content-Disposition']
+        return FileResponse(open(path, 'rb'), as_attachment=as_attachment, filename=filename,
+                            content_type=content_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(_iter_range(path, start, length), status=206,
+                                     content_type=content_type, headers=headers)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    return response
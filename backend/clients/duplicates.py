@@ -0,0 +1,326 @@
+import re
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import combinations, islice
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import Client, ClientMatchKey, DuplicateCandidate
+from .search import edit_distance, normalize, tokenize
+
+# Client fields the blocking keys and the comparison are computed from
+MATCH_FIELDS = ('clientType', 'fullName', 'corporateName', 'nationalId', 'brn', 'email', 'phone')
+# Titles and company suffixes that say nothing about who the client is
+NAME_STOPWORDS = {
+    'mr', 'mrs', 'ms', 'miss', 'dr', 'mme', 'mlle', 'me',
+    'ltd', 'limited', 'co', 'company', 'the', 'and', 'inc', 'plc', 'llc', 'sa', 'sarl',
+}
+# Phone keys keep the last digits only, so country codes and trunk prefixes do not matter
+PHONE_KEY_DIGITS = 7
+MAX_KEY_LENGTH = 100
+# Larger blocks (very common names) are skipped rather than compared pairwise
+MAX_BLOCK_SIZE = 50
+DEFAULT_MIN_SCORE = 0.8
+# Weight of each field in a pair's score; fields missing on either side are left out
+FIELD_WEIGHTS = {'name': 0.4, 'identifier': 0.3, 'phone': 0.15, 'email': 0.15}
+# Applied when the names are the only evidence
+NAME_ONLY_FACTOR = 0.9
+
+SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(
+    ('aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r')) for c in letters}
+NON_ALNUM_RE = re.compile(r'[^A-Z0-9]')
+
+
+def soundex(word):
+    """American Soundex of a lowercase word, e.g. ``'smith'`` and ``'smyth'`` -> ``'s530'``."""
+    if not word.isalpha():
+        return word
+    codes = [SOUNDEX_CODES.get(c, '0') for c in word]
+    result = [word[0]]
+    previous = codes[0]
+    for c, code in zip(word[1:], codes[1:]):
+        if code != '0' and code != previous:
+            result.append(code)
+        # H and W do not separate letters with the same code; vowels do
+        if c not in 'hw':
+            previous = code
+    return ''.join(result)[:4].ljust(4, '0')
+
+
+def name_tokens(value):
+    return [t for t in tokenize(value) if t not in NAME_STOPWORDS]
+
+
+def normalize_identifier(value):
+    return NON_ALNUM_RE.sub('', normalize(value).upper())
+
+
+def normalize_phone(value):
+    digits = ''.join(c for c in value or '' if c.isdigit())
+    return digits[2:] if digits.startswith('00') else digits
+
+
+def profile(values):
+    """The normalized fields of one client (a dict of MATCH_FIELDS plus ``id``)."""
+    individual = values.get('clientType', 'individual') == 'individual'
+    name = values.get('fullName') if individual else values.get('corporateName')
+    return {
+        'id': values.get('id'),
+        'type': values.get('clientType', 'individual'),
+        'tokens': name_tokens(name or values.get('fullName') or values.get('corporateName')),
+        'identifier': normalize_identifier(values.get('nationalId') if individual else values.get('brn')),
+        'email': normalize(values.get('email')).strip(),
+        'phone': normalize_phone(values.get('phone')),
+    }
+
+
+def match_keys(values):
+    """Blocking keys of one client; clients sharing any key get compared.
+
+    - ``id:`` national ID (individuals) or BRN (companies), ``email:`` and
+      ``tel:`` (last PHONE_KEY_DIGITS digits) catch reformatted exact data;
+    - ``sx:`` the Soundex codes of two name words in either order, so "John
+      Smyth" and "Smith John" share a block;
+    - ``pre:`` and ``suf:`` the first and last three letters of the two
+      longest name words, catching typos that change the Soundex code.
+
+    Initials do not get name keys of their own (they would put every
+    "J. Smith" and "John Smith" in one block), so "J. Smith" is found
+    through the identifier, phone or email keys.
+    """
+    p = profile(values)
+    keys = set()
+    if len(p['identifier']) >= 4:
+        keys.add('id:' + p['identifier'])
+    if '@' in p['email']:
+        keys.add('email:' + p['email'])
+    if len(p['phone']) >= PHONE_KEY_DIGITS:
+        keys.add('tel:' + p['phone'][-PHONE_KEY_DIGITS:])
+
+    words = [t for t in p['tokens'] if len(t) > 1]
+    if len(words) == 1:
+        keys.add('sx:' + soundex(words[0]))
+    for pair in combinations(words[:4], 2):
+        keys.add('sx:' + '+'.join(sorted(soundex(word) for word in pair)))
+    longest = sorted((t for t in words if len(t) >= 3), key=len, reverse=True)[:2]
+    if len(longest) == 2:
+        keys.add('pre:' + '+'.join(sorted(t[:3] for t in longest)))
+        keys.add('suf:' + '+'.join(sorted(t[-3:] for t in longest)))
+    return {key[:MAX_KEY_LENGTH] for key in keys}
+
+
+def index_match_keys(clients):
+    """Replace the blocking keys of ``clients`` (Client instances or field dicts with ``id``)."""
+    ids, rows = [], []
+    for client in clients:
+        values = client if isinstance(client, dict) else client.__dict__
+        ids.append(values['id'])
+        rows.extend(ClientMatchKey(client_id=values['id'], key=key) for key in match_keys(values))
+    with transaction.atomic():
+        ClientMatchKey.objects.filter(client_id__in=ids).delete()
+        ClientMatchKey.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_match_keys(batch_size=2000):
+    """Recompute every client's blocking keys; returns ``(clients, keys)``."""
+    clients = keys = 0
+    last_id = 0
+    while True:
+        batch = list(Client.objects.filter(id__gt=last_id).order_by('id').values('id', *MATCH_FIELDS)[:batch_size])
+        if not batch:
+            return clients, keys
+        last_id = batch[-1]['id']
+        keys += index_match_keys(batch)
+        clients += len(batch)
+
+
+@lru_cache(maxsize=100000)
+def token_similarity(a, b):
+    # Cached: the same name words meet again and again across blocks
+    if a == b:
+        return 1.0
+    if len(a) == 1 or len(b) == 1:
+        # An initial matches any word starting with it
+        return 0.9 if a[0] == b[0] else 0.0
+    longest = max(len(a), len(b))
+    # About one edit per three letters
+    limit = longest // 3
+    distance = edit_distance(a, b, limit)
+    return 1 - distance / longest if distance <= limit else 0.0
+
+
+def name_similarity(a, b):
+    """Match each word of the shorter name to its best unused word of the other.
+
+    Extra words (a middle name) cost a little; "J Smith" vs "John Smith" is 0.95.
+    """
+    short, long = sorted((a, b), key=len)
+    remaining = list(long)
+    total = 0.0
+    for token in short:
+        scores = [token_similarity(token, other) for other in remaining]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total += scores[best]
+        del remaining[best]
+    return total / len(short) * (0.85 + 0.15 * len(short) / len(long))
+
+
+def one_edit_apart(a, b):
+    """True when ``a`` and ``b`` differ by one insertion, deletion, substitution or adjacent swap."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    return (a[i + 1:] == b[i + 1:] or a[i + 1:] == b[i:] or a[i:] == b[i + 1:]
+            or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:]))
+
+
+def identifier_similarity(a, b):
+    if a == b:
+        return 1.0
+    # A single mistyped character in a long identifier
+    if min(len(a), len(b)) >= 6 and one_edit_apart(a, b):
+        return 0.8
+    return 0.0
+
+
+def email_similarity(a, b):
+    if a == b:
+        return 1.0
+    return 0.7 if a.split('@')[0] == b.split('@')[0] else 0.0
+
+
+def phone_similarity(a, b):
+    if a[-8:] == b[-8:]:
+        return 1.0
+    return 0.9 if a[-PHONE_KEY_DIGITS:] == b[-PHONE_KEY_DIGITS:] else 0.0
+
+
+SIMILARITIES = {
+    'identifier': ('identifier', identifier_similarity),
+    'email': ('email', email_similarity),
+    'phone': ('phone', phone_similarity),
+}
+
+
+def _combine(reasons):
+    score = sum(FIELD_WEIGHTS[f] * s for f, s in reasons.items()) / sum(FIELD_WEIGHTS[f] for f in reasons)
+    return score * NAME_ONLY_FACTOR if len(reasons) == 1 else score
+
+
+def compare(a, b, min_score=0.0):
+    """Score two client profiles; returns ``(score, reasons)``.
+
+    The score is the FIELD_WEIGHTS average of the field similarities over the
+    fields both clients have, so a differing national ID pulls it down
+    while a missing one does not. Clients of different types, or without
+    names, never match. The cheap fields are scored first: when even
+    identical names could not lift the pair to ``min_score``, the name
+    comparison is skipped and the score returned is 0.
+    """
+    if a['type'] != b['type'] or not a['tokens'] or not b['tokens']:
+        return 0.0, {}
+    reasons = {}
+    for name, (field, similarity) in SIMILARITIES.items():
+        if a[field] and b[field]:
+            reasons[name] = round(similarity(a[field], b[field]), 3)
+    if min_score and _combine(dict(reasons, name=1.0)) < min_score:
+        return 0.0, reasons
+    reasons['name'] = round(name_similarity(a['tokens'], b['tokens']), 3)
+    return round(_combine(reasons), 3), reasons
+
+
+def _load_profiles(ids, chunk_size=1000):
+    ids = iter(ids)
+    profiles = {}
+    while True:
+        chunk = list(islice(ids, chunk_size))
+        if not chunk:
+            return profiles
+        for values in Client.objects.filter(id__in=chunk).values('id', *MATCH_FIELDS):
+            profiles[values['id']] = profile(values)
+
+
+def _compare_blocks(keys, targets, min_score, matches, report):
+    members = defaultdict(list)
+    for key, client_id in ClientMatchKey.objects.filter(key__in=keys).values_list('key', 'client_id'):
+        members[key].append(client_id)
+
+    pairs = set()
+    for ids in members.values():
+        for pair in combinations(sorted(ids), 2):
+            if targets is None or pair[0] in targets or pair[1] in targets:
+                pairs.add(pair)
+    # A pair sharing keys in different batches is compared again; only matches are kept
+    pairs -= matches.keys()
+    profiles = _load_profiles({client_id for pair in pairs for client_id in pair})
+    for a, b in pairs:
+        if a in profiles and b in profiles:
+            score, reasons = compare(profiles[a], profiles[b], min_score)
+            if score >= min_score:
+                matches[a, b] = (score, reasons)
+    report['comparisons'] += len(pairs)
+
+
+def find_duplicates(client_ids=None, min_score=DEFAULT_MIN_SCORE, max_block_size=MAX_BLOCK_SIZE, key_batch_size=1000):
+    """Find pairs of likely duplicate clients without comparing every pair.
+
+    Blocks are the groups of clients sharing a ClientMatchKey; only clients
+    of the same block are scored with ``compare``, and blocks larger than
+    ``max_block_size`` are skipped. With ``client_ids``, only pairs involving
+    those clients are looked at.
+
+    Returns ``(matches, report)``: ``{(client_id, duplicate_id): (score,
+    reasons)}`` for the pairs scoring at least ``min_score`` (lower id
+    first), and counts of blocks, comparisons and the time taken.
+    """
+    started = time.monotonic()
+    report = Counter()
+    keys = ClientMatchKey.objects.all()
+    targets = None
+    if client_ids is not None:
+        targets = set(client_ids)
+        keys = keys.filter(key__in=ClientMatchKey.objects.filter(client_id__in=targets).values('key'))
+    blocks = keys.values('key').annotate(size=Count('id')).filter(size__gte=2).order_by().values_list('key', 'size')
+
+    matches = {}
+    batch = []
+    for key, size in blocks.iterator():
+        if size > max_block_size:
+            report['oversized_blocks'] += 1
+            continue
+        report['blocks'] += 1
+        batch.append(key)
+        if len(batch) >= key_batch_size:
+            _compare_blocks(batch, targets, min_score, matches, report)
+            batch = []
+    if batch:
+        _compare_blocks(batch, targets, min_score, matches, report)
+
+    seconds = time.monotonic() - started
+    report['matches'] = len(matches)
+    report['seconds'] = round(seconds, 3)
+    report['comparisons_per_second'] = round(report['comparisons'] / seconds, 1) if seconds else None
+    return matches, dict(report)
+
+
+def save_duplicates(matches, batch_size=500):
+    """Store ``find_duplicates`` matches as DuplicateCandidates.
+
+    Known pairs get the new score and reasons but keep their review status.
+    """
+    rows = [
+        DuplicateCandidate(client_id=a, duplicate_id=b, score=score, reasons=reasons)
+        for (a, b), (score, reasons) in matches.items()
+    ]
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    target = ['client', 'duplicate'] if connection.features.supports_update_conflicts_with_target else None
+    DuplicateCandidate.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True,
+        unique_fields=target, update_fields=['score', 'reasons', 'updated_at'],
+    )
+    return len(rows)
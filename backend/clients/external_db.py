@@ -1,14 +1,211 @@
-from typing import List, Dict, Optional, Any
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Iterator, Optional, Any, Callable
 from django.conf import settings
 
 
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became available within the timeout."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of DB-API connections to the external database.
+
+    - at most ``max_size`` connections are open; callers wait up to ``timeout``
+      seconds for one to be returned before ``PoolTimeout`` is raised
+    - connections older than ``max_lifetime`` or idle for more than ``max_idle``
+      seconds are closed instead of being reused
+    - a connection idle for more than ``health_check_after`` seconds is pinged
+      before being handed out; dead ones are replaced transparently
+    - a pool used in a forked child (gunicorn workers) drops the connections
+      inherited from the parent and starts empty
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int = 5,
+        max_lifetime: float = 3600,
+        max_idle: float = 300,
+        timeout: float = 10,
+        health_check_after: float = 30,
+    ):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._size = 0
+        self.counters = dict.fromkeys(
+            ("checkouts", "waits", "timeouts", "creates", "closes", "health_check_failures"), 0
+        )
+
+    def _after_fork(self):
+        # Sockets inherited from the parent belong to the parent's sessions;
+        # forget them without sending a QUIT on the shared socket.
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _expired(self, entry, now):
+        return now - entry.created_at > self.max_lifetime or now - entry.last_used > self.max_idle
+
+    def _discard(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self.counters["closes"] += 1
+            self._cond.notify()
+
+    def _healthy(self, conn):
+        try:
+            if hasattr(conn, "ping"):
+                conn.ping(reconnect=False)
+            else:
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry, stale = self._take_or_reserve(deadline)
+            for old in stale:
+                self._discard(old)
+
+            if entry is None:
+                # A slot was reserved for a new connection
+                try:
+                    entry = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.counters["creates"] += 1
+            elif time.monotonic() - entry.last_used > self.health_check_after and not self._healthy(entry.conn):
+                with self._cond:
+                    self.counters["health_check_failures"] += 1
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                self.counters["checkouts"] += 1
+            return entry
+
+    def _take_or_reserve(self, deadline):
+        """Pop a reusable idle connection, or reserve a slot (returns None) for a new one.
+
+        Also returns the expired idle connections found on the way, to be closed
+        outside the lock.
+        """
+        stale = []
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._idle:
+                    entry = self._idle.pop()
+                    if not self._expired(entry, now):
+                        return entry, stale
+                    stale.append(entry)
+                if self._size - len(stale) < self.max_size:
+                    self._size += 1
+                    return None, stale
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeout(f"No external DB connection available after {self.timeout}s")
+                self.counters["waits"] += 1
+                self._cond.wait(remaining)
+
+    def _checkin(self, entry, broken=False):
+        if self._pid != os.getpid():
+            return
+        now = time.monotonic()
+        if broken or now - entry.created_at > self.max_lifetime:
+            self._discard(entry)
+            return
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded instead of reused if the block raises."""
+        entry = self._checkout()
+        try:
+            yield entry.conn
+        except BaseException:
+            self._checkin(entry, broken=True)
+            raise
+        else:
+            self._checkin(entry)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                **self.counters,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _reset_pool_after_fork():
+    if _pool is not None:
+        _pool._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
 def is_external_db_enabled() -> bool:
     cfg = getattr(settings, "EXTERNAL_DB", {})
     return bool(cfg.get("ENABLED"))
 
 
 def get_connection():
-    """Return a PyMySQL connection if available and config is enabled, else None."""
+    """Open a new PyMySQL connection if available and config is enabled, else None."""
     if not is_external_db_enabled():
         return None
     try:
@@ -31,50 +228,141 @@ def get_connection():
     )
 
 
+def _build_pool(connect: Callable[[], Any], **options) -> ConnectionPool:
+    cfg = getattr(settings, "EXTERNAL_DB", {})
+    defaults = {
+        "max_size": int(cfg.get("POOL_SIZE", 5)),
+        "max_lifetime": float(cfg.get("POOL_MAX_LIFETIME", 3600)),
+        "max_idle": float(cfg.get("POOL_MAX_IDLE", 300)),
+        "timeout": float(cfg.get("POOL_TIMEOUT", 10)),
+    }
+    defaults.update(options)
+    return ConnectionPool(connect, **defaults)
+
+
+def configure_pool(connect: Optional[Callable[[], Any]] = None, **options) -> ConnectionPool:
+    """(Re)create the shared pool, e.g. with a fake ``connect`` factory in tests.
+
+    Options default to the ``POOL_*`` keys of ``settings.EXTERNAL_DB``.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = _build_pool(connect or get_connection, **options)
+    return _pool
+
+
+def get_pool() -> Optional[ConnectionPool]:
+    """Return the shared pool, or None when the connector is disabled/unavailable."""
+    global _pool
+    if _pool is None:
+        if not _pymysql_configured():
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = _build_pool(get_connection)
+    return _pool
+
+
+def _pymysql_configured() -> bool:
+    if not is_external_db_enabled():
+        return False
+    try:
+        import pymysql  # noqa: F401
+    except ImportError:
+        return False
+    cfg = settings.EXTERNAL_DB
+    return all([cfg.get("HOST"), cfg.get("NAME"), cfg.get("USER")])
+
+
+def external_pool_stats() -> Dict[str, Any]:
+    """Pool metrics for monitoring; empty when no pool has been created."""
+    return _pool.stats() if _pool is not None else {}
+
+
 def fetch_external_clients(limit: int = 50, query: Optional[str] = None) -> List[Dict[str, Any]]:
     """Fetch clients from the external DB using a SELECT query.
 
     Returns a list of dicts with keys matching the selected columns.
     """
-    conn = get_connection()
-    if conn is None:
+    pool = get_pool()
+    if pool is None:
         return []
 
     q = query or settings.EXTERNAL_DB.get("CLIENTS_QUERY")
     rows: List[Dict[str, Any]] = []
-    try:
+    with pool.connection() as conn:
         with conn.cursor() as cur:
             # Using parameter for limit to avoid SQL injection
             cur.execute(q, (limit,))
             columns = [desc[0] for desc in cur.description]
             for row in cur.fetchall():
                 rows.append({col: val for col, val in zip(columns, row)})
-    finally:
-        conn.close()
     return rows
 
 
-def push_results_to_external(table: Optional[str], payload: Dict[str, Any]) -> bool:
-    """Push results into an external table. Returns True if write succeeded.
+def _unbuffered_cursor(conn):
+    """Server-side (unbuffered) cursor for PyMySQL; plain cursor for other drivers."""
+    try:
+        from pymysql.cursors import SSCursor
+        import pymysql
+    except ImportError:
+        return conn.cursor()
+    if isinstance(conn, pymysql.connections.Connection):
+        return conn.cursor(SSCursor)
+    return conn.cursor()
+
+
+def iter_external_clients(limit: int = 50, query: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Like ``fetch_external_clients`` but yields rows as they arrive.
 
-    This expects a generic JSON payload; columns are inferred from keys.
+    Rows are read ``batch_size`` at a time through an unbuffered cursor, so the
+    full result set is never held in memory. The pooled connection stays
+    checked out until the generator is exhausted or closed.
     """
-    conn = get_connection()
-    if conn is None:
-        return False
+    pool = get_pool()
+    if pool is None:
+        return
+
+    q = query or settings.EXTERNAL_DB.get("CLIENTS_QUERY")
+    with pool.connection() as conn:
+        with _unbuffered_cursor(conn) as cur:
+            cur.execute(q, (limit,))
+            columns = [desc[0] for desc in cur.description]
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield {col: val for col, val in zip(columns, row)}
 
-    table_name = table or settings.EXTERNAL_DB.get("RESULTS_TABLE") or "assessment_results"
-    keys = list(payload.keys())
-    placeholders = ",".join(["%s"] * len(keys))
-    columns = ",".join([f"`{k}`" for k in keys])
-    values = [payload[k] for k in keys]
 
-    sql = f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})"
-    try:
+def results_table(table: Optional[str] = None) -> str:
+    return table or settings.EXTERNAL_DB.get("RESULTS_TABLE") or "assessment_results"
+
+
+def insert_external_rows(table: Optional[str], columns: List[str], rows: List[List[Any]], key_column: Optional[str] = None) -> None:
+    """Insert many rows sharing the same columns with a single ``executemany``.
+
+    Raises on failure (including when the connector is unavailable) so callers
+    can retry. With ``key_column`` (a unique column of the table, among
+    ``columns``) the statement is an upsert, ``INSERT ... ON DUPLICATE KEY
+    UPDATE``: a re-sent row overwrites the one already there instead of
+    failing, while other errors still raise (``INSERT IGNORE`` would turn
+    them into warnings).
+    """
+    pool = get_pool()
+    if pool is None:
+        raise RuntimeError("External DB connector unavailable")
+
+    placeholders = ",".join(["%s"] * len(columns))
+    column_sql = ",".join([f"`{c}`" for c in columns])
+    sql = f"INSERT INTO `{results_table(table)}` ({column_sql}) VALUES ({placeholders})"
+    if key_column:
+        # VALUES() rather than a row alias, which MariaDB and MySQL < 8.0.19 lack
+        updates = [f"`{c}`=VALUES(`{c}`)" for c in columns if c != key_column] or [f"`{key_column}`=`{key_column}`"]
+        sql += " ON DUPLICATE KEY UPDATE " + ",".join(updates)
+    with pool.connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, values)
-        return True
-    except Exception:
-        return False
-    finally:
-        conn.close()
\ No newline at end of file
+            cur.executemany(sql, rows)
@@ -0,0 +1,159 @@
+import time
+from collections import defaultdict
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Client, ReferenceSequence
+from .signals import clients_bulk_created, clients_bulk_updated
+
+IMPORT_FIELDS = (
+    'clientType', 'distributionChannel', 'fullName', 'nationalId', 'corporateName',
+    'email', 'phone', 'address', 'city',
+)
+DEFAULT_CHUNK_SIZE = 500
+# Conflicting rows listed in the report; the count covers all of them
+MAX_REPORTED_CONFLICTS = 100
+
+
+def map_external_row(r):
+    """Map external fields to our Client model conservatively."""
+    return {
+        "clientType": r.get("client_type") or "individual",
+        "distributionChannel": r.get("distribution_channel") or "HeadOffice",
+        "fullName": r.get("full_name") or "",
+        "nationalId": r.get("national_id") or "",
+        "corporateName": r.get("corporate_name") or "",
+        "email": r.get("email") or "",
+        "phone": r.get("phone") or "",
+        "address": r.get("address") or "",
+        "city": r.get("city") or "",
+    }
+
+
+def dedupe_key(data):
+    """Deduplicate based on nationalId or email when available, else name + phone."""
+    if data["nationalId"]:
+        return ("nationalId", data["nationalId"])
+    if data["email"]:
+        return ("email", data["email"])
+    return ("fullName_phone", (data["fullName"], data["phone"]))
+
+
+def _find_existing(keys):
+    """Resolve the chunk's dedupe keys against Client with a single query."""
+    by_kind = defaultdict(set)
+    for kind, value in keys:
+        by_kind[kind].add(value)
+
+    conditions = []
+    if by_kind["nationalId"]:
+        conditions.append(Q(nationalId__in=by_kind["nationalId"]))
+    if by_kind["email"]:
+        conditions.append(Q(email__in=by_kind["email"]))
+    for full_name, phone in by_kind["fullName_phone"]:
+        conditions.append(Q(fullName=full_name, phone=phone))
+
+    found = {}
+    # Lowest id wins when several clients share a key
+    for client in Client.objects.filter(reduce(or_, conditions)).order_by('-id'):
+        found[("nationalId", client.nationalId)] = client
+        found[("email", client.email)] = client
+        found[("fullName_phone", (client.fullName, client.phone))] = client
+    return {key: found[key] for key in keys if key in found}
+
+
+def _import_chunk(rows, report):
+    data_by_key = {}
+    for r in rows:
+        data = map_external_row(r)
+        # A later row for the same client overrides an earlier one
+        data_by_key[dedupe_key(data)] = data
+    report["rows"] += len(rows)
+    report["duplicates"] += len(rows) - len(data_by_key)
+
+    with transaction.atomic():
+        existing = _find_existing(list(data_by_key))
+        to_create = []
+        to_update = {}
+        matched = set()
+        changed_fields = set()
+        for key, data in data_by_key.items():
+            obj = existing.get(key)
+            if obj is None:
+                to_create.append(Client(**data))
+                continue
+            if obj.pk in matched:
+                # Another row of this chunk already matched the client by a
+                # different key (e.g. its email, where this one matched by
+                # national ID): applying both would merge two records
+                report["conflicts"] += 1
+                if len(report["conflicting_rows"]) < MAX_REPORTED_CONFLICTS:
+                    report["conflicting_rows"].append(
+                        {"client_id": obj.pk, "reference": obj.reference, "matched_by": key[0], "row": data}
+                    )
+                continue
+            matched.add(obj.pk)
+            changed = [f for f in IMPORT_FIELDS if getattr(obj, f) != data[f]]
+            if not changed:
+                report["unchanged"] += 1
+                continue
+            for f in changed:
+                setattr(obj, f, data[f])
+            changed_fields.update(changed)
+            to_update[obj.pk] = obj
+        to_update = list(to_update.values())
+
+        by_prefix = defaultdict(list)
+        for obj in to_create:
+            by_prefix[obj.reference_prefix].append(obj)
+        for prefix, objs in by_prefix.items():
+            for obj, reference in zip(objs, ReferenceSequence.reserve(prefix, len(objs))):
+                obj.reference = reference
+
+        if to_create:
+            Client.objects.bulk_create(to_create)
+            clients_bulk_created.send(sender=Client, instances=to_create)
+        if to_update:
+            Client.objects.bulk_update(to_update, sorted(changed_fields))
+            clients_bulk_updated.send(sender=Client, instances=to_update, fields=changed_fields)
+
+    report["created"] += len(to_create)
+    report["updated"] += len(to_update)
+
+
+def import_clients(rows, chunk_size=DEFAULT_CHUNK_SIZE, preview=None):
+    """Upsert external client rows into Client in chunks.
+
+    Each chunk is resolved against existing clients with one query, then
+    written with one bulk_create and one bulk_update inside its own
+    transaction. ``rows`` may be any iterable (e.g. a streaming cursor); if
+    ``preview`` is a list, the first 10 rows are appended to it.
+
+    Returns a report with rows/created/updated/unchanged counts (plus
+    ``duplicates``: rows superseded by a later row for the same client in the
+    same chunk), the elapsed seconds and rows per second. A row that matches
+    a client another row of its chunk already matched through a different
+    key is skipped and counted in ``conflicts``; the first
+    MAX_REPORTED_CONFLICTS are listed in ``conflicting_rows``.
+    """
+    report = {
+        "rows": 0, "created": 0, "updated": 0, "unchanged": 0, "duplicates": 0,
+        "conflicts": 0, "conflicting_rows": [],
+    }
+    started = time.monotonic()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        if preview is not None and len(preview) < 10:
+            preview.extend(chunk[:10 - len(preview)])
+        _import_chunk(chunk, report)
+    elapsed = time.monotonic() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed, 1) if elapsed > 0 else None
+    return report
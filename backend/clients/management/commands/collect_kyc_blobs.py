@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from clients.blobs import DEFAULT_GRACE_PERIOD, collect_kyc_blobs
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed KYC files that no document references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=int(DEFAULT_GRACE_PERIOD.total_seconds()),
+                            help="Seconds a blob must have been unreferenced before it is deleted.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        removed, freed = collect_kyc_blobs(timedelta(seconds=options['grace']), dry_run=options['dry_run'])
+        verb = "Would remove" if options['dry_run'] else "Removed"
+        self.stdout.write(f"{verb} {removed} file(s), {freed} bytes.")
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clients.duplicates import (
+    DEFAULT_MIN_SCORE, MAX_BLOCK_SIZE, find_duplicates, rebuild_match_keys, save_duplicates,
+)
+from clients.models import Client, ClientMatchKey
+
+
+class Command(BaseCommand):
+    help = "Find likely duplicate clients by blocking key and store them for review."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE)
+        parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE,
+                            help="Skip blocks with more clients than this (very common names).")
+        parser.add_argument('--client', type=int, action='append', dest='client_ids',
+                            help="Only look for duplicates of this client id (repeatable).")
+        parser.add_argument('--rebuild-keys', action='store_true',
+                            help="Recompute every client's blocking keys first.")
+        parser.add_argument('--dry-run', action='store_true', help="Report matches without storing them.")
+
+    def handle(self, *args, **options):
+        # The keys are maintained on save; an empty table means they were never built
+        if options['rebuild_keys'] or (not ClientMatchKey.objects.exists() and Client.objects.exists()):
+            started = time.monotonic()
+            clients, keys = rebuild_match_keys()
+            self.stdout.write(f"Indexed {clients} client(s) as {keys} key(s) in {time.monotonic() - started:.1f}s.")
+
+        matches, report = find_duplicates(
+            client_ids=options['client_ids'],
+            min_score=options['min_score'],
+            max_block_size=options['max_block_size'],
+        )
+        saved = 0 if options['dry_run'] else save_duplicates(matches)
+        self.stdout.write(
+            f"{report.get('blocks', 0)} blocks ({report.get('oversized_blocks', 0)} oversized skipped), "
+            f"{report.get('comparisons', 0)} comparisons, {report['matches']} matches, {saved} stored "
+            f"in {report['seconds']}s ({report['comparisons_per_second']} comparisons/s)"
+        )
+        if options['dry_run']:
+            for (a, b), (score, reasons) in sorted(matches.items(), key=lambda item: -item[1][0])[:50]:
+                self.stdout.write(f"  {a} ~ {b}: {score} {reasons}")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from clients.external_db import is_external_db_enabled, iter_external_clients
+from clients.importer import DEFAULT_CHUNK_SIZE, import_clients
+
+
+class Command(BaseCommand):
+    help = "Import clients from the external MySQL DB using the chunked upsert pipeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000000, help="Maximum number of rows to fetch.")
+        parser.add_argument('--query', help="Override EXTERNAL_DB['CLIENTS_QUERY'] (must take a LIMIT parameter).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not is_external_db_enabled():
+            raise CommandError("External DB integration disabled")
+        if not (options['query'] or settings.EXTERNAL_DB.get("CLIENTS_QUERY")):
+            raise CommandError("No CLIENTS_QUERY configured; pass --query")
+
+        rows = iter_external_clients(limit=options['limit'], query=options['query'])
+        report = import_clients(rows, chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"{report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{report['unchanged']} unchanged, {report['duplicates']} duplicates, {report['conflicts']} conflicts "
+            f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+        )
+        for conflict in report['conflicting_rows']:
+            self.stderr.write(
+                f"Skipped a row matching {conflict['reference']} by {conflict['matched_by']}, "
+                f"already matched by another row: {conflict['row']}"
+            )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from clients.blobs import DEFAULT_MIGRATION_BATCH_SIZE, DEFAULT_MIGRATION_WORKERS, migrate_legacy_documents
+
+
+def _megabytes(n):
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+class Command(BaseCommand):
+    help = "Move KYC documents from the old kyc_docs/ layout to content-addressed, deduplicated blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_MIGRATION_WORKERS, help="Files hashed and moved in parallel.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_MIGRATION_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Hash the files and report the savings without moving anything.")
+        parser.add_argument('--keep-old', action='store_true', help="Leave the old files in place after repointing the documents.")
+
+    def handle(self, *args, **options):
+        report = migrate_legacy_documents(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            keep_old=options['keep_old'],
+        )
+        verb = "would move" if options['dry_run'] else "moved"
+        self.stdout.write(
+            f"{report['documents']} document(s) {verb} into {report['blobs_created']} new blob(s), "
+            f"{report['missing']} missing file(s), {report['old_files_deleted']} old file(s) deleted. "
+            f"{_megabytes(report['bytes_before'])} -> {_megabytes(report['bytes_after'])}, "
+            f"saved {_megabytes(report['bytes_saved'])} in {report['seconds']}s."
+        )
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clients.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the client search terms used by /api/clients/search/ from the Client table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        clients, terms = rebuild_search_index(batch_size=options['batch_size'])
+        seconds = time.monotonic() - started
+        self.stdout.write(f"Indexed {clients} client(s) as {terms} term(s) in {seconds:.1f}s.")
@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from clients.uploads import sweep_upload_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned KYC upload sessions and their part files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, help="Seconds since last activity; defaults to KYC_UPLOAD_SESSION_TTL.")
+
+    def handle(self, *args, **options):
+        max_age = timedelta(seconds=options['max_age']) if options['max_age'] is not None else None
+        sessions, files = sweep_upload_sessions(max_age)
+        self.stdout.write(f"Removed {sessions} upload session(s) and {files} part file(s).")
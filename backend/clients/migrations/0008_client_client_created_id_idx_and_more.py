@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0007_rename_distributionchannel_old_client_distributionchannel'),
+        ('companies', '0002_create_distribution_channels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['createdAt', 'id'], name='client_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kycdocument',
+            index=models.Index(fields=['upload_date', 'id'], name='kycdoc_upload_id_idx'),
+        ),
+    ]
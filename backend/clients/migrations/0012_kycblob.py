@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:35
+
+import clients.storage
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0011_kycuploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KycBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='kycdocument',
+            name='document',
+            field=models.FileField(storage=clients.storage.get_kyc_storage, upload_to='kyc_docs/'),
+        ),
+    ]
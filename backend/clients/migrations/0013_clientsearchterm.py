@@ -0,0 +1,60 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:46
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEARCH_FIELDS = ('reference', 'nationalId', 'brn', 'email', 'fullName', 'corporateName')
+IDENTIFIER_FIELDS = ('reference', 'nationalId', 'brn', 'email')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    return TOKEN_RE.findall(''.join(c for c in value if not unicodedata.combining(c)).lower())
+
+
+def seed_search_terms(apps, schema_editor):
+    """Index existing clients (same rules as clients.search.client_terms)."""
+    Client = apps.get_model('clients', 'Client')
+    ClientSearchTerm = apps.get_model('clients', 'ClientSearchTerm')
+
+    rows = []
+    for values in Client.objects.values('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+        terms = set()
+        for field in SEARCH_FIELDS:
+            words = tokenize(values[field])
+            terms.update((word[:64], field) for word in words)
+            if field in IDENTIFIER_FIELDS and len(words) > 1:
+                terms.add((''.join(words)[:64], field))
+        rows.extend(ClientSearchTerm(client_id=values['id'], term=term, field=field) for term, field in terms)
+        if len(rows) >= 5000:
+            ClientSearchTerm.objects.bulk_create(rows)
+            rows = []
+    ClientSearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0012_kycblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('field', models.CharField(max_length=20)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='clients.client')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'client'], name='client_search_term_idx')],
+            },
+        ),
+        migrations.RunPython(seed_search_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0014_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kycuploadsession',
+            name='writing_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0015_upload_chunk_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
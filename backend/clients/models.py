@@ -1,7 +1,73 @@
-from django.db import models
-from django.db.models import Max
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 import os
+import uuid
+
+from .storage import blob_sha256, content_sha256, get_kyc_storage
+
+
+class ReferenceSequence(models.Model):
+    """Last issued client reference number per prefix (INDI, CORP).
+
+    Numbers are handed out with a single locked UPDATE on this row instead of a
+    Max() scan over Client.reference, so concurrent creators never mint the same
+    reference and numbers keep sorting correctly once they gain a digit.
+    """
+    FIRST_NUMBER = 1100001
+
+    prefix = models.CharField(max_length=10, unique=True)
+    last_value = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, prefix, count=1):
+        """Atomically claim ``count`` consecutive references for ``prefix``.
+
+        Returns the references as a list of strings, e.g. ``['INDI-1100001']``.
+        Numbers claimed by a transaction that later rolls back are not reused.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        rows = cls.objects.filter(prefix=prefix)
+        with transaction.atomic():
+            # The UPDATE row-locks the sequence until commit, so the read below
+            # sees exactly the block this transaction claimed.
+            if not rows.update(last_value=F('last_value') + count):
+                cls._create_sequence(prefix)
+                rows.update(last_value=F('last_value') + count)
+            last = rows.values_list('last_value', flat=True).get()
+        return [f"{prefix}-{number}" for number in range(last - count + 1, last + 1)]
+
+    @classmethod
+    def advance_past(cls, reference):
+        """Make sure ``reference`` (e.g. ``'INDI-1300000'``, set by hand) is never issued later.
+
+        Only moves an existing sequence forward; one created later starts
+        after the highest stored reference anyway.
+        """
+        prefix, _, number = reference.partition('-')
+        if number.isdigit():
+            cls.objects.filter(prefix=prefix).update(last_value=Greatest(F('last_value'), int(number)))
+
+    @classmethod
+    def _create_sequence(cls, prefix):
+        # Continue after the highest reference already issued for this prefix
+        last = cls.FIRST_NUMBER - 1
+        for reference in Client.objects.filter(reference__startswith=f"{prefix}-").values_list('reference', flat=True).iterator():
+            try:
+                last = max(last, int(reference.split('-', 1)[1]))
+            except ValueError:
+                continue
+        try:
+            with transaction.atomic():
+                cls.objects.create(prefix=prefix, last_value=last)
+        except IntegrityError:
+            # Another worker created it first
+            pass
 
 class Client(models.Model):
     CLIENT_TYPE_CHOICES = (
@@ -32,45 +98,245 @@ class Client(models.Model):
     distribution_channel = models.ForeignKey('companies.DistributionChannel', on_delete=models.CASCADE, related_name='clients', null=True, blank=True)
     created_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='created_clients')
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order: (createdAt, id)
+            models.Index(fields=['createdAt', 'id'], name='client_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.fullName or self.corporateName
 
+    @property
+    def reference_prefix(self):
+        return self.clientType[:4].upper()
+
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
         if not self.reference:
-            prefix = self.clientType[:4].upper()
-            
-            # Get the last created client's number
-            last_ref = Client.objects.filter(reference__startswith=prefix).aggregate(
-                max_num=Max('reference')
-            )['max_num']
-
-            if last_ref:
-                # Extract number from last reference and increment
-                last_number = int(last_ref.split('-')[1])
-                new_number = last_number + 1
-            else:
-                # Start from 1100001 if none exists
-                new_number = 1100001
-
-            self.reference = f"{prefix}-{new_number}"
+            self.reference = ReferenceSequence.reserve(self.reference_prefix)[0]
+        elif update_fields is None or 'reference' in update_fields:
+            # Set by hand (API, admin, import): keep the sequence ahead of it
+            ReferenceSequence.advance_past(self.reference)
 
         super().save(*args, **kwargs)
 
 class KycDocument(models.Model):
     client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='kyc_documents')
     uploaded_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, null=True, blank=True)
-    document = models.FileField(upload_to='kyc_docs/%Y/%m/%d/')
+    # Stored by content hash (clients/storage.py); the name and client live on this row
+    document = models.FileField(upload_to='kyc_docs/', storage=get_kyc_storage)
     original_filename = models.CharField(max_length=255)
     upload_date = models.DateTimeField(default=timezone.now)
+    # Hex SHA-256 of the file, also the name of its KycBlob
+    sha256 = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['upload_date', 'id'], name='kycdoc_upload_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Save file under kyc_docs/<client_name>/<date>/filename.ext
-        client_name = self.client.fullName or self.client.corporateName or f"client_{self.client.id}"
-        date_str = self.upload_date.strftime('%Y-%m-%d')
-        base, ext = os.path.splitext(self.document.name)
-        new_path = f"kyc_docs/{client_name}/{date_str}/{os.path.basename(self.document.name)}"
-        self.document.name = new_path
-        super().save(*args, **kwargs)
+        uploading = bool(self.document) and not self.document._committed
+        previous = None
+        with transaction.atomic():
+            if uploading:
+                if not self.original_filename:
+                    self.original_filename = os.path.basename(self.document.name)
+                if self.pk:
+                    previous = blob_sha256(KycDocument.objects.filter(pk=self.pk).values_list('document', flat=True).first())
+                content = self.document.file
+                content.sha256 = getattr(content, 'sha256', None) or content_sha256(content)
+                # Reference the blob before storing finds its file already there:
+                # the row stays locked until commit, and collect_kyc_blobs re-checks
+                # the count under that lock, so the file cannot be collected meanwhile
+                KycBlob.add_reference(content.sha256, content.size)
+                self.document.save(self.document.name, content, save=False)
+                self.sha256 = blob_sha256(self.document.name)
+            super().save(*args, **kwargs)
+            if previous:
+                KycBlob.release(previous)
 
     def __str__(self):
         return f"KYC for {self.client} ({self.original_filename})"
+
+
+class KycBlob(models.Model):
+    """Reference count of a content-addressed KYC file (clients/storage.py).
+
+    ``ref_count`` is the number of KycDocuments stored under this hash. Blobs
+    whose count dropped to zero are removed by ``manage.py collect_kyc_blobs``
+    once they have been unreferenced for a grace period.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
+    @classmethod
+    def add_reference(cls, sha256, size, count=1):
+        """Count ``count`` more documents stored under ``sha256``, creating the row if needed.
+
+        The row stays locked until the caller's transaction commits.
+        """
+        rows = cls.objects.filter(pk=sha256)
+        if rows.update(ref_count=F('ref_count') + count, updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(sha256=sha256, size=size, ref_count=count)
+        except IntegrityError:
+            # Another worker created it first
+            rows.update(ref_count=F('ref_count') + count, updated_at=timezone.now())
+
+    @classmethod
+    def release(cls, sha256, count=1):
+        cls.objects.filter(pk=sha256).update(ref_count=F('ref_count') - count, updated_at=timezone.now())
+
+
+class KycUploadSession(models.Model):
+    """A resumable, chunked upload of a KYC document (see clients/uploads.py).
+
+    Chunks are written at their offset into a part file under
+    ``KYC_UPLOAD_TEMP_DIR``; ``received`` is the number of contiguous bytes
+    stored so far, i.e. where the client resumes. Committing hashes the part
+    file and moves it into a new KycDocument.
+    """
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('committed', 'Committed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='kyc_uploads')
+    created_by = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE, related_name='kyc_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='open')
+    document = models.ForeignKey('KycDocument', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Set while a request writes a chunk: until then no other chunk may be written
+    writing_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='kycupload_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.id} of {self.filename} ({self.received}/{self.size})"
+
+
+class OutboxMessage(models.Model):
+    """A result row waiting to be written to the external database.
+
+    Rows are inserted in the same transaction as the local change and drained
+    in batches by ``manage.py flush_external_outbox`` (see clients/outbox.py).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    )
+
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    table_name = models.CharField(max_length=100, blank=True, help_text="Blank uses EXTERNAL_DB['RESULTS_TABLE']")
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a flusher is pushing the message (see clients/outbox.py)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.idempotency_key} ({self.status})"
+
+
+class ClientSearchTerm(models.Model):
+    """One normalized search term of a client, for /api/clients/search/.
+
+    Terms are lowercased, accent-free words of the name fields plus the
+    identifiers (reference, national ID, BRN, email) both whole and split
+    into words. Maintained by clients/signals.py; see clients/search.py.
+    """
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+    field = models.CharField(max_length=20)
+
+    class Meta:
+        indexes = [
+            # Prefix lookups (term LIKE 'x%') that return client ids from the index alone
+            models.Index(fields=['term', 'client'], name='client_search_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.field})"
+
+
+class ClientMatchKey(models.Model):
+    """A blocking key of a client for duplicate detection (clients/duplicates.py).
+
+    Clients sharing a key (same national ID, phone, email, phonetic name or
+    name n-grams) form a block; only clients within a block are compared.
+    Maintained by clients/signals.py.
+    """
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='match_keys')
+    key = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            # Block members by key, read from the index alone
+            models.Index(fields=['key', 'client'], name='client_match_key_idx'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class DuplicateCandidate(models.Model):
+    """Two clients that probably describe the same person or company.
+
+    Found by ``manage.py find_duplicate_clients`` and reviewed through
+    /api/duplicate-candidates/. ``client`` is the older (lower id) row of the
+    pair. Rescans refresh the score of known pairs but keep their review.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('dismissed', 'Dismissed'),
+    )
+
+    client = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='+')
+    duplicate = models.ForeignKey('Client', on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    # Similarity per compared field, e.g. {"name": 0.92, "phone": 1.0}
+    reasons = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    reviewed_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('client', 'duplicate')
+        indexes = [
+            models.Index(fields=['status', 'score'], name='duplicate_status_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} ~ {self.duplicate_id} ({self.score:.2f}, {self.status})"
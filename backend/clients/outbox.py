@@ -0,0 +1,159 @@
+import hashlib
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from backend.metrics import EXTERNAL_PUSHES
+
+from .external_db import get_pool, insert_external_rows
+from .models import OutboxMessage
+
+OUTBOX_DEFAULTS = {
+    "OUTBOX_MAX_ATTEMPTS": 10,
+    "OUTBOX_BACKOFF_BASE": 5,      # seconds before the first retry
+    "OUTBOX_BACKOFF_MAX": 3600,    # cap on the retry delay
+    "OUTBOX_KEY_COLUMN": None,     # external column holding the idempotency key
+    "OUTBOX_LEASE": 300,           # seconds a claimed batch is left to its flusher
+}
+
+
+def outbox_setting(name):
+    return getattr(settings, "EXTERNAL_DB", {}).get(name, OUTBOX_DEFAULTS[name])
+
+
+def make_idempotency_key(scope, payload, table=None):
+    """Key identifying one logical push, e.g. scope="assessment-42".
+
+    Pushing the same payload for the same scope twice yields the same key, so
+    the second enqueue is a no-op.
+    """
+    digest = hashlib.sha256(
+        json.dumps([table or "", payload], sort_keys=True, default=str).encode()
+    ).hexdigest()[:32]
+    return f"{scope}:{digest}"
+
+
+def enqueue_external_result(payload, scope, table=None):
+    """Queue ``payload`` for the external results table; returns ``(message, created)``.
+
+    Call inside the transaction that made the local change so the row is
+    committed (or rolled back) together with it.
+    """
+    return OutboxMessage.objects.get_or_create(
+        idempotency_key=make_idempotency_key(scope, payload, table),
+        defaults={"payload": payload, "table_name": table or ""},
+    )
+
+
+def retry_delay(attempts):
+    base = float(outbox_setting("OUTBOX_BACKOFF_BASE"))
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), float(outbox_setting("OUTBOX_BACKOFF_MAX"))))
+
+
+def _mark_failed(message, exc, now, stats):
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if message.attempts >= int(outbox_setting("OUTBOX_MAX_ATTEMPTS")):
+        message.status = "dead"
+        stats["dead"] += 1
+    else:
+        message.next_attempt_at = now + retry_delay(message.attempts)
+        stats["failed"] += 1
+
+
+def _push(table, columns, items, key_column):
+    insert_external_rows(
+        table or None,
+        list(columns),
+        [[row[c] for c in columns] for _, row in items],
+        key_column=key_column,
+    )
+
+
+def _claim(batch_size, now, lease):
+    """Lease up to ``batch_size`` due messages to this flusher until ``lease``.
+
+    The rows are locked only for this short transaction: their
+    ``next_attempt_at`` moves to the lease's end, so other flushers skip them
+    while they are pushed, and pick them up again if this one dies.
+    """
+    with transaction.atomic():
+        qs = OutboxMessage.objects.filter(status="pending", next_attempt_at__lte=now).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        else:
+            qs = qs.select_for_update()
+        batch = list(qs[:batch_size])
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(next_attempt_at=lease, leased_until=lease)
+    return batch
+
+
+def flush_outbox(batch_size=100):
+    """Send one batch of due outbox messages; returns counts of what happened.
+
+    Messages are first leased in a short transaction (``_claim``), so no
+    database lock is held while the external database is written and
+    several flushers can run side by side. Messages with the same table and
+    columns go out in one ``executemany``; if that fails, they are retried
+    one by one so a single bad row cannot block the rest. Outcomes are then
+    recorded only on messages still under this flusher's lease. Failed
+    messages back off exponentially and are marked ``dead`` after
+    OUTBOX_MAX_ATTEMPTS.
+    """
+    stats = {"claimed": 0, "sent": 0, "failed": 0, "dead": 0}
+    if get_pool() is None:
+        return stats
+
+    key_column = outbox_setting("OUTBOX_KEY_COLUMN")
+    now = timezone.now()
+    lease = now + timedelta(seconds=float(outbox_setting("OUTBOX_LEASE")))
+    batch = _claim(batch_size, now, lease)
+    stats["claimed"] = len(batch)
+
+    groups = defaultdict(list)
+    for message in batch:
+        row = dict(message.payload)
+        if key_column:
+            row[key_column] = message.idempotency_key
+        groups[(message.table_name, tuple(row))].append((message, row))
+
+    sent, failed = [], []
+    for (table, columns), items in groups.items():
+        try:
+            _push(table, columns, items, key_column)
+            sent.extend(m for m, _ in items)
+            continue
+        except Exception as exc:
+            if len(items) == 1:
+                _mark_failed(items[0][0], exc, now, stats)
+                failed.append(items[0][0])
+                continue
+        for item in items:
+            try:
+                _push(table, columns, [item], key_column)
+                sent.append(item[0])
+            except Exception as exc:
+                _mark_failed(item[0], exc, now, stats)
+                failed.append(item[0])
+
+    # A message whose lease ran out meanwhile may have been claimed again;
+    # its new owner records the outcome
+    ours = OutboxMessage.objects.filter(leased_until=lease)
+    if sent:
+        stats["sent"] = ours.filter(pk__in=[m.pk for m in sent]).update(
+            status="sent", sent_at=timezone.now(), last_error="", leased_until=None,
+        )
+    for message in failed:
+        ours.filter(pk=message.pk).update(
+            status=message.status, attempts=message.attempts, next_attempt_at=message.next_attempt_at,
+            last_error=message.last_error, leased_until=None,
+        )
+    for outcome in ("sent", "failed", "dead"):
+        if stats[outcome]:
+            EXTERNAL_PUSHES.inc(stats[outcome], outcome=outcome)
+    return stats
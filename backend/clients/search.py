@@ -0,0 +1,280 @@
+import re
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Client, ClientSearchTerm
+
+# Field -> ranking weight. Identifiers are also indexed whole (punctuation
+# removed), so "INDI-1100001" is found by "indi1100001", "indi 11000" or "1100001".
+SEARCH_FIELDS = {
+    'reference': 1.5,
+    'nationalId': 1.5,
+    'brn': 1.5,
+    'email': 1.2,
+    'fullName': 1.0,
+    'corporateName': 1.0,
+}
+IDENTIFIER_FIELDS = ('reference', 'nationalId', 'brn', 'email')
+MAX_TERM_LENGTH = 64
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Rows read per query token; bounds the work for very common prefixes
+CANDIDATE_LIMIT = 1000
+# Candidates fully scored per step, best first by the word that found them
+SHORTLIST_FACTOR = 10
+# Typos are only looked for in words at least this long
+FUZZY_MIN_LENGTH = 4
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def normalize(value):
+    """Lowercase ``value`` and strip accents, e.g. ``'Élodie'`` -> ``'elodie'``."""
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in value if not unicodedata.combining(c)).lower()
+
+
+def tokenize(value):
+    return TOKEN_RE.findall(normalize(value))
+
+
+def client_terms(values):
+    """Return the set of ``(term, field)`` pairs indexed for one client's field values."""
+    terms = set()
+    for field in SEARCH_FIELDS:
+        words = tokenize(values.get(field))
+        for word in words:
+            terms.add((word[:MAX_TERM_LENGTH], field))
+        if field in IDENTIFIER_FIELDS and len(words) > 1:
+            terms.add((''.join(words)[:MAX_TERM_LENGTH], field))
+    return terms
+
+
+def index_clients(clients):
+    """Replace the search terms of ``clients`` (Client instances or field dicts with ``id``)."""
+    ids, rows = [], []
+    for client in clients:
+        values = client if isinstance(client, dict) else client.__dict__
+        ids.append(values['id'])
+        rows.extend(
+            ClientSearchTerm(client_id=values['id'], term=term, field=field)
+            for term, field in client_terms(values)
+        )
+    with transaction.atomic():
+        ClientSearchTerm.objects.filter(client_id__in=ids).delete()
+        ClientSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_search_index(batch_size=2000):
+    """Reindex every client in ``batch_size`` chunks; returns ``(clients, terms)``."""
+    clients = terms = 0
+    last_id = 0
+    while True:
+        batch = list(
+            Client.objects.filter(id__gt=last_id).order_by('id').values('id', *SEARCH_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return clients, terms
+        last_id = batch[-1]['id']
+        terms += index_clients(batch)
+        clients += len(batch)
+
+
+def prefix_filter(prefix):
+    """Lookup kwargs matching terms that start with ``prefix``, as a plain index range.
+
+    ``startswith`` becomes LIKE, which SQLite and PostgreSQL (without a
+    pattern-ops index) cannot answer from the index. Terms only contain
+    ALPHABET, which sorts the same in binary and accent/case-insensitive
+    collations, so the range ends at the next string in that alphabet.
+    """
+    head = prefix
+    while head and head[-1] == ALPHABET[-1]:
+        head = head[:-1]
+    if not head:
+        return {'term__gte': prefix}
+    return {'term__gte': prefix, 'term__lt': head[:-1] + ALPHABET[ALPHABET.index(head[-1]) + 1]}
+
+
+def edit_distance(a, b, limit):
+    """Edit distance between ``a`` and ``b`` counting an adjacent swap as one edit.
+
+    Returns ``limit + 1`` as soon as the distance is known to exceed ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def typo_variants(token):
+    """Every string one deletion, insertion, substitution or adjacent swap away from ``token``."""
+    splits = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+    variants = {a + b[1:] for a, b in splits if b}
+    variants |= {a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1}
+    variants |= {a + c + b[1:] for a, b in splits if b for c in ALPHABET}
+    variants |= {a + c + b for a, b in splits for c in ALPHABET}
+    variants.discard(token)
+    return variants
+
+
+def _match_quality(token, term, distance=0):
+    if distance:
+        return 0.5 - 0.1 * distance
+    if term == token:
+        return 1.0
+    # Prefix: the more of the term the query covers, the better
+    return 0.6 + 0.4 * len(token) / len(term)
+
+
+def _typo_limit(token):
+    """One edit for words of FUZZY_MIN_LENGTH or more; none for shorter words or ones with digits (IDs)."""
+    return int(len(token) >= FUZZY_MIN_LENGTH and not any(c.isdigit() for c in token))
+
+
+def _term_quality(token, term, limit):
+    if term.startswith(token):
+        return _match_quality(token, term)
+    if limit:
+        distance = edit_distance(token, term, limit)
+        if distance <= limit:
+            return _match_quality(token, term, distance)
+    return 0
+
+
+def _best_by_client(rows, token, distances=None):
+    best = {}
+    for client_id, term, field in rows:
+        distance = distances[term] if distances else 0
+        score = _match_quality(token, term, distance) * SEARCH_FIELDS[field]
+        if score > best.get(client_id, 0):
+            best[client_id] = score
+    return best
+
+
+def _prefix_candidates(tokens, terms):
+    """Clients having a term starting with each of ``tokens``, with their score for the first one.
+
+    The rarest token (by a count capped at CANDIDATE_LIMIT) drives an index
+    range scan; the others are checked per client with EXISTS on the
+    client's own terms. Returns ``{client_id: score}``.
+    """
+    if len(tokens) > 1:
+        counts = {token: terms.filter(**prefix_filter(token))[:CANDIDATE_LIMIT].count() for token in tokens}
+        tokens = sorted(tokens, key=counts.get)
+        if not counts[tokens[0]]:
+            return {}
+    qs = terms.filter(**prefix_filter(tokens[0]))
+    for token in tokens[1:]:
+        qs = qs.filter(Exists(ClientSearchTerm.objects.filter(client_id=OuterRef('client_id'), **prefix_filter(token))))
+    # In term order, so exact matches are never cut off by longer terms sharing the prefix
+    rows = qs.order_by('term').values_list('client_id', 'term', 'field')[:CANDIDATE_LIMIT]
+    return _best_by_client(rows, tokens[0])
+
+
+def _typo_candidates(token, terms):
+    """Clients with a term one typo away from ``token``, with their score for it.
+
+    Looks the ``typo_variants`` up with one indexed IN query instead of
+    comparing the token with the vocabulary.
+    """
+    if not _typo_limit(token):
+        return {}
+    variants = typo_variants(token)
+    rows = terms.filter(term__in=variants).values_list('client_id', 'term', 'field')[:CANDIDATE_LIMIT]
+    return _best_by_client(rows, token, dict.fromkeys(variants, 1))
+
+
+def _score_candidates(tokens, candidates):
+    """Score ``candidates`` against every token, from one read of their terms.
+
+    A client's score is the sum over the tokens of its best weighted match;
+    clients missing a token are dropped.
+    """
+    limits = [_typo_limit(token) for token in tokens]
+    best = defaultdict(lambda: [0.0] * len(tokens))
+    rows = ClientSearchTerm.objects.filter(client_id__in=candidates).values_list('client_id', 'term', 'field')
+    for client_id, term, field in rows:
+        scores = best[client_id]
+        for i, token in enumerate(tokens):
+            score = _term_quality(token, term, limits[i]) * SEARCH_FIELDS[field]
+            if score > scores[i]:
+                scores[i] = score
+    return {client_id: sum(scores) for client_id, scores in best.items() if all(scores)}
+
+
+def _shortlist(found, limit):
+    return sorted(found, key=lambda client_id: (-found[client_id], client_id))[:limit * SHORTLIST_FACTOR]
+
+
+def search_clients(query, channel=None, limit=DEFAULT_LIMIT):
+    """Rank clients matching every word of ``query``.
+
+    Words match a client's indexed terms exactly, as a prefix, or with a
+    small typo; a client's score is the sum over the words of its best
+    match, weighted by field. Candidates are found in up to three steps,
+    stopping once ``limit`` clients are found: the words run together as one
+    identifier (``INDI 1100`` -> ``indi1100``), every word as a prefix, then
+    the longest word as a prefix or with one typo, letting any word carry a
+    typo. Each step reads at most CANDIDATE_LIMIT index rows and fully
+    scores a shortlist of ``limit * SHORTLIST_FACTOR``. ``channel``
+    restricts the search to one distribution channel (None searches all).
+
+    Returns ``(clients, scores, seconds)``: up to ``limit`` Client instances
+    best first, and their scores by id.
+    """
+    started = time.monotonic()
+    tokens = list(dict.fromkeys(tokenize(query)))[:8]
+    if not tokens:
+        return [], {}, 0.0
+
+    terms = ClientSearchTerm.objects.all()
+    if channel is not None:
+        terms = terms.filter(client__distributionChannel=channel)
+
+    scores = {}
+    if len(tokens) > 1:
+        compact = ''.join(tokens)[:MAX_TERM_LENGTH]
+        found = _prefix_candidates([compact], terms.filter(field__in=IDENTIFIER_FIELDS))
+        # Counts as matching every word
+        scores = {client_id: score * len(tokens) for client_id, score in found.items()}
+    if len(scores) < limit:
+        found = _prefix_candidates(tokens, terms)
+        found = {client_id: score for client_id, score in found.items() if client_id not in scores}
+        if len(tokens) == 1:
+            scores.update(found)
+        elif found:
+            scores.update(_score_candidates(tokens, _shortlist(found, limit)))
+    if len(scores) < limit and any(_typo_limit(token) for token in tokens):
+        # The longest word, as a prefix or with a typo, drives; the others may hold the typo instead
+        longest = max(tokens, key=len)
+        found = _typo_candidates(longest, terms)
+        if len(tokens) > 1:
+            for client_id, score in _prefix_candidates([longest], terms).items():
+                found[client_id] = max(score, found.get(client_id, 0))
+        found = {client_id: score for client_id, score in found.items() if client_id not in scores}
+        if len(tokens) == 1:
+            scores.update(found)
+        elif found:
+            scores.update(_score_candidates(tokens, _shortlist(found, limit)))
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    clients = Client.objects.select_related('created_by').in_bulk([client_id for client_id, _ in ranked])
+    results = [clients[client_id] for client_id, _ in ranked if client_id in clients]
+    return results, {client_id: round(score, 3) for client_id, score in ranked}, time.monotonic() - started
@@ -1,10 +1,29 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Client, KycDocument
+from .models import Client, DuplicateCandidate, KycDocument, KycUploadSession
 
 class KycDocumentSerializer(serializers.ModelSerializer):
+    # Access-checked URL for the file; ``document`` itself is only served in development
+    download_url = serializers.SerializerMethodField()
+
     class Meta:
         model = KycDocument
-        fields = ['id', 'client', 'uploaded_by', 'document', 'original_filename', 'upload_date']
+        fields = ['id', 'client', 'uploaded_by', 'document', 'original_filename', 'upload_date', 'sha256', 'download_url']
+        read_only_fields = ['original_filename', 'sha256']
+
+    def get_download_url(self, obj):
+        url = reverse('kycdocument-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class KycUploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source='received', read_only=True)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', source='expected_sha256', required=False, allow_blank=True)
+
+    class Meta:
+        model = KycUploadSession
+        fields = ['id', 'client', 'filename', 'size', 'offset', 'sha256', 'status', 'document', 'created_at', 'updated_at']
+        read_only_fields = ['status', 'document', 'created_at', 'updated_at']
 
 class ClientSerializer(serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
@@ -22,4 +41,26 @@ class ClientSerializer(serializers.ModelSerializer):
         if not name and hasattr(user, 'get_full_name'):
             name = user.get_full_name()
         # Fallbacks
-        return name or getattr(user, 'username', None) or getattr(user, 'email', None)
\ No newline at end of file
+        return name or getattr(user, 'username', None) or getattr(user, 'email', None)
+
+class DuplicateClientSerializer(serializers.ModelSerializer):
+    """The fields a reviewer compares when judging a duplicate pair"""
+
+    class Meta:
+        model = Client
+        fields = ['id', 'reference', 'clientType', 'distributionChannel', 'fullName', 'corporateName',
+                  'nationalId', 'brn', 'email', 'phone', 'createdAt']
+
+class DuplicateCandidateSerializer(serializers.ModelSerializer):
+    client = DuplicateClientSerializer(read_only=True)
+    duplicate = DuplicateClientSerializer(read_only=True)
+
+    class Meta:
+        model = DuplicateCandidate
+        fields = ['id', 'client', 'duplicate', 'score', 'reasons', 'status', 'reviewed_by', 'reviewed_at',
+                  'created_at', 'updated_at']
+        read_only_fields = fields
+
+class ReviewDuplicateSerializer(serializers.Serializer):
+    """Serializer for confirming or dismissing a duplicate pair"""
+    status = serializers.ChoiceField(choices=['confirmed', 'dismissed', 'pending'])
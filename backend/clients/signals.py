@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .duplicates import MATCH_FIELDS, index_match_keys
+from .models import Client, KycBlob, KycDocument
+from .search import SEARCH_FIELDS, index_clients
+from .storage import blob_sha256
+
+# Sent after Client rows are written with bulk_create/bulk_update, which skip
+# the regular post_save signal. Receivers get ``instances`` (and ``fields``
+# for updates); updated instances still carry the state they were loaded with.
+clients_bulk_created = Signal()
+clients_bulk_updated = Signal()
+
+
+@receiver(post_delete, sender=KycDocument)
+def release_kyc_blob(sender, instance, **kwargs):
+    # The file itself is removed later by collect_kyc_blobs, once unreferenced
+    sha256 = blob_sha256(instance.document.name)
+    if sha256:
+        KycBlob.release(sha256)
+
+
+@receiver(post_save, sender=Client)
+def index_client(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is None or set(update_fields) & set(SEARCH_FIELDS):
+        index_clients([instance])
+    if update_fields is None or set(update_fields) & set(MATCH_FIELDS):
+        index_match_keys([instance])
+
+
+@receiver(clients_bulk_created, sender=Client)
+def index_bulk_created_clients(sender, instances, **kwargs):
+    # Backends that do not return ids from bulk_create (MySQL): find them by reference
+    missing = {obj.reference: obj for obj in instances if obj.pk is None}
+    if missing:
+        for reference, pk in Client.objects.filter(reference__in=missing).values_list('reference', 'id'):
+            missing[reference].pk = pk
+    saved = [obj for obj in instances if obj.pk is not None]
+    index_clients(saved)
+    index_match_keys(saved)
+
+
+@receiver(clients_bulk_updated, sender=Client)
+def index_bulk_updated_clients(sender, instances, fields=(), **kwargs):
+    if set(fields) & set(SEARCH_FIELDS):
+        index_clients(instances)
+    if set(fields) & set(MATCH_FIELDS):
+        index_match_keys(instances)
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+BLOB_DIR = 'kyc_blobs'
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def blob_name(sha256):
+    """Storage name of a blob: ``kyc_blobs/ab/cd/<sha256>``."""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def blob_sha256(name):
+    """Return the hash encoded in a blob name, or None for other (legacy) names."""
+    if not name or not name.startswith(BLOB_DIR + '/'):
+        return None
+    return os.path.basename(name)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_sha256(content):
+    if hasattr(content, 'temporary_file_path'):
+        return file_sha256(content.temporary_file_path())
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_BUFFER_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File storage that names every file after the SHA-256 of its content.
+
+    The name passed in is ignored: a file is stored once under
+    ``blob_name(sha256)`` however many documents refer to it, and saving
+    content that is already present writes nothing. Callers keep the
+    original file name themselves. Files saved under other names (e.g. the
+    old ``kyc_docs/...`` layout) can still be opened and deleted.
+
+    Content may carry a precomputed ``sha256`` attribute to skip hashing.
+    Blobs are never deleted through a document; unreferenced ones are
+    removed by ``collect_kyc_blobs`` (clients/blobs.py). Callers take the
+    KycBlob reference before saving (see KycDocument.save), so a blob found
+    here cannot be collected before that reference commits.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are decided by _save; identical content must map to the same name
+        return name
+
+    def _save(self, name, content):
+        sha256 = getattr(content, 'sha256', None) or content_sha256(content)
+        name = blob_name(sha256)
+        full_path = self.path(name)
+        if os.path.exists(full_path):
+            try:
+                # Fresh again: collect_kyc_blobs leaves recently touched files alone
+                # while the new reference is not committed yet
+                os.utime(full_path)
+                return name
+            except FileNotFoundError:
+                pass
+
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            # Write next to the target and rename, so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in content.chunks():
+                        f.write(chunk)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+
+kyc_storage = ContentAddressedStorage()
+
+
+def get_kyc_storage():
+    return kyc_storage
@@ -1,3 +1,518 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import io
+import unittest
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend.sql_instrumentation import query_budget
+from users.models import CustomUser
+
+from . import external_db
+from .blobs import collect_kyc_blobs
+from .downloads import parse_range
+from .duplicates import compare, find_duplicates, match_keys, profile, save_duplicates, soundex
+from .importer import import_clients
+from .models import (
+    Client, DuplicateCandidate, KycBlob, KycDocument, KycUploadSession, OutboxMessage, ReferenceSequence,
+)
+from .outbox import enqueue_external_result, flush_outbox
+from .uploads import ChunkInProgress, OffsetMismatch, open_session, write_chunk
+
+
+class ReferenceSequenceTests(TestCase):
+    def test_first_reference_per_prefix(self):
+        self.assertEqual(Client.objects.create(fullName="A").reference, "INDI-1100001")
+        self.assertEqual(Client.objects.create(clientType="corporate", corporateName="B").reference, "CORP-1100001")
+        self.assertEqual(Client.objects.create(fullName="C").reference, "INDI-1100002")
+
+    def test_reserve_block(self):
+        block = ReferenceSequence.reserve("INDI", 3)
+        self.assertEqual(block, ["INDI-1100001", "INDI-1100002", "INDI-1100003"])
+        self.assertEqual(Client.objects.create(fullName="A").reference, "INDI-1100004")
+
+    def test_continues_after_numeric_maximum(self):
+        # "INDI-999" sorts after "INDI-1100001" as a string
+        Client.objects.create(fullName="A", reference="INDI-999")
+        Client.objects.create(fullName="B", reference="INDI-1200000")
+        self.assertEqual(Client.objects.create(fullName="C").reference, "INDI-1200001")
+
+    def test_explicit_reference_is_kept(self):
+        self.assertEqual(Client.objects.create(fullName="A", reference="EXT-1").reference, "EXT-1")
+        self.assertFalse(ReferenceSequence.objects.exists())
+
+    def test_explicit_reference_advances_sequence(self):
+        Client.objects.create(fullName="A")
+        Client.objects.create(fullName="B", reference="INDI-1300000")
+        self.assertEqual(Client.objects.create(fullName="C").reference, "INDI-1300001")
+        # A lower explicit number leaves the sequence where it is
+        Client.objects.create(fullName="D", reference="INDI-1100050")
+        self.assertEqual(Client.objects.create(fullName="E").reference, "INDI-1300002")
+
+
+class ImportClientsTests(TestCase):
+    def test_upsert_by_dedupe_key(self):
+        Client.objects.create(fullName="Old", nationalId="N1")
+        rows = [
+            {"full_name": "New", "national_id": "N1"},
+            {"full_name": "P", "phone": "1"},
+            {"full_name": "P", "phone": "1", "city": "Port Louis"},
+        ]
+        report = import_clients(rows)
+        self.assertEqual((report["created"], report["updated"], report["duplicates"]), (1, 1, 1))
+        self.assertEqual(Client.objects.get(nationalId="N1").fullName, "New")
+        self.assertEqual(Client.objects.get(phone="1").city, "Port Louis")
+
+    def test_rows_matching_one_client_by_different_keys_conflict(self):
+        client = Client.objects.create(fullName="Ada", nationalId="N1", email="ada@example.com")
+        rows = [
+            {"full_name": "Ada King", "national_id": "N1", "email": "ada@example.com"},
+            {"full_name": "Someone Else", "email": "ada@example.com"},
+        ]
+        report = import_clients(rows)
+
+        self.assertEqual((report["updated"], report["conflicts"]), (1, 1))
+        self.assertEqual(report["conflicting_rows"][0]["client_id"], client.pk)
+        self.assertEqual(report["conflicting_rows"][0]["matched_by"], "email")
+        self.assertEqual(Client.objects.get().fullName, "Ada King")
+
+
+@unittest.skipIf(connection.vendor == "sqlite", "SQLite serialises writers; needs MySQL or PostgreSQL")
+class ReferenceConcurrencyTests(TransactionTestCase):
+    WORKERS = 16
+    PER_WORKER = 25
+
+    def test_parallel_creators_get_unique_references(self):
+        errors = []
+        barrier = threading.Barrier(self.WORKERS)
+
+        def create_clients(worker):
+            try:
+                barrier.wait()
+                for i in range(self.PER_WORKER):
+                    if i % 5 == 0:
+                        ReferenceSequence.reserve("INDI", 10)
+                    Client.objects.create(fullName=f"Worker {worker} #{i}")
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=create_clients, args=(w,)) for w in range(self.WORKERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        references = list(Client.objects.values_list("reference", flat=True))
+        self.assertEqual(len(references), self.WORKERS * self.PER_WORKER)
+        self.assertEqual(len(set(references)), len(references))
+        reserved = self.WORKERS * self.PER_WORKER // 5 * 10
+        self.assertEqual(
+            ReferenceSequence.objects.get(prefix="INDI").last_value,
+            ReferenceSequence.FIRST_NUMBER - 1 + len(references) + reserved,
+        )
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = [("id",), ("full_name",)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+
+    def executemany(self, sql, rows):
+        if self.conn.on_executemany:
+            self.conn.on_executemany(sql, rows)
+        self.conn.executed.extend((sql, row) for row in rows)
+
+    def fetchall(self):
+        return [(1, "Jane Doe")]
+
+
+class FakeConnection:
+    """Stand-in for a PyMySQL connection."""
+
+    def __init__(self, on_executemany=None):
+        self.executed = []
+        self.closed = False
+        self.alive = True
+        self.on_executemany = on_executemany
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("gone")
+
+    def close(self):
+        self.closed = True
+
+
+class ExternalConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+        def connect():
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+
+        self.pool = external_db.configure_pool(connect, max_size=2, timeout=0.05)
+        self.addCleanup(setattr, external_db, "_pool", None)
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            rows = external_db.fetch_external_clients(limit=1, query="SELECT 1")
+        self.assertEqual(rows, [{"id": 1, "full_name": "Jane Doe"}])
+        self.assertEqual(len(self.opened), 1)
+        stats = external_db.external_pool_stats()
+        self.assertEqual((stats["checkouts"], stats["creates"], stats["idle"]), (5, 1, 1))
+
+    def test_pool_is_bounded(self):
+        with self.pool.connection(), self.pool.connection():
+            with self.assertRaises(external_db.PoolTimeout):
+                with self.pool.connection():
+                    pass
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+
+    def test_dead_and_expired_connections_are_replaced(self):
+        with self.pool.connection() as conn:
+            pass
+        conn.alive = False
+        self.pool.health_check_after = 0
+        with self.pool.connection() as replacement:
+            self.assertIsNot(replacement, conn)
+        self.assertTrue(conn.closed)
+
+        self.pool.max_idle = 0
+        with self.pool.connection() as newest:
+            self.assertIsNot(newest, replacement)
+        self.assertEqual(self.pool.stats()["size"], 1)
+
+    def test_failed_block_discards_connection(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.connection() as conn:
+                raise RuntimeError
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.stats()["size"], 0)
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertFalse(parse_range("bytes=100-", 100))
+
+    def test_empty_file_has_no_satisfiable_range(self):
+        self.assertIs(parse_range("bytes=-10", 0), False)
+        self.assertIs(parse_range("bytes=0-", 0), False)
+
+
+class KycBlobTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.owner = Client.objects.create(fullName="Ada Lovelace")
+
+    def test_reused_blob_survives_collection(self):
+        first = KycDocument.objects.create(client=self.owner, document=ContentFile(b"passport", name="a.pdf"))
+        path = first.document.path
+        first.delete()
+        # Unreferenced for longer than the grace period, file included
+        KycBlob.objects.update(updated_at=first.upload_date - timedelta(days=1))
+        os.utime(path, (0, 0))
+
+        second = KycDocument.objects.create(client=self.owner, document=ContentFile(b"passport", name="b.pdf"))
+        self.assertEqual(second.document.path, path)
+        self.assertEqual(collect_kyc_blobs(), (0, 0))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(KycBlob.objects.get().ref_count, 1)
+
+    def test_unreferenced_blob_is_collected(self):
+        document = KycDocument.objects.create(client=self.owner, document=ContentFile(b"passport", name="a.pdf"))
+        path = document.document.path
+        document.delete()
+        KycBlob.objects.update(updated_at=document.upload_date - timedelta(days=1))
+
+        self.assertEqual(collect_kyc_blobs(), (1, len(b"passport")))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(KycBlob.objects.exists())
+
+    def test_migration_with_nothing_to_move(self):
+        KycDocument.objects.create(client=self.owner, document=ContentFile(b"passport", name="a.pdf"))
+        out = io.StringIO()
+
+        # Already content-addressed: a no-op run
+        call_command("migrate_kyc_storage", stdout=out)
+
+        self.assertIn("0 document(s) moved", out.getvalue())
+        self.assertIn("0.0 MB -> 0.0 MB", out.getvalue())
+
+
+class UploadChunkTests(TestCase):
+    def setUp(self):
+        parts = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, parts, ignore_errors=True)
+        upload_settings = override_settings(KYC_UPLOAD_TEMP_DIR=parts)
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+        user = CustomUser.objects.create_user(username="clerk", password="pw")
+        self.session = open_session(Client.objects.create(fullName="A"), user, "id.pdf", 10)
+
+    def test_chunk_at_claimed_offset_is_refused(self):
+        # Another request is still writing the chunk at offset 0
+        KycUploadSession.objects.filter(pk=self.session.pk).update(
+            writing_until=self.session.created_at + timedelta(hours=1))
+        with self.assertRaises(ChunkInProgress) as raised:
+            write_chunk(self.session, 0, io.BytesIO(b"01234"), 5)
+        self.assertEqual(raised.exception.expected, 0)
+
+    def test_expired_claim_is_taken_over(self):
+        KycUploadSession.objects.filter(pk=self.session.pk).update(
+            writing_until=self.session.created_at - timedelta(seconds=1))
+        self.assertEqual(write_chunk(self.session, 0, io.BytesIO(b"01234"), 5), 5)
+        self.assertIsNone(KycUploadSession.objects.get(pk=self.session.pk).writing_until)
+
+    def test_repeated_chunk_gets_new_offset(self):
+        stale = KycUploadSession.objects.get(pk=self.session.pk)
+        write_chunk(self.session, 0, io.BytesIO(b"01234"), 5)
+        # A second request loaded the session before the first one finished
+        with self.assertRaises(OffsetMismatch) as raised:
+            write_chunk(stale, 0, io.BytesIO(b"01234"), 5)
+        self.assertNotIsInstance(raised.exception, ChunkInProgress)
+        self.assertEqual(raised.exception.expected, 5)
+
+
+class DocumentDownloadTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.user = CustomUser.objects.create_user(username="officer", password="pw", role="compliance", is_approved=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        self.owner = Client.objects.create(fullName="Ada Lovelace")
+
+    def document(self, name, content):
+        return KycDocument.objects.create(client=self.owner, document=ContentFile(content, name=name))
+
+    def test_pdf_is_shown_inline(self):
+        response = self.client.get(f"/api/kyc-documents/{self.document('id.pdf', b'%PDF-1.4').pk}/download/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response["Content-Disposition"].startswith("inline"))
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+
+    def test_html_is_always_an_attachment(self):
+        document = self.document("page.html", b"<script>alert(1)</script>")
+        response = self.client.get(f"/api/kyc-documents/{document.pk}/download/")
+        self.assertTrue(response["Content-Disposition"].startswith("attachment"))
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+
+    def test_signed_url_serves_ranges_without_auth_header(self):
+        document = self.document("id.pdf", b"0123456789")
+        url = self.client.post(f"/api/kyc-documents/{document.pk}/signed-url/").json()["url"]
+
+        del self.client.defaults["HTTP_AUTHORIZATION"]
+        response = self.client.get(url, HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+        self.assertEqual(self.client.get(url.replace("/kyc-files/", "/kyc-files/x")).status_code, 404)
+
+    def test_signed_url_expires(self):
+        document = self.document("id.pdf", b"0123456789")
+        url = self.client.post(f"/api/kyc-documents/{document.pk}/signed-url/").json()["url"]
+        with override_settings(KYC_SIGNED_URL_TTL=-1):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(EXTERNAL_DB={"OUTBOX_KEY_COLUMN": "push_key", "OUTBOX_MAX_ATTEMPTS": 2})
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.connection = FakeConnection(on_executemany=self.pushing)
+        external_db.configure_pool(lambda: self.connection)
+        self.addCleanup(setattr, external_db, "_pool", None)
+        self.during_push = None
+
+    def pushing(self, sql, rows):
+        if self.during_push:
+            self.during_push()
+        if any("bad" in row for row in rows):
+            raise ValueError("bad row")
+
+    def test_rows_are_upserted_by_key(self):
+        message, _ = enqueue_external_result({"client": "A", "score": 10}, "assessment-1")
+        self.assertEqual(flush_outbox()["sent"], 1)
+
+        sql, row = self.connection.executed[0]
+        self.assertIn("ON DUPLICATE KEY UPDATE `client`=VALUES(`client`),`score`=VALUES(`score`)", sql)
+        self.assertNotIn("IGNORE", sql)
+        self.assertEqual(row, ["A", 10, message.idempotency_key])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.leased_until), ("sent", None))
+
+    def test_messages_are_leased_while_pushed(self):
+        enqueue_external_result({"client": "A"}, "assessment-1")
+
+        def check():
+            message = OutboxMessage.objects.get()
+            self.assertIsNotNone(message.leased_until)
+            # Not due for other flushers until the lease ends
+            self.assertEqual(message.next_attempt_at, message.leased_until)
+
+        self.during_push = check
+        self.assertEqual(flush_outbox()["sent"], 1)
+
+    def test_outcome_of_a_lost_lease_is_not_recorded(self):
+        enqueue_external_result({"client": "A"}, "assessment-1")
+        # The lease ran out and another flusher claimed the message meanwhile
+        self.during_push = lambda: OutboxMessage.objects.update(leased_until=timezone.now())
+        self.assertEqual(flush_outbox()["sent"], 0)
+        self.assertEqual(OutboxMessage.objects.get().status, "pending")
+
+    def test_failures_back_off_then_dead_letter(self):
+        enqueue_external_result({"client": "bad"}, "assessment-1")
+        enqueue_external_result({"client": "B"}, "assessment-2")
+        stats = flush_outbox()
+        self.assertEqual((stats["sent"], stats["failed"]), (1, 1))
+        failed = OutboxMessage.objects.get(status="pending")
+        self.assertEqual(failed.attempts, 1)
+        self.assertIsNone(failed.leased_until)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(flush_outbox()["dead"], 1)
+        self.assertEqual(OutboxMessage.objects.get(pk=failed.pk).status, "dead")
+
+
+class ClientSearchTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        self.agent = CustomUser.objects.create_user(username="agent", password="pw", role="user",
+                                                    distribution_channel="Agent")
+        self.longer = Client.objects.create(fullName="Ramdinesh Kumar", distributionChannel="Agent")
+        self.ramdin = Client.objects.create(fullName="Jean-Pierre Élodie Ramdin", nationalId="R1234567",
+                                            email="jp.ramdin@mail.mu", distributionChannel="Agent")
+        self.holding = Client.objects.create(clientType="corporate", corporateName="Ramdass Holdings Ltd",
+                                             brn="C07-012345", distributionChannel="Branch")
+        self.smith = Client.objects.create(fullName="Johnson Smith", distributionChannel="Agent")
+
+    def search(self, q, user=None):
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(user or self.admin).access_token}"
+        response = self.client.get("/api/clients/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["results"]]
+
+    def test_exact_and_identifier_matches_rank_first(self):
+        self.assertEqual(self.search("ramdin"), [self.ramdin.pk, self.longer.pk])
+        self.assertEqual(self.search("ramd"), [self.ramdin.pk, self.holding.pk, self.longer.pk])
+        self.assertEqual(self.search("elodie"), [self.ramdin.pk])
+        self.assertEqual(self.search("C07012345"), [self.holding.pk])
+        self.assertEqual(self.search(self.holding.reference), [self.holding.pk])
+        self.assertEqual(self.search(""), [])
+
+    def test_typos(self):
+        self.assertEqual(self.search("jonhson"), [self.smith.pk])
+        self.assertEqual(self.search("johnsen"), [self.smith.pk])
+        self.assertEqual(self.search("smith johnsn"), [self.smith.pk])
+        self.assertEqual(self.search("ramdass holdngs"), [self.holding.pk])
+        # Identifiers must match exactly or by prefix
+        self.assertEqual(self.search("R1234568"), [])
+
+    def test_agent_only_searches_own_channel(self):
+        self.assertEqual(self.search("ramd", user=self.agent), [self.ramdin.pk, self.longer.pk])
+        self.assertEqual(self.search("holdings", user=self.agent), [])
+
+    def test_index_follows_renames(self):
+        self.smith.fullName = "Peter Parker"
+        self.smith.save()
+        self.assertEqual(self.search("parker"), [self.smith.pk])
+        self.assertEqual(self.search("johnson"), [])
+
+
+class DuplicateMatchingTests(TestCase):
+    def test_soundex(self):
+        self.assertEqual([soundex(word) for word in ("robert", "rupert", "ashcraft", "tymczak", "pfister")],
+                         ["r163", "r163", "a261", "t522", "p236"])
+        self.assertEqual(soundex("smith"), soundex("smyth"))
+
+    def test_compare(self):
+        def person(**values):
+            return profile({"clientType": "individual", **values})
+
+        score, reasons = compare(person(fullName="J. Smith", phone="+230 5712 3456"),
+                                 person(fullName="John Smith", phone="5712-3456"))
+        self.assertGreater(score, 0.9)
+        self.assertEqual(set(reasons), {"name", "phone"})
+        # A conflicting identifier outweighs the same name
+        self.assertLess(compare(person(fullName="John Smith", nationalId="A123456"),
+                                person(fullName="John Smith", nationalId="Z999999"))[0], 0.8)
+        self.assertLess(compare(person(fullName="John Smith"), person(fullName="Jane Smith"))[0], 0.8)
+
+    def test_blocking_only_compares_clients_sharing_a_key(self):
+        first = Client.objects.create(fullName="John Smith", phone="57123456")
+        second = Client.objects.create(fullName="J. Smith", phone="+230 5712 3456")
+        Client.objects.create(fullName="Marie Curie", phone="59999999")
+        self.assertIn("tel:7123456", match_keys({"phone": "57123456"}))
+
+        matches, report = find_duplicates()
+
+        self.assertEqual(list(matches), [(first.pk, second.pk)])
+        self.assertEqual(report["comparisons"], 1)
+        self.assertEqual(find_duplicates(client_ids=[second.pk])[0].keys(), matches.keys())
+        # Blocks over the size limit are skipped rather than compared pair by pair
+        matches, report = find_duplicates(max_block_size=1)
+        self.assertEqual(matches, {})
+        self.assertGreater(report["oversized_blocks"], 0)
+
+    def test_saving_again_keeps_the_review(self):
+        first = Client.objects.create(fullName="John Smith", phone="57123456")
+        Client.objects.create(fullName="J. Smith", phone="+230 5712 3456")
+        matches, _ = find_duplicates()
+        save_duplicates(matches)
+        DuplicateCandidate.objects.update(status="dismissed")
+
+        save_duplicates(matches)
+
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual((candidate.client_id, candidate.status), (first.pk, "dismissed"))
+
+
+class ClientListQueryTests(TestCase):
+    def test_list_reads_creators_in_one_query(self):
+        admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        for i in range(10):
+            creator = CustomUser.objects.create_user(username=f"agent{i}", password="pw", first_name=f"Agent {i}")
+            Client.objects.create(fullName=f"Client {i}", created_by=creator)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RefreshToken.for_user(admin).access_token}"
+
+        with query_budget(5, max_repeats=1):
+            response = self.client.get("/api/clients/", {"page_size": 50})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 10)
+        self.assertTrue(all(row["created_by_name"].startswith("Agent") for row in response.json()["results"]))
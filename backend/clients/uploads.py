@@ -0,0 +1,217 @@
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import KycDocument, KycUploadSession
+from .storage import file_sha256
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """A chunk or commit that cannot be applied to the session's current state."""
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, expected, message=None):
+        super().__init__(message or f"Expected offset {expected}")
+        self.expected = expected
+
+
+class ChunkInProgress(OffsetMismatch):
+    """Another request is writing the chunk at this offset; retry once it is done."""
+
+    def __init__(self, expected):
+        super().__init__(expected, f"A chunk at offset {expected} is being written")
+
+
+class _PartFile(File):
+    # Lets the storage move the part file into place instead of copying it
+    def temporary_file_path(self):
+        return self.name
+
+
+def temp_dir():
+    return Path(getattr(settings, 'KYC_UPLOAD_TEMP_DIR', Path(settings.BASE_DIR) / 'kyc_uploads'))
+
+
+def max_upload_size():
+    return getattr(settings, 'KYC_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+
+
+def chunk_claim_timeout():
+    return timedelta(seconds=getattr(settings, 'KYC_UPLOAD_CHUNK_TIMEOUT', 600))
+
+
+def part_path(session):
+    return temp_dir() / f"{session.pk}.part"
+
+
+def open_session(client, user, filename, size, expected_sha256=''):
+    """Create an upload session and its empty part file."""
+    if size < 0 or size > max_upload_size():
+        raise UploadError(f"Size must be between 0 and {max_upload_size()} bytes")
+    session = KycUploadSession.objects.create(
+        client=client,
+        created_by=user,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+        expected_sha256=(expected_sha256 or '').lower(),
+    )
+    temp_dir().mkdir(parents=True, exist_ok=True)
+    part_path(session).touch()
+    return session
+
+
+def _claim_chunk(session, offset):
+    """Reserve the session for a chunk at ``offset``; returns the claim's expiry.
+
+    One conditional UPDATE, so of two requests sending the same chunk only
+    one writes it. A claim left by a request that died expires after
+    KYC_UPLOAD_CHUNK_TIMEOUT.
+    """
+    now = timezone.now()
+    until = now + chunk_claim_timeout()
+    claimed = KycUploadSession.objects.filter(
+        Q(writing_until__isnull=True) | Q(writing_until__lt=now), pk=session.pk, status='open', received=offset,
+    ).update(writing_until=until)
+    if claimed:
+        return until
+    session.refresh_from_db(fields=['status', 'received'])
+    if session.status != 'open':
+        raise UploadError("Upload already committed")
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+    raise ChunkInProgress(session.received)
+
+
+def write_chunk(session, offset, stream, length=None):
+    """Append a chunk read from ``stream`` at ``offset`` and return the new offset.
+
+    The body is copied to the part file in ``COPY_BUFFER_SIZE`` pieces, so a
+    chunk is never held in memory. Chunks must arrive in order: an offset
+    other than the stored one raises ``OffsetMismatch`` with the offset to
+    resume from, and a chunk sent while another request is still writing at
+    that offset raises ``ChunkInProgress``. Bytes written before a dropped
+    connection still count.
+    """
+    if session.status != 'open':
+        raise UploadError("Upload already committed")
+    if offset != session.received:
+        raise OffsetMismatch(session.received)
+    remaining = session.size - offset
+    if length is not None:
+        if length > remaining:
+            raise UploadError(f"Chunk ends past the declared size of {session.size} bytes")
+        remaining = length
+
+    claim = _claim_chunk(session, offset)
+    written = 0
+    try:
+        with open(part_path(session), 'r+b') as f:
+            f.seek(offset)
+            while written < remaining:
+                data = stream.read(min(COPY_BUFFER_SIZE, remaining - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+            f.truncate()
+            if written == remaining and stream.read(1):
+                raise UploadError(f"Chunk ends past the declared size of {session.size} bytes")
+    except FileNotFoundError:
+        raise UploadError("Upload expired")
+    finally:
+        # Release the claim, moving the offset past what was written; a claim
+        # that expired and was taken over meanwhile is left to its new owner
+        if KycUploadSession.objects.filter(pk=session.pk, received=offset, writing_until=claim).update(
+            received=offset + written, writing_until=None, updated_at=timezone.now()
+        ):
+            session.received = offset + written
+        else:
+            session.refresh_from_db(fields=['received'])
+    return session.received
+
+
+def commit_session(session):
+    """Turn a fully received session into a KycDocument; committing twice returns the same document."""
+    if session.status == 'committed':
+        return session.document
+    if session.received != session.size:
+        raise UploadError(f"Upload incomplete: {session.received} of {session.size} bytes received")
+
+    path = part_path(session)
+    try:
+        sha256 = file_sha256(path)
+    except FileNotFoundError:
+        raise UploadError("Upload expired")
+    if session.expected_sha256 and sha256 != session.expected_sha256:
+        raise UploadError(f"SHA-256 mismatch: received {sha256}")
+
+    with transaction.atomic():
+        session = KycUploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'committed':
+            return session.document
+        document = KycDocument(
+            client=session.client,
+            uploaded_by=session.created_by,
+            original_filename=session.filename,
+            sha256=sha256,
+        )
+        part = _PartFile(open(path, 'rb'), name=str(path))
+        part.sha256 = sha256
+        document.document = part
+        document.document.name = session.filename
+        try:
+            document.save()
+        finally:
+            part.close()
+        # Still there if the content was already stored
+        path.unlink(missing_ok=True)
+        session.status = 'committed'
+        session.document = document
+        session.save(update_fields=['status', 'document', 'updated_at'])
+    return document
+
+
+def abort_session(session):
+    part_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+def sweep_upload_sessions(max_age=None, now=None):
+    """Delete sessions untouched for ``max_age`` (default ``KYC_UPLOAD_SESSION_TTL``) and their part files.
+
+    Part files left without a session (e.g. after a crash) are removed once
+    they are older than ``max_age`` too. Returns ``(sessions, files)`` deleted.
+    """
+    if max_age is None:
+        max_age = timedelta(seconds=getattr(settings, 'KYC_UPLOAD_SESSION_TTL', 24 * 3600))
+    now = now or timezone.now()
+    cutoff = now - max_age
+
+    expired = list(KycUploadSession.objects.filter(updated_at__lt=cutoff).values_list('pk', flat=True))
+    files = 0
+    for pk in expired:
+        path = temp_dir() / f"{pk}.part"
+        if path.exists():
+            path.unlink(missing_ok=True)
+            files += 1
+    KycUploadSession.objects.filter(pk__in=expired).delete()
+
+    directory = temp_dir()
+    if directory.is_dir():
+        live = {str(pk) for pk in KycUploadSession.objects.values_list('pk', flat=True)}
+        cutoff_ts = time.time() - max_age.total_seconds()
+        for path in directory.glob('*.part'):
+            if path.stem not in live and path.stat().st_mtime < cutoff_ts:
+                path.unlink(missing_ok=True)
+                files += 1
+    return len(expired), files
@@ -1,11 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ClientViewSet, KycDocumentViewSet
+from .views import (
+    ClientViewSet, DuplicateCandidateViewSet, KycDocumentViewSet, KycUploadViewSet, signed_document_download,
+)
 
 router = DefaultRouter()
 router.register(r'clients', ClientViewSet)
 router.register(r'kyc-documents', KycDocumentViewSet)
+router.register(r'kyc-uploads', KycUploadViewSet)
+router.register(r'duplicate-candidates', DuplicateCandidateViewSet)
 
 urlpatterns = [
+    path('kyc-files/<str:token>/', signed_document_download, name='kyc-file'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,13 +1,38 @@
-from rest_framework import viewsets, status
+import io
+
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from .models import Client, KycDocument
-from .serializers import ClientSerializer, KycDocumentSerializer
+from .models import Client, DuplicateCandidate, KycDocument, KycUploadSession
+from .serializers import (
+    ClientSerializer,
+    DuplicateCandidateSerializer,
+    DuplicateClientSerializer,
+    KycDocumentSerializer,
+    KycUploadSessionSerializer,
+    ReviewDuplicateSerializer,
+)
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+from django.utils import timezone
 from .external_db import (
     is_external_db_enabled,
     fetch_external_clients,
-    push_results_to_external,
+    iter_external_clients,
+    external_pool_stats,
+)
+from .downloads import serve_document, sign_document, unsign_document
+from .duplicates import find_duplicates
+from .importer import import_clients
+from .outbox import enqueue_external_result
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search_clients
+from .uploads import (
+    ChunkInProgress, OffsetMismatch, UploadError, abort_session, commit_session, open_session, write_chunk,
 )
 from assessments.models import Assessment
 
@@ -15,9 +40,11 @@ from assessments.models import Assessment
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    cursor_field = 'createdAt'
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        # created_by_name reads the creator of every row
+        qs = super().get_queryset().select_related('created_by')
         user = self.request.user
         
         # Admin and compliance can see all clients
@@ -35,9 +62,107 @@ class ClientViewSet(viewsets.ModelViewSet):
         # Automatically set the creator to the authenticated user
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked client search by name, national ID, BRN, email or reference.
+
+        ``?q=`` words match by prefix and tolerate small typos; ``?limit=``
+        caps the results (default 20, at most 100). Scoped to the caller's
+        distribution channel like the list. See clients/search.py.
+        """
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer'})
+
+        user = request.user
+        if user.role in ['admin', 'compliance']:
+            channel = None
+        elif user.distribution_channel:
+            channel = user.distribution_channel
+        else:
+            return Response({'query': query, 'results': []})
+
+        clients, scores, seconds = search_clients(query, channel=channel, limit=limit)
+        results = self.get_serializer(clients, many=True).data
+        for row in results:
+            row['score'] = scores[row['id']]
+        return Response({'query': query, 'results': results, 'took_ms': round(seconds * 1000, 1)})
+
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        """Clients that probably duplicate this one, best first.
+
+        Computed live from the blocking keys (clients/duplicates.py), so it
+        also covers clients created since the last find_duplicate_clients
+        run; only clients the caller can see are listed.
+        """
+        client = self.get_object()
+        matches, _ = find_duplicates(client_ids=[client.id])
+        others = {(b if a == client.id else a): match for (a, b), match in matches.items()}
+        visible = self.get_queryset().filter(id__in=others)
+        results = []
+        for other in visible:
+            score, reasons = others[other.id]
+            results.append({'client': DuplicateClientSerializer(other).data, 'score': score, 'reasons': reasons})
+        results.sort(key=lambda row: -row['score'])
+        return Response({'client': client.id, 'results': results})
+
+class DuplicateCandidateViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Likely duplicate client pairs found by find_duplicate_clients, best score first.
+
+    ``?status=`` filters by review status (default ``pending``, ``all`` for
+    every pair). Admin and compliance users review pairs with POST
+    ``review/``.
+    """
+    queryset = DuplicateCandidate.objects.all()
+    serializer_class = DuplicateCandidateSerializer
+    cursor_field = 'score'
+
+    def get_queryset(self):
+        qs = super().get_queryset().select_related('client', 'duplicate').order_by('-score', '-id')
+        if self.action == 'list':
+            status_filter = self.request.query_params.get('status', 'pending')
+            if status_filter != 'all':
+                qs = qs.filter(status=status_filter)
+        user = self.request.user
+
+        # Admin and compliance can see all pairs
+        if user.role in ['admin', 'compliance']:
+            return qs
+
+        # Regular users only see pairs of clients from their distribution channel
+        if user.distribution_channel:
+            return qs.filter(Q(client__distributionChannel=user.distribution_channel)
+                             & Q(duplicate__distributionChannel=user.distribution_channel))
+
+        # If no distribution channel set, return empty queryset
+        return DuplicateCandidate.objects.none()
+
+    @action(detail=True, methods=['post'])
+    def review(self, request, pk=None):
+        """Mark a pair as confirmed duplicates, dismissed, or back to pending."""
+        if request.user.role not in ['admin', 'compliance']:
+            return Response({'detail': 'Only admin and compliance users can review duplicates'},
+                            status=status.HTTP_403_FORBIDDEN)
+        serializer = ReviewDuplicateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        candidate = self.get_object()
+        candidate.status = serializer.validated_data['status']
+        if candidate.status == 'pending':
+            candidate.reviewed_by = None
+            candidate.reviewed_at = None
+        else:
+            candidate.reviewed_by = request.user
+            candidate.reviewed_at = timezone.now()
+        candidate.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'updated_at'])
+        return Response(self.get_serializer(candidate).data)
+
 class KycDocumentViewSet(viewsets.ModelViewSet):
     queryset = KycDocument.objects.all()
     serializer_class = KycDocumentSerializer
+    cursor_field = 'upload_date'
 
     def perform_create(self, serializer):
         # Save original filename and uploader
@@ -62,6 +187,34 @@ class KycDocumentViewSet(viewsets.ModelViewSet):
         # If no distribution channel set, return empty queryset
         return KycDocument.objects.none()
 
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """Stream the document's file to a caller allowed to see the document.
+
+        Shown inline unless ``?download=true``. Honours Range, If-Range and
+        If-None-Match; see clients/downloads.py.
+        """
+        document = self.get_object()
+        as_attachment = request.query_params.get("download", "").lower() in ("1", "true", "yes")
+        response = serve_document(request, document, as_attachment=as_attachment)
+        if response is None:
+            return Response({"detail": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        return response
+
+    @action(detail=True, methods=["post"], url_path="signed-url")
+    def signed_url(self, request, pk=None):
+        """A link to the document's file that works without the auth header for KYC_SIGNED_URL_TTL seconds.
+
+        The frontend opens it directly, so the browser's viewer can make its
+        own range requests; see ``signed_document_download``.
+        """
+        document = self.get_object()
+        url = reverse("kyc-file", args=[sign_document(document)])
+        return Response({
+            "url": request.build_absolute_uri(url),
+            "expiresIn": getattr(settings, "KYC_SIGNED_URL_TTL", 300),
+        })
+
     @action(detail=False, methods=["get"], url_path="import-external")
     def import_external(self, request):
         """Optionally fetch clients from an external MySQL DB and preview or import.
@@ -70,6 +223,9 @@ class KycDocumentViewSet(viewsets.ModelViewSet):
         - import: "true" to import into local DB, otherwise just preview
         - limit: number of rows to fetch (default: 50)
         - query: optional override SELECT query matching the other app schema
+
+        Imports run through clients.importer in chunked bulk upserts; the
+        response's "report" holds created/updated/unchanged counts and rows/s.
         """
         if not is_external_db_enabled():
             return Response({
@@ -81,7 +237,15 @@ class KycDocumentViewSet(viewsets.ModelViewSet):
         limit = int(request.query_params.get("limit", "50"))
         query = request.query_params.get("query")
 
-        rows = fetch_external_clients(limit=limit, query=query)
+        if import_flag:
+            # Stream rows straight from the external cursor into the chunked upsert
+            preview = []
+            report = import_clients(iter_external_clients(limit=limit, query=query), preview=preview)
+            rows = preview
+        else:
+            report = None
+            rows = fetch_external_clients(limit=limit, query=query)
+
         if not rows:
             return Response({
                 "detail": "No data or external connector unavailable",
@@ -91,50 +255,39 @@ class KycDocumentViewSet(viewsets.ModelViewSet):
                 "preview": [],
             })
 
-        imported = 0
-        if import_flag:
-            for r in rows:
-                # Map external fields to our Client model conservatively
-                data = {
-                    "clientType": r.get("client_type") or "individual",
-                    "distributionChannel": r.get("distribution_channel") or "HeadOffice",
-                    "fullName": r.get("full_name") or "",
-                    "nationalId": r.get("national_id") or "",
-                    "corporateName": r.get("corporate_name") or "",
-                    "email": r.get("email") or "",
-                    "phone": r.get("phone") or "",
-                    "address": r.get("address") or "",
-                    "city": r.get("city") or "",
-                }
-                # Deduplicate based on nationalId or email when available
-                lookup = {}
-                if data["nationalId"]:
-                    lookup["nationalId"] = data["nationalId"]
-                elif data["email"]:
-                    lookup["email"] = data["email"]
-                else:
-                    lookup = {"fullName": data["fullName"], "phone": data["phone"]}
-
-                # Create or update client
-                obj, created = Client.objects.get_or_create(**lookup, defaults=data)
-                if not created:
-                    # Update existing with latest data
-                    for k, v in data.items():
-                        setattr(obj, k, v)
-                    obj.save()
-                imported += 1
+        if report is not None:
+            return Response({
+                "enabled": True,
+                "count": report["rows"],
+                "imported": report["rows"],
+                "report": report,
+                "preview": preview,
+            })
 
         return Response({
             "enabled": True,
             "count": len(rows),
-            "imported": imported,
+            "imported": 0,
             "preview": rows[: min(10, len(rows))],
         })
 
+    @action(detail=False, methods=["get"], url_path="external-pool")
+    def external_pool(self, request):
+        """Connection pool metrics for the external DB connector (admin only)."""
+        if request.user.role != 'admin' and not request.user.is_superuser:
+            return Response({"detail": "Only admins can view pool metrics"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({
+            "enabled": is_external_db_enabled(),
+            "pool": external_pool_stats(),
+        })
+
     @action(detail=False, methods=["post"], url_path="push-results")
     def push_results(self, request):
         """Create/update local assessment results and optionally push to external DB.
 
+        The external write is queued in the outbox and sent by the
+        flush_external_outbox worker, so "externalPushed" is always false.
+
         Body JSON:
         - clientReference or clientId (one required)
         - status (optional; defaults to 'submitted')
@@ -158,29 +311,143 @@ class KycDocumentViewSet(viewsets.ModelViewSet):
         if not client_obj:
             return Response({"detail": "Client not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Create an assessment locally
-        assessment = Assessment.objects.create(
-            client=client_obj,
-            submitted_by=request.user,
-            status=status_val,
-            risk_level=risk_level,
-        )
+        # Create the assessment and queue its external push in one transaction
+        with transaction.atomic():
+            assessment = Assessment.objects.create(
+                client=client_obj,
+                submitted_by=request.user,
+                status=status_val,
+                risk_level=risk_level,
+            )
 
-        external_ok = False
-        if is_external_db_enabled():
-            payload = {
-                "client_reference": client_obj.reference,
-                "client_id": client_obj.id,
-                "status": assessment.status,
-                "risk_level": assessment.risk_level,
-                "submitted_at": assessment.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            # Merge any extra fields provided by caller
-            payload.update({k: v for k, v in extra_data.items()})
-            external_ok = push_results_to_external(external_table, payload)
+            message = None
+            if is_external_db_enabled():
+                payload = {
+                    "client_reference": client_obj.reference,
+                    "client_id": client_obj.id,
+                    "status": assessment.status,
+                    "risk_level": assessment.risk_level,
+                    "submitted_at": assessment.submitted_at.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                # Merge any extra fields provided by caller
+                payload.update({k: v for k, v in extra_data.items()})
+                message, _ = enqueue_external_result(payload, f"assessment-{assessment.id}", external_table)
 
         return Response({
             "ok": True,
             "assessmentId": assessment.id,
-            "externalPushed": external_ok,
+            "externalPushed": False,
+            "queued": message is not None,
+            "outboxId": message.id if message else None,
         }, status=status.HTTP_201_CREATED)
+
+
+class KycUploadViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Resumable, chunked KYC document uploads.
+
+    1. POST ``{client, filename, size, sha256?}`` opens a session.
+    2. PUT the file in order, one chunk per request, as the raw request body
+       with its position in an ``Upload-Offset`` header (or ``?offset=``).
+       After a dropped connection, GET the session (or read the 409 reply of
+       a misplaced chunk) for the offset to resume from. A 409 with
+       ``Retry-After`` means an earlier attempt at that offset is still
+       being written.
+    3. POST ``commit/`` checks the size and SHA-256 and creates the KycDocument.
+
+    DELETE abandons a session; stale ones are removed by sweep_kyc_uploads.
+    """
+    queryset = KycUploadSession.objects.all()
+    serializer_class = KycUploadSessionSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        client = data['client']
+        user = request.user
+
+        # Regular users can only upload for clients in their distribution channel
+        if user.role not in ['admin', 'compliance']:
+            if not user.distribution_channel or client.distributionChannel != user.distribution_channel:
+                raise ValidationError({'client': 'Client does not belong to your distribution channel'})
+
+        try:
+            session = open_session(client, user, data['filename'], data['size'], data.get('expected_sha256', ''))
+        except UploadError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED,
+                        headers={'Upload-Offset': '0'})
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        response['Upload-Offset'] = str(response.data['offset'])
+        return response
+
+    def update(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset')))
+        except (TypeError, ValueError):
+            return Response({'detail': 'Send the chunk position in the Upload-Offset header.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            length = None
+
+        # Read the raw body directly so it is streamed to disk, never parsed
+        stream = request.stream or io.BytesIO()
+        try:
+            received = write_chunk(session, offset, stream, length)
+        except OffsetMismatch as exc:
+            headers = {'Upload-Offset': str(exc.expected)}
+            if isinstance(exc, ChunkInProgress):
+                headers['Retry-After'] = '1'
+            return Response({'detail': str(exc), 'offset': exc.expected}, status=status.HTTP_409_CONFLICT,
+                            headers=headers)
+        except UploadError as exc:
+            return Response({'detail': str(exc), 'offset': session.received}, status=status.HTTP_400_BAD_REQUEST,
+                            headers={'Upload-Offset': str(session.received)})
+        return Response({
+            'offset': received,
+            'size': session.size,
+            'complete': received == session.size,
+        }, headers={'Upload-Offset': str(received)})
+
+    def destroy(self, request, *args, **kwargs):
+        session = self.get_object()
+        if session.status == 'committed':
+            return Response({'detail': 'Upload already committed'}, status=status.HTTP_409_CONFLICT)
+        abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        session = self.get_object()
+        try:
+            document = commit_session(session)
+        except UploadError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(KycDocumentSerializer(document, context=self.get_serializer_context()).data,
+                        status=status.HTTP_201_CREATED)
+
+
+@require_safe
+def signed_document_download(request, token):
+    """Serve a KycDocument through a link from ``KycDocumentViewSet.signed_url``.
+
+    Access was checked when the link was signed; the token names the
+    document and expires after KYC_SIGNED_URL_TTL seconds.
+    """
+    pk = unsign_document(token)
+    document = KycDocument.objects.filter(pk=pk).first() if pk is not None else None
+    if document is None:
+        raise Http404("Link expired or invalid")
+    as_attachment = request.GET.get("download", "").lower() in ("1", "true", "yes")
+    response = serve_document(request, document, as_attachment=as_attachment)
+    if response is None:
+        raise Http404("File not found")
+    return response
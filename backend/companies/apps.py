@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class CompaniesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "companies"
\ No newline at end of file
+    name = "companies"
+
+    def ready(self):
+        # Invalidate the middleware's channel cache on membership/channel changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import DistributionChannel, DistributionChannelMembership
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Per-process cache of (user_id or None, channel_id) -> (channel, error).
+# ``None`` as user_id is used for superusers, who skip the membership check.
+# Changes made in this process invalidate entries through the signals in
+# companies/signals.py; other worker processes pick them up after the TTL.
+channel_cache = TTLCache(
+    maxsize=getattr(settings, 'CHANNEL_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'CHANNEL_CACHE_TTL', 30),
+)
+
+INVALID_CHANNEL = 'invalid'
+NOT_A_MEMBER = 'not_member'
+
+
+def resolve_channel(user, channel_id):
+    """Return ``(channel, error)`` for ``user`` asking to work in ``channel_id``.
+
+    ``error`` is None on success, INVALID_CHANNEL when the channel does not
+    exist or is inactive, or NOT_A_MEMBER when a non-superuser has no active
+    membership. Results are cached per process, refusals included.
+    """
+    user_id = None if user.is_superuser else user.pk
+    key = (user_id, channel_id)
+    result = channel_cache.get(key)
+    if result is not None:
+        return result
+
+    if user_id is not None:
+        membership = (
+            DistributionChannelMembership.objects
+            .filter(user_id=user_id, channel_id=channel_id, is_active=True, channel__is_active=True)
+            .select_related('channel')
+            .first()
+        )
+        if membership:
+            result = (membership.channel, None)
+    if result is None:
+        channel = DistributionChannel.objects.filter(id=channel_id, is_active=True).first()
+        if channel is None:
+            result = (None, INVALID_CHANNEL)
+        elif user_id is None:
+            result = (channel, None)
+        else:
+            result = (None, NOT_A_MEMBER)
+    channel_cache.set(key, result)
+    return result
@@ -1,5 +1,5 @@
 from django.http import JsonResponse
-from .models import DistributionChannel, DistributionChannelMembership
+from .channel_cache import resolve_channel, INVALID_CHANNEL
 
 
 class DistributionChannelContextMiddleware:
@@ -8,6 +8,10 @@ class DistributionChannelContextMiddleware:
     Rules:
     - Superusers: optional channel context; access not restricted.
     - Non-superusers: must provide a valid channel the user belongs to; otherwise 403.
+
+    Channel/membership lookups go through a per-process cache (see
+    companies/channel_cache.py), and the session is only written when the
+    active channel changes.
     """
 
     def __init__(self, get_response):
@@ -26,22 +30,34 @@ class DistributionChannelContextMiddleware:
 
         if user.is_superuser:
             if channel_id:
-                request.distribution_channel = DistributionChannel.objects.filter(id=channel_id, is_active=True).first()
+                channel_id = self.parse_channel_id(channel_id)
+                if channel_id is not None:
+                    request.distribution_channel, _ = resolve_channel(user, channel_id)
             return self.get_response(request)
 
         # For non-superusers, channel is mandatory and must be one the user belongs to
         if not channel_id:
             return JsonResponse({'detail': 'Distribution channel context required'}, status=403)
 
-        channel = DistributionChannel.objects.filter(id=channel_id, is_active=True).first()
-        if not channel:
+        channel_id = self.parse_channel_id(channel_id)
+        if channel_id is None:
             return JsonResponse({'detail': 'Invalid distribution channel'}, status=403)
 
-        is_member = DistributionChannelMembership.objects.filter(user=user, channel=channel, is_active=True).exists()
-        if not is_member:
+        channel, error = resolve_channel(user, channel_id)
+        if error == INVALID_CHANNEL:
+            return JsonResponse({'detail': 'Invalid distribution channel'}, status=403)
+        if error:
             return JsonResponse({'detail': 'Not authorized for this distribution channel'}, status=403)
 
         request.distribution_channel = channel
-        request.session['active_channel_id'] = channel.id
+        if request.session.get('active_channel_id') != channel.id:
+            request.session['active_channel_id'] = channel.id
+
+        return self.get_response(request)
 
-        return self.get_response(request)
\ No newline at end of file
+    @staticmethod
+    def parse_channel_id(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .channel_cache import channel_cache
+from .models import DistributionChannel, DistributionChannelMembership
+
+
+@receiver(post_save, sender=DistributionChannelMembership)
+@receiver(post_delete, sender=DistributionChannelMembership)
+def forget_membership(sender, instance, **kwargs):
+    channel_cache.pop((instance.user_id, instance.channel_id))
+
+
+@receiver(post_save, sender=DistributionChannel)
+@receiver(post_delete, sender=DistributionChannel)
+def forget_channel(sender, instance, **kwargs):
+    # Channel edits are rare; drop everything rather than scanning for the id
+    channel_cache.clear()
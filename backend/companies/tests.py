@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from users.models import CustomUser
+
+from .channel_cache import channel_cache
+from .models import DistributionChannel, DistributionChannelMembership
+
+
+class ChannelContextTests(TestCase):
+    def setUp(self):
+        channel_cache.clear()
+        self.addCleanup(channel_cache.clear)
+        self.user = CustomUser.objects.create_user(username="agent", password="pw", role="user", is_approved=True)
+        self.channel = DistributionChannel.objects.create(name="Port Louis", code="PL", channel_type="branch")
+        self.membership = DistributionChannelMembership.objects.create(user=self.user, channel=self.channel)
+        self.client.force_login(self.user)
+
+    def get(self):
+        # A plain Django view behind the middleware; 400 means the channel check passed
+        return self.client.get("/api/reports/monthly/", HTTP_X_CHANNEL_ID=str(self.channel.pk))
+
+    def channel_queries(self):
+        tables = (DistributionChannel._meta.db_table, DistributionChannelMembership._meta.db_table)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        return response, [q["sql"] for q in queries if any(table in q["sql"] for table in tables)]
+
+    def test_membership_is_served_from_the_cache(self):
+        response, queries = self.channel_queries()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.channel_queries()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(queries, [])
+
+    def test_membership_changes_invalidate_the_cache(self):
+        self.assertEqual(self.get().status_code, 400)
+
+        self.membership.is_active = False
+        self.membership.save()
+        self.assertEqual(self.get().status_code, 403)
+
+        self.membership.is_active = True
+        self.membership.save()
+        self.assertEqual(self.get().status_code, 400)
+
+        self.membership.delete()
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_deactivated_channel_is_refused(self):
+        self.assertEqual(self.get().status_code, 400)
+
+        self.channel.is_active = False
+        self.channel.save()
+
+        response = self.get()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "Invalid distribution channel")
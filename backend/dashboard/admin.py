@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import AssessmentRollup, ChannelCounter
+
+
+@admin.register(ChannelCounter)
+class ChannelCounterAdmin(admin.ModelAdmin):
+    list_display = ('distribution_channel', 'total_clients', 'pending_assessments', 'high_risk', 'medium_risk', 'low_risk', 'updated_at')
+
+
+@admin.register(AssessmentRollup)
+class AssessmentRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'distribution_channel', 'status', 'risk_level', 'count', 'score_sum')
+    list_filter = ('distribution_channel', 'status', 'risk_level')
+    date_hierarchy = 'day'
@@ -0,0 +1,197 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncYear
+from django.utils import timezone
+
+from .models import AssessmentRollup, ChannelCounter
+
+COUNTER_FIELDS = ('total_clients', 'pending_assessments', 'high_risk', 'medium_risk', 'low_risk')
+RISK_FIELDS = {'high': 'high_risk', 'medium': 'medium_risk', 'low': 'low_risk'}
+# "Recent" covers today and the previous 29 local calendar days
+RECENT_DAYS = 30
+ROLLUP_PERIODS = {'month': (TruncMonth, '%Y-%m'), 'year': (TruncYear, '%Y')}
+
+
+def assessment_fields(status, risk_level):
+    """Return the ChannelCounter fields an assessment in this state counts towards."""
+    fields = []
+    if status == 'pending':
+        fields.append('pending_assessments')
+    if risk_level in RISK_FIELDS:
+        fields.append(RISK_FIELDS[risk_level])
+    return fields
+
+
+def local_day(dt):
+    return timezone.localdate(dt) if dt else None
+
+
+def rollup_key(channel, status, risk_level, submitted_at):
+    return (local_day(submitted_at), channel or '', status, risk_level or '')
+
+
+class CounterDelta:
+    """Accumulates counter changes so that each affected row is updated once."""
+
+    def __init__(self):
+        self.channels = defaultdict(Counter)
+        self.rollups = defaultdict(Counter)
+
+    def add_client(self, channel, sign=1):
+        self.channels[channel or '']['total_clients'] += sign
+
+    def add_assessment(self, channel, status, risk_level, submitted_at, total_score, sign=1):
+        channel = channel or ''
+        for field in assessment_fields(status, risk_level):
+            self.channels[channel][field] += sign
+        if submitted_at:
+            rollup = self.rollups[rollup_key(channel, status, risk_level, submitted_at)]
+            rollup['count'] += sign
+            rollup['score_sum'] += sign * (total_score or 0)
+
+    def apply(self):
+        now = timezone.now()
+        for channel, deltas in self.channels.items():
+            updates = {f: F(f) + n for f, n in deltas.items() if n}
+            if not updates:
+                continue
+            updates['updated_at'] = now
+            qs = ChannelCounter.objects.filter(distribution_channel=channel)
+            if not qs.update(**updates):
+                ChannelCounter.objects.get_or_create(distribution_channel=channel)
+                qs.update(**updates)
+        for (day, channel, status, risk_level), deltas in self.rollups.items():
+            updates = {f: F(f) + n for f, n in deltas.items() if n}
+            if not updates:
+                continue
+            key = {'day': day, 'distribution_channel': channel, 'status': status, 'risk_level': risk_level}
+            qs = AssessmentRollup.objects.filter(**key)
+            if not qs.update(**updates):
+                AssessmentRollup.objects.get_or_create(**key)
+                qs.update(**updates)
+
+
+def get_stats(channels=None):
+    """Read dashboard figures from the counter tables.
+
+    ``channels`` restricts the result to the given distribution channels;
+    ``None`` means every channel (admin/compliance view).
+    """
+    counters = ChannelCounter.objects.all()
+    days = AssessmentRollup.objects.filter(day__gte=timezone.localdate() - timedelta(days=RECENT_DAYS - 1))
+    if channels is not None:
+        counters = counters.filter(distribution_channel__in=channels)
+        days = days.filter(distribution_channel__in=channels)
+
+    totals = counters.aggregate(**{f: Sum(f) for f in COUNTER_FIELDS})
+    recent = days.aggregate(n=Sum('count'))['n']
+    return {
+        'totalClients': totals['total_clients'] or 0,
+        'pendingApprovals': totals['pending_assessments'] or 0,
+        'highRisk': totals['high_risk'] or 0,
+        'mediumRisk': totals['medium_risk'] or 0,
+        'lowRisk': totals['low_risk'] or 0,
+        'recentAssessments': recent or 0,
+    }
+
+
+def period_counts(start_day, end_day, period='month', channels=None):
+    """Assessments submitted per month or year between two local dates, inclusive.
+
+    Read from the daily rollups, so the cost depends on the number of days in
+    range rather than the number of assessments. Returns ``{'2025-01': n}``
+    (or ``{'2025': n}``) in chronological order, omitting empty periods.
+    """
+    trunc, key_format = ROLLUP_PERIODS[period]
+    rows = AssessmentRollup.objects.filter(day__gte=start_day, day__lte=end_day)
+    if channels is not None:
+        rows = rows.filter(distribution_channel__in=channels)
+    rows = (
+        rows.annotate(period=trunc('day'))
+        .values('period')
+        .annotate(n=Sum('count'))
+        .filter(n__gt=0)
+        .order_by('period')
+    )
+    return {row['period'].strftime(key_format): row['n'] for row in rows}
+
+
+def compute_live_counters():
+    """Aggregate the counter values straight from Client and Assessment.
+
+    Returns ``(channels, rollups)`` where ``channels`` maps channel -> {field: n}
+    and ``rollups`` maps (day, channel, status, risk_level) -> (count, score_sum),
+    both without zero entries.
+    """
+    from clients.models import Client
+    from assessments.models import Assessment
+
+    delta = CounterDelta()
+    for row in Client.objects.values('distributionChannel').annotate(n=Count('id')).order_by():
+        delta.channels[row['distributionChannel'] or '']['total_clients'] += row['n']
+
+    rows = (
+        Assessment.objects.values('client__distributionChannel', 'status', 'risk_level')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        for field in assessment_fields(row['status'], row['risk_level']):
+            delta.channels[row['client__distributionChannel'] or ''][field] += row['n']
+
+    # Grouped by local day in the database. Without time zone definitions
+    # MySQL's CONVERT_TZ yields NULL rather than an error, so a NULL day (only
+    # submitted assessments are read) means the days must be computed here.
+    tz = timezone.get_current_timezone()
+    rows = list(
+        Assessment.objects.filter(submitted_at__isnull=False)
+        .annotate(day=TruncDate('submitted_at', tzinfo=tz))
+        .values('day', 'client__distributionChannel', 'status', 'risk_level')
+        .annotate(n=Count('id'), score=Sum('total_score'))
+        .order_by()
+    )
+    if all(row['day'] is not None for row in rows):
+        for row in rows:
+            rollup = delta.rollups[(row['day'], row['client__distributionChannel'] or '', row['status'], row['risk_level'] or '')]
+            rollup['count'] += row['n']
+            rollup['score_sum'] += row['score'] or 0
+    else:
+        # One streamed pass, keyed exactly like the signal handlers
+        rows = (
+            Assessment.objects.filter(submitted_at__isnull=False)
+            .values_list('client__distributionChannel', 'status', 'risk_level', 'submitted_at', 'total_score')
+        )
+        for channel, status, risk_level, submitted_at, total_score in rows.iterator(chunk_size=2000):
+            rollup = delta.rollups[rollup_key(channel, status, risk_level, submitted_at)]
+            rollup['count'] += 1
+            rollup['score_sum'] += total_score or 0
+
+    channels = {
+        channel: {f: counts.get(f, 0) for f in COUNTER_FIELDS}
+        for channel, counts in delta.channels.items()
+        if any(counts.values())
+    }
+    rollups = {
+        key: (counts['count'], counts['score_sum'])
+        for key, counts in delta.rollups.items()
+        if counts['count'] or counts['score_sum']
+    }
+    return channels, rollups
+
+
+def stored_counters():
+    """Return the counter tables in the same shape as ``compute_live_counters``."""
+    channels = {
+        row['distribution_channel']: {f: row[f] for f in COUNTER_FIELDS}
+        for row in ChannelCounter.objects.values('distribution_channel', *COUNTER_FIELDS)
+        if any(row[f] for f in COUNTER_FIELDS)
+    }
+    rows = AssessmentRollup.objects.values_list('day', 'distribution_channel', 'status', 'risk_level', 'count', 'score_sum')
+    rollups = {
+        (day, channel, status, risk_level): (n, score_sum)
+        for day, channel, status, risk_level, n, score_sum in rows
+        if n or score_sum
+    }
+    return channels, rollups
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard.counters import COUNTER_FIELDS, compute_live_counters, stored_counters
+from dashboard.models import AssessmentRollup, ChannelCounter
+
+
+class Command(BaseCommand):
+    help = "Rebuild the dashboard counter tables from Client/Assessment rows and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only compare the stored counters with live aggregates; do not rewrite them.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                channels, rollups = compute_live_counters()
+                ChannelCounter.objects.all().delete()
+                AssessmentRollup.objects.all().delete()
+                ChannelCounter.objects.bulk_create(
+                    ChannelCounter(distribution_channel=channel, **counts)
+                    for channel, counts in channels.items()
+                )
+                AssessmentRollup.objects.bulk_create(
+                    (AssessmentRollup(day=day, distribution_channel=channel, status=status, risk_level=risk_level,
+                                      count=n, score_sum=score_sum)
+                     for (day, channel, status, risk_level), (n, score_sum) in rollups.items()),
+                    batch_size=1000,
+                )
+            self.stdout.write(f"Rebuilt counters for {len(channels)} channel(s) and {len(rollups)} rollup row(s).")
+
+        mismatches = self.compare(stored_counters(), compute_live_counters())
+        for line in mismatches:
+            self.stdout.write(line)
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} counter mismatch(es) found.")
+        self.stdout.write(self.style.SUCCESS("Dashboard counters match live aggregates."))
+
+    @staticmethod
+    def compare(stored, live):
+        stored_channels, stored_rollups = stored
+        live_channels, live_rollups = live
+        mismatches = []
+        empty = dict.fromkeys(COUNTER_FIELDS, 0)
+        for channel in sorted(set(stored_channels) | set(live_channels)):
+            have = stored_channels.get(channel, empty)
+            want = live_channels.get(channel, empty)
+            for field in COUNTER_FIELDS:
+                if have[field] != want[field]:
+                    mismatches.append(f"{channel or '(none)'} {field}: stored={have[field]} live={want[field]}")
+        for key in sorted(set(stored_rollups) | set(live_rollups)):
+            have = stored_rollups.get(key, (0, 0))
+            want = live_rollups.get(key, (0, 0))
+            if have != want:
+                day, channel, status, risk_level = key
+                mismatches.append(
+                    f"{day} {channel or '(none)'} {status}/{risk_level or '-'} (count, score_sum): "
+                    f"stored={have} live={want}"
+                )
+        return mismatches
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:17
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+RISK_FIELDS = {'high': 'high_risk', 'medium': 'medium_risk', 'low': 'low_risk'}
+
+
+def seed_counters(apps, schema_editor):
+    """Populate the counters from existing rows (same rules as dashboard.counters)."""
+    Client = apps.get_model('clients', 'Client')
+    Assessment = apps.get_model('assessments', 'Assessment')
+    ChannelCounter = apps.get_model('dashboard', 'ChannelCounter')
+    DailyAssessmentCounter = apps.get_model('dashboard', 'DailyAssessmentCounter')
+
+    channels = {}
+    days = Counter()
+    for channel in Client.objects.values_list('distributionChannel', flat=True).iterator():
+        channels.setdefault(channel or '', Counter())['total_clients'] += 1
+    rows = Assessment.objects.values_list('client__distributionChannel', 'status', 'risk_level', 'submitted_at')
+    for channel, status, risk_level, submitted_at in rows.iterator():
+        counts = channels.setdefault(channel or '', Counter())
+        if status == 'pending':
+            counts['pending_assessments'] += 1
+        if risk_level in RISK_FIELDS:
+            counts[RISK_FIELDS[risk_level]] += 1
+        if submitted_at:
+            days[(channel or '', timezone.localdate(submitted_at))] += 1
+
+    ChannelCounter.objects.bulk_create(
+        ChannelCounter(distribution_channel=channel, **counts) for channel, counts in channels.items()
+    )
+    DailyAssessmentCounter.objects.bulk_create(
+        (DailyAssessmentCounter(distribution_channel=channel, day=day, count=n) for (channel, day), n in days.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assessments', '0002_assessment_total_score'),
+        ('clients', '0007_rename_distributionchannel_old_client_distributionchannel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distribution_channel', models.CharField(max_length=20, unique=True)),
+                ('total_clients', models.IntegerField(default=0)),
+                ('pending_assessments', models.IntegerField(default=0)),
+                ('high_risk', models.IntegerField(default=0)),
+                ('medium_risk', models.IntegerField(default=0)),
+                ('low_risk', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyAssessmentCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distribution_channel', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('distribution_channel', 'day')},
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:38
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_rollups(apps, schema_editor):
+    """Populate the rollups from existing assessments (same rules as dashboard.counters)."""
+    Assessment = apps.get_model('assessments', 'Assessment')
+    AssessmentRollup = apps.get_model('dashboard', 'AssessmentRollup')
+
+    counts, scores = Counter(), Counter()
+    rows = Assessment.objects.values_list('client__distributionChannel', 'status', 'risk_level', 'submitted_at', 'total_score')
+    for channel, status, risk_level, submitted_at, total_score in rows.iterator():
+        if submitted_at:
+            key = (timezone.localdate(submitted_at), channel or '', status, risk_level or '')
+            counts[key] += 1
+            scores[key] += total_score or 0
+
+    AssessmentRollup.objects.bulk_create(
+        (AssessmentRollup(day=day, distribution_channel=channel, status=status, risk_level=risk_level,
+                          count=n, score_sum=scores[(day, channel, status, risk_level)])
+         for (day, channel, status, risk_level), n in counts.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('assessments', '0002_assessment_total_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssessmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('distribution_channel', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=10)),
+                ('risk_level', models.CharField(blank=True, max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('day', 'distribution_channel', 'status', 'risk_level')},
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='DailyAssessmentCounter',
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class ChannelCounter(models.Model):
+    """Running totals per client distribution channel, read by the dashboard.
+
+    Maintained by the Client/Assessment signal handlers in ``dashboard.signals``;
+    ``manage.py rebuild_dashboard_counters`` recomputes them from scratch.
+    """
+    distribution_channel = models.CharField(max_length=20, unique=True)
+    total_clients = models.IntegerField(default=0)
+    pending_assessments = models.IntegerField(default=0)
+    high_risk = models.IntegerField(default=0)
+    medium_risk = models.IntegerField(default=0)
+    low_risk = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Counters for {self.distribution_channel or '(none)'}"
+
+
+class AssessmentRollup(models.Model):
+    """Assessments per local submission day, distribution channel, status and risk level.
+
+    Maintained with ChannelCounter by ``dashboard.signals``; read by the
+    dashboard's recent-activity figure and the monthly/yearly report
+    summaries. Days are local to TIME_ZONE when the row is written, so
+    rebuild the counters after changing it. ``risk_level`` is blank for
+    unscored assessments.
+    """
+    day = models.DateField()
+    distribution_channel = models.CharField(max_length=20)
+    status = models.CharField(max_length=10)
+    risk_level = models.CharField(max_length=10, blank=True)
+    count = models.IntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'distribution_channel', 'status', 'risk_level')
+
+    def __str__(self):
+        return f"{self.day} {self.distribution_channel or '(none)'} {self.status}/{self.risk_level or '-'}: {self.count}"
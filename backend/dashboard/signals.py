@@ -0,0 +1,152 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from assessments.models import Assessment
+from assessments.signals import assessments_bulk_updated
+from clients.models import Client
+from clients.signals import clients_bulk_created, clients_bulk_updated
+from .counters import CounterDelta
+
+# Fields whose previous values are remembered on load so that a save can
+# move an assessment between counters without re-reading the row.
+ASSESSMENT_FIELDS = ('client_id', 'status', 'risk_level', 'submitted_at', 'total_score')
+
+
+def _assessment_state(instance):
+    values = instance.__dict__
+    # Deferred fields are missing from __dict__; reading them would cost a query
+    if any(f not in values for f in ASSESSMENT_FIELDS):
+        return None
+    return tuple(values[f] for f in ASSESSMENT_FIELDS)
+
+
+def _stored_assessment_state(pk):
+    return Assessment.objects.filter(pk=pk).values_list(*ASSESSMENT_FIELDS).first()
+
+
+def _client_channel(instance, client_id):
+    if Assessment.client.is_cached(instance) and instance.client.pk == client_id:
+        return instance.client.distributionChannel
+    return Client.objects.filter(pk=client_id).values_list('distributionChannel', flat=True).first()
+
+
+def _add_assessment(delta, instance, state, sign):
+    client_id, status, risk_level, submitted_at, total_score = state
+    delta.add_assessment(_client_channel(instance, client_id), status, risk_level, submitted_at, total_score, sign)
+
+
+@receiver(post_init, sender=Assessment)
+def remember_assessment_state(sender, instance, **kwargs):
+    instance._dashboard_state = _assessment_state(instance)
+
+
+@receiver(pre_save, sender=Assessment)
+def load_assessment_state(sender, instance, raw=False, **kwargs):
+    # Instances loaded with deferred fields have no snapshot; read it now
+    if raw or instance._state.adding or instance._dashboard_state is not None:
+        return
+    instance._dashboard_state = _stored_assessment_state(instance.pk)
+
+
+@receiver(post_save, sender=Assessment)
+def count_assessment_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = None if created else instance._dashboard_state
+    new_state = _assessment_state(instance) or _stored_assessment_state(instance.pk)
+    if old_state != new_state:
+        delta = CounterDelta()
+        if old_state:
+            _add_assessment(delta, instance, old_state, -1)
+        if new_state:
+            _add_assessment(delta, instance, new_state, 1)
+        delta.apply()
+    instance._dashboard_state = new_state
+
+
+@receiver(post_delete, sender=Assessment)
+def count_assessment_delete(sender, instance, **kwargs):
+    if instance._dashboard_state is None:
+        return
+    delta = CounterDelta()
+    _add_assessment(delta, instance, instance._dashboard_state, -1)
+    delta.apply()
+
+
+@receiver(assessments_bulk_updated, sender=Assessment)
+def count_assessments_bulk_updated(sender, instances, **kwargs):
+    delta = CounterDelta()
+    for instance in instances:
+        old_state, new_state = instance._dashboard_state, _assessment_state(instance)
+        if old_state == new_state:
+            continue
+        if old_state:
+            _add_assessment(delta, instance, old_state, -1)
+        if new_state:
+            _add_assessment(delta, instance, new_state, 1)
+        instance._dashboard_state = new_state
+    delta.apply()
+
+
+@receiver(post_init, sender=Client)
+def remember_client_channel(sender, instance, **kwargs):
+    instance._dashboard_channel = instance.__dict__.get('distributionChannel')
+
+
+def _add_client_move(delta, instance):
+    """Move a client, and all of its assessments, to its new channel."""
+    old_channel, channel = instance._dashboard_channel, instance.distributionChannel
+    delta.add_client(old_channel, -1)
+    delta.add_client(channel)
+    rows = Assessment.objects.filter(client=instance).values_list('status', 'risk_level', 'submitted_at', 'total_score')
+    for status, risk_level, submitted_at, total_score in rows:
+        delta.add_assessment(old_channel, status, risk_level, submitted_at, total_score, -1)
+        delta.add_assessment(channel, status, risk_level, submitted_at, total_score)
+
+
+def _channel_moved(instance):
+    return instance._dashboard_channel is not None and instance._dashboard_channel != instance.distributionChannel
+
+
+@receiver(post_save, sender=Client)
+def count_client_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        delta = CounterDelta()
+        delta.add_client(instance.distributionChannel)
+        delta.apply()
+    elif _channel_moved(instance):
+        delta = CounterDelta()
+        _add_client_move(delta, instance)
+        delta.apply()
+    instance._dashboard_channel = instance.distributionChannel
+
+
+@receiver(clients_bulk_created, sender=Client)
+def count_clients_bulk_created(sender, instances, **kwargs):
+    delta = CounterDelta()
+    for instance in instances:
+        delta.add_client(instance.distributionChannel)
+        instance._dashboard_channel = instance.distributionChannel
+    delta.apply()
+
+
+@receiver(clients_bulk_updated, sender=Client)
+def count_clients_bulk_updated(sender, instances, **kwargs):
+    delta = CounterDelta()
+    for instance in instances:
+        if _channel_moved(instance):
+            _add_client_move(delta, instance)
+        instance._dashboard_channel = instance.distributionChannel
+    delta.apply()
+
+
+@receiver(post_delete, sender=Client)
+def count_client_delete(sender, instance, **kwargs):
+    channel = instance._dashboard_channel
+    if channel is None:
+        channel = instance.distributionChannel
+    delta = CounterDelta()
+    delta.add_client(channel, -1)
+    delta.apply()
@@ -0,0 +1,128 @@
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import DateField, Value
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from answers.models import AssessmentAnswer
+from assessments.models import Assessment
+from assessments.scoring import rescore_assessments
+from categories.models import Category
+from clients.models import Client
+from questions.models import Option, Question
+from users.models import CustomUser
+
+from .counters import compute_live_counters, stored_counters
+from .models import AssessmentRollup, ChannelCounter
+
+
+class CounterConsistencyTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        self.agent_client = Client.objects.create(fullName="Ada", distributionChannel="Agent")
+        self.branch_client = Client.objects.create(fullName="Bob", distributionChannel="Branch")
+
+    def assertCountersMatch(self):
+        self.assertEqual(stored_counters(), compute_live_counters())
+        call_command("rebuild_dashboard_counters", "--check", stdout=StringIO())
+
+    def test_status_score_and_channel_changes(self):
+        assessment = Assessment.objects.create(client=self.agent_client, submitted_by=self.admin,
+                                               status="pending", risk_level="high", total_score=80)
+        Assessment.objects.create(client=self.branch_client, submitted_by=self.admin, status="approved", risk_level="low")
+        self.assertCountersMatch()
+
+        assessment.status = "approved"
+        assessment.save()
+        self.assertCountersMatch()
+
+        # Saved from a fresh instance, so the previous state comes from the database
+        reloaded = Assessment.objects.get(pk=assessment.pk)
+        reloaded.risk_level, reloaded.total_score = "medium", 50
+        reloaded.save()
+        self.assertCountersMatch()
+
+        moved = Assessment.objects.only("id").get(pk=assessment.pk)
+        moved.client = self.branch_client
+        moved.save()
+        self.assertCountersMatch()
+
+        self.branch_client.distributionChannel = "Agent"
+        self.branch_client.save()
+        self.assertCountersMatch()
+
+        self.agent_client.delete()
+        self.assertCountersMatch()
+        self.assertEqual(ChannelCounter.objects.get(distribution_channel="Agent").total_clients, 1)
+
+    def test_rescore_keeps_rollups_in_step(self):
+        question = Question.objects.create(category=Category.objects.create(name="Identity"), question_text="Cash?")
+        option = Option.objects.create(question=question, option_text="Yes", score_value=80)
+        old = timezone.make_aware(datetime(2024, 3, 5, 12))
+        assessment = Assessment.objects.create(client=self.agent_client, submitted_by=self.admin)
+        Assessment.objects.filter(pk=assessment.pk).update(submitted_at=old)
+        AssessmentAnswer.objects.create(assessment=assessment, question=question, selected_text="Yes")
+        call_command("rebuild_dashboard_counters", stdout=StringIO())
+
+        rescore_assessments()
+        self.assertCountersMatch()
+        option.score_value = 45
+        option.save()
+        rescore_assessments()
+
+        self.assertCountersMatch()
+        rollup = AssessmentRollup.objects.get(day=old.date(), count__gt=0)
+        self.assertEqual((rollup.risk_level, rollup.score_sum), ("medium", 45))
+
+    def test_check_reports_drift(self):
+        Assessment.objects.create(client=self.agent_client, submitted_by=self.admin, status="pending")
+        ChannelCounter.objects.filter(distribution_channel="Agent").update(pending_assessments=5)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_dashboard_counters", "--check", stdout=StringIO())
+        call_command("rebuild_dashboard_counters", stdout=StringIO())
+        self.assertCountersMatch()
+
+    def test_rebuild_without_database_time_zones(self):
+        old = timezone.make_aware(datetime(2024, 3, 5, 12))
+        for risk_level in ("high", "high", "low"):
+            assessment = Assessment.objects.create(client=self.agent_client, submitted_by=self.admin,
+                                                   risk_level=risk_level, total_score=10)
+        Assessment.objects.filter(pk=assessment.pk).update(submitted_at=old)
+        expected = compute_live_counters()
+
+        # What MySQL's CONVERT_TZ returns without time zone tables
+        def null_day(*args, **kwargs):
+            return Value(None, output_field=DateField())
+
+        with mock.patch("dashboard.counters.TruncDate", null_day):
+            self.assertEqual(compute_live_counters(), expected)
+            call_command("rebuild_dashboard_counters", stdout=StringIO())
+
+        self.assertEqual(stored_counters(), expected)
+        self.assertEqual(AssessmentRollup.objects.get(day=old.date()).score_sum, 10)
+        self.assertEqual(AssessmentRollup.objects.get(day=timezone.localdate()).count, 2)
+
+
+class DashboardStatsTests(TestCase):
+    def test_agent_sees_own_channel(self):
+        admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin")
+        agent = CustomUser.objects.create_user(username="agent", password="pw", role="user",
+                                               distribution_channel="Agent")
+        for name, channel, risk in (("Ada", "Agent", "high"), ("Bob", "Branch", "low")):
+            Assessment.objects.create(client=Client.objects.create(fullName=name, distributionChannel=channel),
+                                      submitted_by=admin, status="pending", risk_level=risk)
+        api = APIClient()
+        api.force_authenticate(agent)
+
+        with self.assertNumQueries(2):
+            response = api.get("/api/dashboard/stats/")
+
+        self.assertEqual(response.json(), {"totalClients": 1, "pendingApprovals": 1, "highRisk": 1,
+                                           "mediumRisk": 0, "lowRisk": 0, "recentAssessments": 1})
+        api.force_authenticate(admin)
+        self.assertEqual(api.get("/api/dashboard/stats/").json()["totalClients"], 2)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import dashboard_stats
+
+urlpatterns = [
+    path('stats/', dashboard_stats, name='dashboard_stats'),
+]
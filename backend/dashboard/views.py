@@ -0,0 +1,21 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .counters import get_stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard_stats(request):
+    """Dashboard figures read from the per-channel counter tables.
+
+    Scoping follows AssessmentViewSet.get_queryset: admin and compliance see
+    every channel, other users only their own distribution channel.
+    """
+    user = request.user
+    if user.role in ['admin', 'compliance']:
+        return Response(get_stats())
+    if user.distribution_channel:
+        return Response(get_stats([user.distribution_channel]))
+    return Response(get_stats([]))
@@ -0,0 +1,11 @@
+# Picked up by gunicorn when started from this directory
+import os
+
+from backend.metrics import clear_metrics_dir
+
+
+def on_starting(server):
+    # Counts left by the workers of a previous run would add to the new totals.
+    # Settings are not loaded yet in the master: read METRICS_DIR from the environment.
+    if os.environ.get('METRICS_DIR'):
+        clear_metrics_dir(os.environ['METRICS_DIR'])
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class QuestionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'questions'
+
+    def ready(self):
+        # Bump the questionnaire version on Question/Option/Category changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,229 @@
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from categories.models import Category
+from .models import Option, Question
+from .snapshot import bump_version, current_version, deferred_version_bump
+
+QUESTION_FIELDS = ['category_id', 'question_text', 'field_type', 'display_order']
+
+
+class PruneError(Exception):
+    """Pruning would delete questions that assessments have answered."""
+
+    def __init__(self, question_ids):
+        self.question_ids = sorted(question_ids)
+        super().__init__(
+            f"{len(self.question_ids)} question(s) missing from the document have answers and cannot be "
+            f"deleted: {', '.join(map(str, self.question_ids[:20]))}"
+        )
+
+
+def export_questionnaire():
+    """Return every category with its questions and their options as one document.
+
+    The document is the format accepted by ``import_questionnaire``; it is
+    built with one query per table.
+    """
+    options = defaultdict(list)
+    for row in Option.objects.order_by('id').values('id', 'question_id', 'option_text', 'score_value'):
+        options[row.pop('question_id')].append(row)
+
+    questions = defaultdict(list)
+    rows = Question.objects.order_by('display_order', 'id').values('id', *QUESTION_FIELDS)
+    for row in rows:
+        row['options'] = options.get(row['id'], [])
+        questions[row.pop('category_id')].append(row)
+
+    return {
+        'version': current_version(),
+        'categories': [
+            {'name': name, 'questions': questions.get(category_id, [])}
+            for category_id, name in Category.objects.order_by('id').values_list('id', 'name')
+        ],
+    }
+
+
+def diff_options(question_id, existing, wanted):
+    """Match a question's options by ``option_text`` and work out the writes needed.
+
+    ``existing`` is the question's Option rows, ``wanted`` a list of
+    ``{'option_text', 'score_value'}`` dicts. Options whose text is kept retain
+    their id. Returns ``(to_create, to_update, to_delete_ids, unchanged)``.
+    """
+    by_text = {}
+    to_delete = []
+    for option in sorted(existing, key=lambda o: o.id):
+        if option.option_text in by_text:
+            to_delete.append(option.id)
+        else:
+            by_text[option.option_text] = option
+
+    to_create, to_update, unchanged = [], [], 0
+    for item in wanted:
+        option = by_text.pop(item['option_text'], None)
+        score = item.get('score_value', 0)
+        if option is None:
+            to_create.append(Option(question_id=question_id, option_text=item['option_text'], score_value=score))
+        elif option.score_value != score:
+            option.score_value = score
+            to_update.append(option)
+        else:
+            unchanged += 1
+    to_delete.extend(o.id for o in by_text.values())
+    return to_create, to_update, to_delete, unchanged
+
+
+def sync_options(question, wanted):
+    """Make ``question``'s options match ``wanted`` with bulk writes; returns True if anything changed."""
+    to_create, to_update, to_delete, _ = diff_options(question.pk, question.options.all(), wanted)
+    with deferred_version_bump():
+        if to_delete:
+            Option.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            Option.objects.bulk_update(to_update, ['score_value'])
+        if to_create:
+            Option.objects.bulk_create(to_create)
+        changed = bool(to_create or to_update or to_delete)
+        if changed:
+            bump_version()
+    return changed
+
+
+def _create_with_pks(model, objs, key):
+    """``bulk_create`` that also fills in primary keys on backends that do not return them (MySQL)."""
+    newest = model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    model.objects.bulk_create(objs)
+    pending = defaultdict(list)
+    for obj in objs:
+        if obj.pk is None:
+            pending[key(obj)].append(obj)
+    if pending:
+        for row in model.objects.filter(id__gt=newest).order_by('id'):
+            waiting = pending.get(key(row))
+            if waiting:
+                waiting.pop(0).pk = row.pk
+
+
+def _import_categories(categories, report):
+    names = [c['name'] for c in categories]
+    ids = dict(Category.objects.filter(name__in=names).values_list('name', 'id'))
+    new = [Category(name=name) for name in names if name not in ids]
+    if new:
+        _create_with_pks(Category, new, key=lambda c: c.name)
+        ids.update((c.name, c.pk) for c in new)
+    report['categories_created'] = len(new)
+    return ids
+
+
+def _import_questions(categories, category_ids, report):
+    existing = {q.id: q for q in Question.objects.all()}
+    by_key = {}
+    for q in sorted(existing.values(), key=lambda q: -q.id):
+        by_key[(q.category_id, q.question_text)] = q
+
+    matched = set()
+    planned = []
+    to_create, to_update = [], []
+    for category in categories:
+        category_id = category_ids[category['name']]
+        for item in category['questions']:
+            values = {
+                'category_id': category_id,
+                'question_text': item['question_text'],
+                'field_type': item['field_type'],
+                'display_order': item['display_order'],
+            }
+            # Questions are matched by id, then by category and text
+            question = existing.get(item.get('id'))
+            if question is None or question.id in matched:
+                question = by_key.get((category_id, item['question_text']))
+            if question is None or question.id in matched:
+                question = Question(**values)
+                to_create.append(question)
+            else:
+                matched.add(question.id)
+                if any(getattr(question, f) != values[f] for f in QUESTION_FIELDS):
+                    for f, value in values.items():
+                        setattr(question, f, value)
+                    to_update.append(question)
+                else:
+                    report['questions_unchanged'] += 1
+            planned.append((question, item['options']))
+
+    if to_update:
+        Question.objects.bulk_update(to_update, QUESTION_FIELDS)
+    if to_create:
+        _create_with_pks(Question, to_create, key=lambda q: (q.category_id, q.question_text))
+    report['questions_created'] = len(to_create)
+    report['questions_updated'] = len(to_update)
+    return planned, matched
+
+
+def _import_options(planned, matched, report):
+    existing = defaultdict(list)
+    for option in Option.objects.filter(question_id__in=matched):
+        existing[option.question_id].append(option)
+
+    to_create, to_update, to_delete = [], [], []
+    for question, wanted in planned:
+        created, updated, deleted, unchanged = diff_options(question.pk, existing.get(question.pk, []), wanted)
+        to_create += created
+        to_update += updated
+        to_delete += deleted
+        report['options_unchanged'] += unchanged
+
+    if to_delete:
+        Option.objects.filter(id__in=to_delete).delete()
+    if to_update:
+        Option.objects.bulk_update(to_update, ['score_value'])
+    if to_create:
+        Option.objects.bulk_create(to_create)
+    report['options_created'] = len(to_create)
+    report['options_updated'] = len(to_update)
+    report['options_deleted'] = len(to_delete)
+
+
+def import_questionnaire(categories, prune=False):
+    """Create or update a whole questionnaire from the ``export_questionnaire`` format.
+
+    ``categories`` is the validated list from ``QuestionnaireSerializer``.
+    Everything is written in one transaction with bulk inserts and updates.
+    Categories are matched by name, questions by id and then by category and
+    text, and options by text within their question, so unchanged rows keep
+    their ids. A question's options are replaced by the listed ones. With
+    ``prune``, questions missing from the document are deleted; if any of
+    them has answers, PruneError is raised and nothing is written.
+
+    Returns a report with created/updated/unchanged/deleted counts, the
+    elapsed seconds and the new questionnaire version.
+    """
+    report = Counter()
+    started = time.monotonic()
+    with transaction.atomic(), deferred_version_bump():
+        category_ids = _import_categories(categories, report)
+        planned, matched = _import_questions(categories, category_ids, report)
+        _import_options(planned, matched, report)
+        if prune:
+            kept = {question.pk for question, _ in planned}
+            missing = Question.objects.exclude(id__in=kept)
+            # Deleting them would cascade into the answer history of past assessments
+            answered = set(missing.filter(answers__isnull=False).values_list('id', flat=True).distinct())
+            if answered:
+                raise PruneError(answered)
+            report['questions_deleted'] = missing.delete()[1].get('questions.Question', 0)
+        changed = any(n for k, n in report.items() if not k.endswith('_unchanged'))
+        if changed:
+            bump_version()
+
+    report = {
+        key: report[key] for key in (
+            'categories_created', 'questions_created', 'questions_updated', 'questions_unchanged',
+            'questions_deleted', 'options_created', 'options_updated', 'options_unchanged', 'options_deleted',
+        )
+    }
+    report['seconds'] = round(time.monotonic() - started, 3)
+    report['version'] = current_version()
+    return report
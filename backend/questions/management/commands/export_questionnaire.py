@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from questions.bulk import export_questionnaire
+
+
+class Command(BaseCommand):
+    help = "Write all categories, questions and options as one JSON document."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="File to write; defaults to stdout.")
+
+    def handle(self, *args, **options):
+        content = json.dumps(export_questionnaire(), indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+        else:
+            self.stdout.write(content)
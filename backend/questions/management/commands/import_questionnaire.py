@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from questions.bulk import PruneError, import_questionnaire
+from questions.serializers import QuestionnaireSerializer
+
+
+class Command(BaseCommand):
+    help = "Create or update the questionnaire from a JSON document produced by export_questionnaire."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--prune', action='store_true',
+                            help="Delete questions missing from the document; refused if any of them has answers.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        serializer = QuestionnaireSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(f"Invalid questionnaire: {json.dumps(serializer.errors)}")
+
+        try:
+            report = import_questionnaire(serializer.validated_data['categories'], prune=options['prune'])
+        except PruneError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"Categories: {report['categories_created']} created. "
+            f"Questions: {report['questions_created']} created, {report['questions_updated']} updated, "
+            f"{report['questions_unchanged']} unchanged, {report['questions_deleted']} deleted. "
+            f"Options: {report['options_created']} created, {report['options_updated']} updated, "
+            f"{report['options_unchanged']} unchanged, {report['options_deleted']} deleted. "
+            f"{report['seconds']}s, questionnaire v{report['version']}."
+        )
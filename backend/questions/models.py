@@ -23,3 +23,14 @@ class Option(models.Model):
 
     def __str__(self):
         return f"{self.option_text} ({self.score_value})"
+
+
+class QuestionnaireVersion(models.Model):
+    """Single-row counter bumped whenever a Question, Option or Category changes.
+
+    Used to key cached questionnaire snapshots and their ETags (questions/snapshot.py).
+    """
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"Questionnaire v{self.version}"
@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
+from .bulk import sync_options
 from .models import Question, Option
+from .snapshot import deferred_version_bump
 
 class OptionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,9 +18,10 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         options_data = validated_data.pop('options')
-        question = Question.objects.create(**validated_data)
-        for option_data in options_data:
-            Option.objects.create(question=question, **option_data)
+        # One version bump once the options are in too, never for a question without them
+        with transaction.atomic(), deferred_version_bump():
+            question = Question.objects.create(**validated_data)
+            Option.objects.bulk_create([Option(question=question, **option_data) for option_data in options_data])
         return question
 
     def update(self, instance, validated_data):
@@ -26,11 +30,47 @@ class QuestionSerializer(serializers.ModelSerializer):
         instance.question_text = validated_data.get('question_text', instance.question_text)
         instance.field_type = validated_data.get('field_type', instance.field_type)
         instance.display_order = validated_data.get('display_order', instance.display_order)
-        instance.save()
+        with transaction.atomic(), deferred_version_bump():
+            instance.save()
+            # Options are matched by text so unchanged ones keep their ids
+            sync_options(instance, options_data)
 
-        # Simple update for options: clear and create new
-        instance.options.all().delete()
-        for option_data in options_data:
-            Option.objects.create(question=instance, **option_data)
+        return instance
 
-        return instance
\ No newline at end of file
+
+class BulkOptionSerializer(serializers.Serializer):
+    option_text = serializers.CharField(max_length=255)
+    score_value = serializers.IntegerField(default=0)
+
+
+class BulkQuestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False, allow_null=True)
+    question_text = serializers.CharField(max_length=255)
+    field_type = serializers.ChoiceField(choices=Question.FIELD_TYPE_CHOICES, default='select')
+    display_order = serializers.IntegerField(default=0)
+    options = BulkOptionSerializer(many=True, default=list)
+
+    def validate_options(self, value):
+        texts = [o['option_text'] for o in value]
+        if len(set(texts)) != len(texts):
+            raise serializers.ValidationError('Option texts must be unique within a question.')
+        return value
+
+
+class BulkCategorySerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    questions = BulkQuestionSerializer(many=True, default=list)
+
+
+class QuestionnaireSerializer(serializers.Serializer):
+    """Validates a whole questionnaire document (questions/bulk.py) without touching the database."""
+    categories = BulkCategorySerializer(many=True)
+
+    def validate_categories(self, value):
+        names = [c['name'] for c in value]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError('Category names must be unique.')
+        ids = [q['id'] for c in value for q in c['questions'] if q.get('id') is not None]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Question ids must be unique.')
+        return value
\ No newline at end of file
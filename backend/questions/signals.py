@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from categories.models import Category
+from .models import Option, Question
+from .snapshot import bump_version
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def questionnaire_changed(sender, raw=False, **kwargs):
+    if not raw:
+        bump_version()
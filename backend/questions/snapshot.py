@@ -0,0 +1,82 @@
+import json
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
+
+from .models import QuestionnaireVersion
+
+VERSION_CACHE_KEY = 'questionnaire:version'
+SNAPSHOT_CACHE_KEY = 'questionnaire:{name}:v{version}'
+
+_deferred = threading.local()
+
+
+def current_version():
+    """Current questionnaire version, cached for QUESTIONNAIRE_VERSION_TTL seconds."""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        row, _ = QuestionnaireVersion.objects.get_or_create(pk=1)
+        version = row.version
+        cache.set(VERSION_CACHE_KEY, version, getattr(settings, 'QUESTIONNAIRE_VERSION_TTL', 5))
+    return version
+
+
+def bump_version():
+    """Invalidate every cached snapshot by moving to a new version."""
+    if getattr(_deferred, 'depth', 0):
+        _deferred.pending = True
+        return
+    if not QuestionnaireVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        QuestionnaireVersion.objects.get_or_create(pk=1, defaults={'version': 2})
+    cache.delete(VERSION_CACHE_KEY)
+    # Drop it again once committed, in case a reader re-cached the old value meanwhile
+    transaction.on_commit(lambda: cache.delete(VERSION_CACHE_KEY))
+
+
+@contextmanager
+def deferred_version_bump():
+    """Collapse the version bumps made inside the block into a single one at the end.
+
+    Used by bulk writers that would otherwise bump once per saved or deleted row.
+    """
+    _deferred.depth = getattr(_deferred, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+        pending = not _deferred.depth and getattr(_deferred, 'pending', False)
+        if pending:
+            _deferred.pending = False
+    if pending:
+        bump_version()
+
+
+def snapshot_response(request, name, build):
+    """Serve ``build()`` as JSON, cached per questionnaire version, with ETag support.
+
+    A request whose If-None-Match matches the current version gets a 304
+    without touching the database; otherwise the pre-rendered JSON for this
+    version is served from the cache, and built only on a miss.
+    """
+    version = current_version()
+    etag = f'"{name}-v{version}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        key = SNAPSHOT_CACHE_KEY.format(name=name, version=version)
+        content = cache.get(key)
+        if content is None:
+            content = json.dumps(build(), cls=DjangoJSONEncoder)
+            cache.set(key, content, getattr(settings, 'QUESTIONNAIRE_SNAPSHOT_TTL', 24 * 3600))
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # Let browsers keep the body but revalidate on every load
+    response['Cache-Control'] = 'private, no-cache'
+    return response
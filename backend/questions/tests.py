@@ -1,3 +1,125 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from answers.models import AssessmentAnswer
+from assessments.models import Assessment
+from categories.models import Category
+from clients.models import Client
+from users.models import CustomUser
+
+from . import snapshot
+from .bulk import PruneError, export_questionnaire, import_questionnaire
+from .models import Option, Question
+from .snapshot import current_version
+
+
+class QuestionWriteTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin", is_approved=True)
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.category = Category.objects.create(name="Identity")
+
+    def test_create_bumps_version_once_after_options(self):
+        seen = []
+        real_bump = snapshot.bump_version
+
+        def bump():
+            # Options must be in place by the time snapshots are invalidated
+            seen.append(Option.objects.count())
+            real_bump()
+
+        before = current_version()
+        with mock.patch.object(snapshot, "bump_version", bump):
+            response = self.api.post("/api/questions/", {
+                "category": self.category.pk, "question_text": "Country of residence?",
+                "options": [{"option_text": "Local", "score_value": 0}, {"option_text": "Abroad", "score_value": 30}],
+            }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(seen, [2])
+        self.assertEqual(current_version(), before + 1)
+
+    def test_create_is_atomic(self):
+        with mock.patch.object(Option.objects, "bulk_create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.api.post("/api/questions/", {
+                    "category": self.category.pk, "question_text": "Source of funds?",
+                    "options": [{"option_text": "Salary", "score_value": 0}],
+                }, format="json")
+        self.assertFalse(Question.objects.exists())
+
+
+class PruneTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Identity")
+        self.kept = Question.objects.create(category=category, question_text="Kept?")
+        self.dropped = Question.objects.create(category=category, question_text="Dropped?")
+        self.document = export_questionnaire()["categories"]
+        self.document[0]["questions"] = [q for q in self.document[0]["questions"] if q["id"] == self.kept.pk]
+
+    def test_prune_deletes_unanswered_questions(self):
+        report = import_questionnaire(self.document, prune=True)
+        self.assertEqual(report["questions_deleted"], 1)
+        self.assertFalse(Question.objects.filter(pk=self.dropped.pk).exists())
+
+    def test_prune_refuses_answered_questions(self):
+        user = CustomUser.objects.create_user(username="clerk", password="pw")
+        assessment = Assessment.objects.create(client=Client.objects.create(fullName="A"), submitted_by=user)
+        AssessmentAnswer.objects.create(assessment=assessment, question=self.dropped, selected_text="Yes")
+
+        with self.assertRaises(PruneError) as raised:
+            import_questionnaire(self.document, prune=True)
+        self.assertEqual(raised.exception.question_ids, [self.dropped.pk])
+        self.assertTrue(AssessmentAnswer.objects.filter(question=self.dropped).exists())
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin", is_approved=True)
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.category = Category.objects.create(name="Identity")
+        self.question = Question.objects.create(category=self.category, question_text="Country of residence?")
+        self.option = Option.objects.create(question=self.question, option_text="Local", score_value=0)
+
+    def get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.api.get(url, **headers)
+
+    def test_unchanged_questionnaire_is_not_modified(self):
+        first = self.get("/api/questions/snapshot/")
+        self.assertEqual(first.status_code, 200)
+
+        # Version and body both come from the cache
+        with self.assertNumQueries(0):
+            again = self.get("/api/questions/snapshot/")
+            not_modified = self.get("/api/questions/snapshot/", first["ETag"])
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], first["ETag"])
+
+    def test_option_write_serves_the_new_body(self):
+        before = self.get("/api/questions/")
+        self.option.option_text = "Resident"
+        self.option.save()
+
+        after = self.get("/api/questions/", before["ETag"])
+
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], before["ETag"])
+        self.assertEqual(after.json()[0]["options"][0]["option_text"], "Resident")
+
+    def test_question_write_serves_the_new_body(self):
+        before = self.get("/api/questions/snapshot/")
+        Question.objects.create(category=self.category, question_text="Source of funds?")
+
+        after = self.get("/api/questions/snapshot/", before["ETag"])
 
-# Create your tests here.
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()["version"], before.json()["version"] + 1)
+        self.assertEqual(len(after.json()["questions"]), 2)
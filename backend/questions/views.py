@@ -1,7 +1,60 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from categories.models import Category
+from categories.serializers import CategorySerializer
 from .models import Question
-from .serializers import QuestionSerializer
+from .bulk import PruneError, export_questionnaire, import_questionnaire
+from .serializers import QuestionnaireSerializer, QuestionSerializer
+from .snapshot import current_version, snapshot_response
+
+
+def serialize_questions():
+    return QuestionSerializer(Question.objects.prefetch_related('options'), many=True).data
+
+
+def serialize_categories():
+    return CategorySerializer(Category.objects.all(), many=True).data
+
 
 class QuestionViewSet(viewsets.ModelViewSet):
-    queryset = Question.objects.all()
+    queryset = Question.objects.prefetch_related('options')
     serializer_class = QuestionSerializer
+
+    def list(self, request, *args, **kwargs):
+        # Plain listing is served from the versioned snapshot cache
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return snapshot_response(request, 'questions', serialize_questions)
+
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        """Categories and questions (with options) in one versioned document."""
+        def build():
+            return {
+                'version': current_version(),
+                'categories': serialize_categories(),
+                'questions': serialize_questions(),
+            }
+        return snapshot_response(request, 'snapshot', build)
+
+    @action(detail=False, methods=['get', 'post'])
+    def bulk(self, request):
+        """Export (GET) or import (POST) the whole questionnaire as one JSON document.
+
+        POST takes the exported format and applies it in one transaction;
+        ``?prune=true`` also deletes questions missing from the document,
+        unless any of them has answers (409). Importing is admin only.
+        """
+        if request.method == 'GET':
+            return snapshot_response(request, 'export', export_questionnaire)
+        if request.user.role != 'admin' and not request.user.is_superuser:
+            return Response({'detail': 'Only admins can import questionnaires'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = QuestionnaireSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        prune = request.query_params.get('prune', '').lower() in ('1', 'true', 'yes')
+        try:
+            report = import_questionnaire(serializer.validated_data['categories'], prune=prune)
+        except PruneError as exc:
+            return Response({'detail': str(exc), 'questions': exc.question_ids}, status=status.HTTP_409_CONFLICT)
+        return Response(report)
@@ -1,3 +1,56 @@
+import csv
+import io
+import json
+from functools import partial
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from assessments.models import Assessment
+from clients.models import Client
+from users.models import CustomUser
+
+from . import views
+
+
+class ReportExportTests(TestCase):
+    def setUp(self):
+        # A superuser needs no distribution channel context for session requests
+        self.admin = CustomUser.objects.create_superuser(username="admin", password="pw", role="admin")
+        self.client.force_login(self.admin)
+        for i in range(5):
+            Assessment.objects.create(client=Client.objects.create(fullName=f"Client {i}"), submitted_by=self.admin,
+                                      status="approved", risk_level="low", total_score=i)
+        today = timezone.localdate().isoformat()
+        self.params = {"start_date": today, "end_date": today}
+        # Several chunks for five assessments
+        patcher = mock.patch.object(views, "iter_details", partial(views.iter_details, chunk_size=2))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self, export_format):
+        response = self.client.get("/api/reports/monthly/", {**self.params, "format": export_format})
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_streams_every_row_once(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv"))))
+
+        month = timezone.localdate().strftime("%Y-%m")
+        self.assertEqual(rows[:3], [["month", "count"], [month, "5"], []])
+        self.assertEqual(rows[3], views.DETAIL_COLUMNS)
+        self.assertEqual(sorted(row[0] for row in rows[4:]), sorted(Client.objects.values_list("reference", flat=True)))
+        self.assertEqual(sorted(int(row[3]) for row in rows[4:]), [0, 1, 2, 3, 4])
+
+    def test_ndjson_streams_summary_then_rows(self):
+        lines = [json.loads(line) for line in self.export("ndjson").splitlines()]
+
+        self.assertEqual(lines[0], {"summary": {timezone.localdate().strftime("%Y-%m"): 5}})
+        self.assertEqual(sorted(line["client_name"] for line in lines[1:]), [f"Client {i}" for i in range(5)])
+        self.assertEqual(set(lines[1]), set(views.DETAIL_COLUMNS))
 
-# Create your tests here.
+    def test_detail_rows_are_read_in_chunks(self):
+        with self.assertNumQueries(3):
+            details = list(views.iter_details(Assessment.objects.all()))
+        self.assertEqual(len({row["client_reference"] for row in details}), 5)
@@ -1,17 +1,93 @@
-from django.http import JsonResponse
-from django.db.models.functions import TruncMonth, TruncYear
-from django.db.models import Count
+import csv
+import json
+from django.http import JsonResponse, StreamingHttpResponse
 from assessments.models import Assessment
+from dashboard.counters import period_counts
 from datetime import datetime, date, time, timedelta
 from django.utils import timezone
 
+EXPORT_FORMATS = ('json', 'csv', 'ndjson')
+# Rows fetched per query when walking the detail rows
+DETAIL_CHUNK_SIZE = 2000
+DETAIL_COLUMNS = ['client_reference', 'client_name', 'score_level', 'total_score', 'approval_status']
+
+
+def iter_details(qs, chunk_size=DETAIL_CHUNK_SIZE):
+    """Yield report detail rows as dicts, reading ``chunk_size`` rows per query.
+
+    Uses a ``.values()`` projection and keyset paging on ``id`` rather than
+    model instances, so memory stays flat on every backend (MySQL drivers
+    buffer the whole result set even for ``.iterator()``).
+    """
+    rows = qs.values(
+        'id', 'client__reference', 'client__fullName', 'client__corporateName',
+        'risk_level', 'total_score', 'status',
+    ).order_by('id')
+    last_id = None
+    while True:
+        chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        for row in chunk:
+            yield {
+                'client_reference': row['client__reference'],
+                'client_name': row['client__fullName'] or row['client__corporateName'],
+                'score_level': row['risk_level'],
+                'total_score': row['total_score'],
+                'approval_status': row['status'],
+            }
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]['id']
+
+
+class Echo:
+    """File-like object whose write() just returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(summary, details, period_label):
+    writer = csv.writer(Echo())
+    yield writer.writerow([period_label, 'count'])
+    for key, count in summary.items():
+        yield writer.writerow([key, count])
+    yield writer.writerow([])
+    yield writer.writerow(DETAIL_COLUMNS)
+    for row in details:
+        yield writer.writerow([row[c] for c in DETAIL_COLUMNS])
+
+
+def stream_ndjson(summary, details):
+    yield json.dumps({'summary': summary}) + '\n'
+    for row in details:
+        yield json.dumps(row) + '\n'
+
+
+def report_response(export_format, summary, qs, filename, period_label):
+    """Build the report response; csv/ndjson stream the detail rows."""
+    if export_format == 'csv':
+        response = StreamingHttpResponse(stream_csv(summary, iter_details(qs), period_label), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+    if export_format == 'ndjson':
+        response = StreamingHttpResponse(stream_ndjson(summary, iter_details(qs)), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+        return response
+    return JsonResponse({'summary': summary, 'details': list(iter_details(qs))})
+
 def monthly_report(request):
     start_date_str = request.GET.get('start_date')
     end_date_str = request.GET.get('end_date')
 
+    export_format = request.GET.get('format', 'json').lower()
+
     if not start_date_str or not end_date_str:
         return JsonResponse({'error': 'start_date and end_date are required'}, status=400)
 
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'Invalid format. Use json, csv or ndjson'}, status=400)
+
     try:
         # Parse into date objects so we can build clear day boundaries
         start_d = datetime.strptime(start_date_str, '%Y-%m-%d').date()
@@ -29,6 +105,7 @@ def monthly_report(request):
     end_dt = timezone.make_aware(datetime.combine(end_next_day, time.min), tz)
 
     qs = Assessment.objects.filter(submitted_at__gte=start_dt, submitted_at__lt=end_dt)
+    channels = None
     user = getattr(request, 'user', None)
     if user and user.is_authenticated:
         # Admin and compliance can see all assessments
@@ -36,52 +113,28 @@ def monthly_report(request):
             # Regular users can only see assessments for clients from their distribution channel
             if user.distribution_channel:
                 qs = qs.filter(client__distributionChannel=user.distribution_channel)
+                channels = [user.distribution_channel]
             else:
                 return JsonResponse({'error': 'Distribution channel required'}, status=403)
 
-    # Prefer DB-side grouping; if DB lacks timezone definitions, fallback to Python grouping
-    try:
-        data = (
-            qs.annotate(month=TruncMonth('submitted_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
-
-        summary = {item['month'].strftime('%Y-%m'): item['count'] for item in data}
-    except Exception:
-        # Fallback: group in Python to avoid DB timezone conversion issues
-        counts = {}
-        for dt in qs.values_list('submitted_at', flat=True):
-            # Normalize to current timezone, then truncate to month
-            local_dt = timezone.localtime(dt, tz)
-            month_key = local_dt.strftime('%Y-%m')
-            counts[month_key] = counts.get(month_key, 0) + 1
-        # Sort keys chronologically
-        summary = {k: counts[k] for k in sorted(counts.keys())}
-
-    # Build detailed rows
-    details = []
-    for a in qs.select_related('client'):
-        client_obj = a.client
-        client_name = getattr(client_obj, 'fullName', None) or getattr(client_obj, 'corporateName', None)
-        details.append({
-            'client_reference': getattr(client_obj, 'reference', None),
-            'client_name': client_name,
-            'score_level': a.risk_level,
-            'total_score': a.total_score,
-            'approval_status': a.status,
-        })
-
-    return JsonResponse({'summary': summary, 'details': details})
+    # Summary comes from the daily rollups (local days), not from the assessment rows
+    summary = period_counts(start_d, end_d, 'month', channels)
+
+    filename = f"monthly_report_{start_d:%Y%m%d}_{end_d:%Y%m%d}"
+    return report_response(export_format, summary, qs, filename, 'month')
 
 def yearly_report(request):
     start_year_str = request.GET.get('start_year')
     end_year_str = request.GET.get('end_year')
 
+    export_format = request.GET.get('format', 'json').lower()
+
     if not start_year_str or not end_year_str:
         return JsonResponse({'error': 'start_year and end_year are required'}, status=400)
 
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': 'Invalid format. Use json, csv or ndjson'}, status=400)
+
     try:
         start_year = int(start_year_str)
         end_year = int(end_year_str)
@@ -97,6 +150,7 @@ def yearly_report(request):
     end_dt = timezone.make_aware(datetime.combine(date(end_year + 1, 1, 1), time.min), tz)
 
     qs = Assessment.objects.filter(submitted_at__gte=start_dt, submitted_at__lt=end_dt)
+    channels = None
     user = getattr(request, 'user', None)
     if user and user.is_authenticated:
         # Admin and compliance can see all assessments
@@ -104,36 +158,12 @@ def yearly_report(request):
             # Regular users can only see assessments for clients from their distribution channel
             if user.distribution_channel:
                 qs = qs.filter(client__distributionChannel=user.distribution_channel)
+                channels = [user.distribution_channel]
             else:
                 return JsonResponse({'error': 'Distribution channel required'}, status=403)
 
-    try:
-        data = (
-            qs.annotate(year=TruncYear('submitted_at'))
-            .values('year')
-            .annotate(count=Count('id'))
-            .order_by('year')
-        )
-
-        summary = {item['year'].strftime('%Y'): item['count'] for item in data}
-    except Exception:
-        counts = {}
-        for dt in qs.values_list('submitted_at', flat=True):
-            local_dt = timezone.localtime(dt, tz)
-            year_key = local_dt.strftime('%Y')
-            counts[year_key] = counts.get(year_key, 0) + 1
-        summary = {k: counts[k] for k in sorted(counts.keys())}
-
-    details = []
-    for a in qs.select_related('client'):
-        client_obj = a.client
-        client_name = getattr(client_obj, 'fullName', None) or getattr(client_obj, 'corporateName', None)
-        details.append({
-            'client_reference': getattr(client_obj, 'reference', None),
-            'client_name': client_name,
-            'score_level': a.risk_level,
-            'total_score': a.total_score,
-            'approval_status': a.status,
-        })
-
-    return JsonResponse({'summary': summary, 'details': details})
+    # Summary comes from the daily rollups (local days), not from the assessment rows
+    summary = period_counts(date(start_year, 1, 1), date(end_year, 12, 31), 'year', channels)
+
+    filename = f"yearly_report_{start_year}_{end_year}"
+    return report_response(export_format, summary, qs, filename, 'year')
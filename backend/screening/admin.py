@@ -0,0 +1,22 @@
+from django.contrib import admin
+from .models import ScreeningHit, WatchlistEntry, WatchlistVersion
+
+
+@admin.register(WatchlistVersion)
+class WatchlistVersionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'list_type', 'source_file', 'entry_count', 'is_active', 'loaded_at')
+    list_filter = ('list_type', 'is_active')
+
+
+@admin.register(WatchlistEntry)
+class WatchlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'entity_type', 'external_id', 'country', 'version')
+    list_filter = ('entity_type', 'version')
+    search_fields = ('name', 'external_id')
+
+
+@admin.register(ScreeningHit)
+class ScreeningHitAdmin(admin.ModelAdmin):
+    list_display = ('client', 'field', 'screened_name', 'matched_name', 'score', 'status', 'reviewed_by', 'updated_at')
+    list_filter = ('status', 'field')
+    raw_id_fields = ('client', 'entry', 'reviewed_by')
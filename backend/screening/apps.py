@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ScreeningConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'screening'
+
+    def ready(self):
+        # Screen clients against the loaded watchlists when they are saved
+        from . import signals  # noqa: F401
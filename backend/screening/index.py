@@ -0,0 +1,114 @@
+import re
+from array import array
+from collections import Counter, defaultdict
+
+from clients.duplicates import name_tokens, token_similarity
+
+# Names sharing fewer trigrams than this (Dice coefficient) are not scored
+MIN_TRIGRAM_SIMILARITY = 0.5
+# Score kept per word only the longer name has (a middle name)
+EXTRA_WORD_FACTOR = 0.95
+# A single word against a longer name identifies nobody ("Smith")
+SINGLE_WORD_FACTOR = 0.7
+# UBO fields hold several names: "John Smith; Jane Doe", "A. Patel and R. Patel"
+NAME_SEPARATORS_RE = re.compile(r'[;,/&\n]+|\s+and\s+|\s+et\s+', re.IGNORECASE)
+
+
+def split_names(value):
+    return [name.strip() for name in NAME_SEPARATORS_RE.split(value or '') if name.strip()]
+
+
+def trigrams(tokens):
+    """Character trigrams of each word padded with spaces; word order does not matter."""
+    grams = set()
+    for token in tokens:
+        padded = f' {token} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def name_score(a, b):
+    """Similarity of two tokenized names, in any word order.
+
+    Each word of the shorter name is matched to its best unused word of the
+    other (initials and small typos count, see ``token_similarity``). Words
+    only the longer name has lower the score gently, so "John Smith" still
+    matches "John Michael Smith", but "Smith" alone does not match "John
+    Smith".
+    """
+    short, long = sorted((a, b), key=len)
+    remaining = list(long)
+    total = 0.0
+    for token in short:
+        scores = [token_similarity(token, other) for other in remaining]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total += scores[best]
+        del remaining[best]
+    score = total / len(short) * EXTRA_WORD_FACTOR ** (len(long) - len(short))
+    return score * SINGLE_WORD_FACTOR if len(short) == 1 < len(long) else score
+
+
+class WatchlistIndex:
+    """Trigram inverted index over the normalized names of watchlist entries.
+
+    Built from ``(entry_id, names)`` pairs, each name (primary name and
+    aliases) indexed separately. A search counts, from the posting lists of
+    the query's trigrams, how many trigrams each listed name shares with it;
+    only names above MIN_TRIGRAM_SIMILARITY are scored word by word. Posting
+    lists are arrays of name numbers, so the index stays compact and
+    picklable (it is handed to the rescreening worker processes).
+    """
+
+    def __init__(self, entries=()):
+        self.entry_ids = array('q')
+        self.names = []
+        self.tokens = []
+        self.sizes = array('I')
+        postings = defaultdict(list)
+        for entry_id, names in entries:
+            for name in names:
+                tokens = tuple(name_tokens(name))
+                if not tokens:
+                    continue
+                number = len(self.names)
+                grams = trigrams(tokens)
+                for gram in grams:
+                    postings[gram].append(number)
+                self.entry_ids.append(entry_id)
+                self.names.append(name)
+                self.tokens.append(tokens)
+                self.sizes.append(len(grams))
+        self.postings = {gram: array('I', numbers) for gram, numbers in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, name, min_score):
+        """Entries with a name scoring at least ``min_score`` against ``name``.
+
+        Returns ``[(entry_id, score, matched_name)]``, best first, one row per entry.
+        """
+        tokens = name_tokens(name)
+        if not tokens or not self.names:
+            return []
+        grams = trigrams(tokens)
+        shared = Counter()
+        for gram in grams:
+            numbers = self.postings.get(gram)
+            if numbers:
+                shared.update(numbers)
+
+        best = {}
+        size = len(grams)
+        # Fewest shared trigrams any name (however short) needs to pass the Dice check
+        floor = MIN_TRIGRAM_SIMILARITY * size / (2 - MIN_TRIGRAM_SIMILARITY)
+        candidates = [(number, count) for number, count in shared.items() if count >= floor]
+        for number, count in candidates:
+            if 2 * count < MIN_TRIGRAM_SIMILARITY * (size + self.sizes[number]):
+                continue
+            score = round(name_score(tokens, self.tokens[number]), 3)
+            entry_id = self.entry_ids[number]
+            if score >= min_score and score > best.get(entry_id, (0,))[0]:
+                best[entry_id] = (score, self.names[number])
+        return sorted(((entry_id, score, matched) for entry_id, (score, matched) in best.items()),
+                      key=lambda hit: (-hit[1], hit[0]))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from screening.screener import forget_index, rescreen_clients
+from screening.watchlists import WatchlistFormatError, load_watchlist
+
+
+class Command(BaseCommand):
+    help = "Load a sanctions/PEP watchlist file (CSV or UN consolidated list XML) and rescreen all clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--name', required=True, help="List name; a new file for the same name replaces the old one.")
+        parser.add_argument('--list-type', choices=['sanctions', 'pep'], default='sanctions')
+        parser.add_argument('--format', choices=['csv', 'xml'], help="Default: from the file extension.")
+        parser.add_argument('--force', action='store_true', help="Rescreen even if this file is already loaded.")
+        parser.add_argument('--no-rescreen', action='store_true')
+        parser.add_argument('--workers', type=int, help="Rescreening processes (default SCREENING_WORKERS).")
+
+    def handle(self, *args, **options):
+        try:
+            version, changed = load_watchlist(
+                options['path'], options['name'], list_type=options['list_type'],
+                file_format=options['format'], force=options['force'],
+            )
+        except (OSError, WatchlistFormatError) as exc:
+            raise CommandError(str(exc))
+        forget_index()
+        self.stdout.write(f"{version.name}: {version.entry_count} entries active.")
+        if not changed:
+            self.stdout.write("File already loaded; nothing to rescreen (use --force).")
+            return
+        if options['no_rescreen']:
+            return
+        report = rescreen_clients(workers=options['workers'])
+        self.stdout.write(
+            f"Rescreened {report['clients']} clients against {report['entries']} entries with "
+            f"{report['workers']} worker(s): {report['hits']} hits in {report['seconds']}s "
+            f"({report['clients_per_second']} clients/s)"
+        )
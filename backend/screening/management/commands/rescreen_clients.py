@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from screening.screener import rescreen_clients
+
+
+class Command(BaseCommand):
+    help = "Screen every client against the active watchlists and store the hits for review."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Screening processes (default SCREENING_WORKERS).")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        report = rescreen_clients(workers=options['workers'], chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"Rescreened {report['clients']} clients against {report['entries']} entries with "
+            f"{report['workers']} worker(s): {report['hits']} hits in {report['seconds']}s "
+            f"({report['clients_per_second']} clients/s)"
+        )
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.3 on 2026-10-18 04:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clients', '0014_duplicate_detection'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchlistVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('list_type', models.CharField(choices=[('sanctions', 'Sanctions'), ('pep', 'PEP')], default='sanctions', max_length=20)),
+                ('source_file', models.CharField(max_length=255)),
+                ('sha256', models.CharField(max_length=64)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('is_active', models.BooleanField(default=False)),
+                ('loaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('name', 'sha256')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WatchlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.CharField(blank=True, max_length=100)),
+                ('entity_type', models.CharField(choices=[('individual', 'Individual'), ('entity', 'Entity')], default='individual', max_length=20)),
+                ('name', models.CharField(max_length=255)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('date_of_birth', models.CharField(blank=True, max_length=50)),
+                ('program', models.CharField(blank=True, max_length=255)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='screening.watchlistversion')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScreeningHit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=20)),
+                ('screened_name', models.CharField(max_length=255)),
+                ('matched_name', models.CharField(max_length=255)),
+                ('score', models.FloatField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('false_positive', 'False positive')], default='pending', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screening_hits', to='clients.client')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hits', to='screening.watchlistentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'score'], name='screening_status_score_idx')],
+                'unique_together': {('client', 'entry', 'field')},
+            },
+        ),
+    ]
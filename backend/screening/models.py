@@ -0,0 +1,87 @@
+from django.db import models
+
+
+class WatchlistVersion(models.Model):
+    """One loaded copy of a sanctions or PEP list file.
+
+    Loading a new file for the same list name activates it and deactivates
+    the previous version; only entries of active versions are screened
+    against. See ``manage.py load_watchlist``.
+    """
+    LIST_TYPE_CHOICES = (
+        ('sanctions', 'Sanctions'),
+        ('pep', 'PEP'),
+    )
+
+    name = models.CharField(max_length=100)
+    list_type = models.CharField(max_length=20, choices=LIST_TYPE_CHOICES, default='sanctions')
+    source_file = models.CharField(max_length=255)
+    sha256 = models.CharField(max_length=64)
+    entry_count = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=False)
+    loaded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('name', 'sha256')
+
+    def __str__(self):
+        return f"{self.name} ({self.loaded_at:%Y-%m-%d}, {self.entry_count} entries)"
+
+
+class WatchlistEntry(models.Model):
+    """A listed person or organisation, with its aliases."""
+    ENTITY_TYPE_CHOICES = (
+        ('individual', 'Individual'),
+        ('entity', 'Entity'),
+    )
+
+    version = models.ForeignKey('WatchlistVersion', on_delete=models.CASCADE, related_name='entries')
+    # The list's own identifier (UN reference number, row id, ...)
+    external_id = models.CharField(max_length=100, blank=True)
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPE_CHOICES, default='individual')
+    name = models.CharField(max_length=255)
+    aliases = models.JSONField(default=list, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    # As given by the list, which mixes full dates and years
+    date_of_birth = models.CharField(max_length=50, blank=True)
+    # Sanctions programme or, for PEPs, the position held
+    program = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ScreeningHit(models.Model):
+    """A client name that matched a watchlist entry, waiting for or after review.
+
+    Rescreening refreshes pending hits and drops those that no longer match;
+    reviewed hits are kept, and a new list version inherits the review of
+    the same client, field and listed entry.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('false_positive', 'False positive'),
+    )
+
+    client = models.ForeignKey('clients.Client', on_delete=models.CASCADE, related_name='screening_hits')
+    entry = models.ForeignKey('WatchlistEntry', on_delete=models.CASCADE, related_name='hits')
+    # Client field the name came from: fullName, corporateName or ubo
+    field = models.CharField(max_length=20)
+    screened_name = models.CharField(max_length=255)
+    matched_name = models.CharField(max_length=255)
+    score = models.FloatField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reviewed_by = models.ForeignKey('users.CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('client', 'entry', 'field')
+        indexes = [
+            models.Index(fields=['status', 'score'], name='screening_status_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.screened_name} ~ {self.matched_name} ({self.score:.2f}, {self.status})"
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+
+from clients.models import Client
+
+from .index import WatchlistIndex, split_names
+from .models import ScreeningHit, WatchlistEntry, WatchlistVersion
+
+# Client fields screened; UBO holds a list of names
+SCREENING_FIELDS = ('fullName', 'corporateName', 'ubo')
+# Below this many clients a rescreen runs in-process
+MIN_PARALLEL_CLIENTS = 5000
+
+_index_lock = threading.Lock()
+_index_state = {'index': None, 'signature': None, 'checked': 0.0}
+
+
+def min_score():
+    return getattr(settings, 'SCREENING_MIN_SCORE', 0.85)
+
+
+def screening_workers():
+    return getattr(settings, 'SCREENING_WORKERS', None) or os.cpu_count() or 1
+
+
+def _active_signature():
+    return tuple(WatchlistVersion.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True))
+
+
+def index_entries():
+    """``(entry_id, names)`` of every entry of the active watchlist versions."""
+    rows = WatchlistEntry.objects.filter(version__is_active=True).values_list('id', 'name', 'aliases')
+    return [(entry_id, [name, *aliases]) for entry_id, name, aliases in rows.iterator(chunk_size=5000)]
+
+
+def get_index():
+    """This process's WatchlistIndex of the active watchlist versions.
+
+    Built on first use and rebuilt when the set of active versions changes,
+    which is checked at most every SCREENING_INDEX_TTL seconds (at once in
+    the process that loaded the list, see ``forget_index``).
+    """
+    with _index_lock:
+        now = time.monotonic()
+        if _index_state['index'] is None or now - _index_state['checked'] >= getattr(settings, 'SCREENING_INDEX_TTL', 60):
+            signature = _active_signature()
+            if signature != _index_state['signature'] or _index_state['index'] is None:
+                _index_state['index'] = WatchlistIndex(index_entries()) if signature else WatchlistIndex()
+                _index_state['signature'] = signature
+            _index_state['checked'] = now
+        return _index_state['index']
+
+
+def forget_index():
+    with _index_lock:
+        _index_state['index'] = None
+
+
+def client_names(values):
+    """``(field, name)`` pairs screened for one client (Client instance fields as a dict)."""
+    names = []
+    for field in SCREENING_FIELDS:
+        for name in (split_names(values.get(field)) if field == 'ubo' else [(values.get(field) or '').strip()]):
+            if name:
+                names.append((field, name))
+    return names
+
+
+def screen_values(index, clients, threshold):
+    """Hits of ``clients`` (field dicts with ``id``) as ``(client_id, field, name, entry_id, matched, score)``."""
+    hits = []
+    for values in clients:
+        best = {}
+        for field, name in client_names(values):
+            for entry_id, score, matched in index.search(name, threshold):
+                # Several UBO names can match the same entry: keep the closest
+                if score > best.get((entry_id, field), (0,))[0]:
+                    best[entry_id, field] = (score, name[:255], matched[:255])
+        for (entry_id, field), (score, name, matched) in best.items():
+            hits.append((values['id'], field, name, entry_id, matched, score))
+    return hits
+
+
+def record_hits(client_ids, hits):
+    """Store the hits of a screening of ``client_ids``.
+
+    Known hits get the new score; pending hits not found again are
+    deleted. A new hit on an entry of a newer list version takes over the
+    review of the same client, field and listed entry (list name and
+    external id), so reviewers do not see the same false positive twice.
+    Returns the number of hits written.
+    """
+    client_ids = list(client_ids)
+    found = {(client_id, entry_id, field) for client_id, field, _, entry_id, _, _ in hits}
+    entries = {
+        e['id']: (e['version__name'], e['external_id'])
+        for e in WatchlistEntry.objects.filter(id__in={hit[3] for hit in hits}).values('id', 'version__name', 'external_id')
+    }
+    reviews = {}
+    if hits:
+        reviewed = (ScreeningHit.objects.filter(client_id__in={hit[0] for hit in hits}).exclude(status='pending')
+                    .values_list('client_id', 'field', 'entry__version__name', 'entry__external_id',
+                                 'status', 'reviewed_by_id', 'reviewed_at'))
+        for client_id, field, list_name, external_id, status, reviewed_by, reviewed_at in reviewed:
+            if external_id:
+                reviews[client_id, field, list_name, external_id] = (status, reviewed_by, reviewed_at)
+
+    rows = []
+    for client_id, field, name, entry_id, matched, score in hits:
+        hit = ScreeningHit(client_id=client_id, entry_id=entry_id, field=field, screened_name=name,
+                           matched_name=matched, score=score)
+        review = reviews.get((client_id, field, *entries.get(entry_id, ('', ''))))
+        if review:
+            hit.status, hit.reviewed_by_id, hit.reviewed_at = review
+        rows.append(hit)
+
+    with transaction.atomic():
+        stale = [
+            pk for pk, client_id, entry_id, field in
+            ScreeningHit.objects.filter(client_id__in=client_ids, status='pending').values_list('pk', 'client_id', 'entry_id', 'field')
+            if (client_id, entry_id, field) not in found
+        ]
+        if stale:
+            ScreeningHit.objects.filter(pk__in=stale).delete()
+        if rows:
+            # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+            target = ['client', 'entry', 'field'] if connection.features.supports_update_conflicts_with_target else None
+            ScreeningHit.objects.bulk_create(
+                rows, batch_size=500, update_conflicts=True, unique_fields=target,
+                update_fields=['screened_name', 'matched_name', 'score', 'updated_at'],
+            )
+    return len(rows)
+
+
+def screen_clients(clients):
+    """Screen Client instances (or field dicts with ``id``) and store their hits.
+
+    Returns the hits as from ``screen_values``.
+    """
+    index = get_index()
+    if not len(index):
+        # No watchlist loaded
+        return []
+    clients = [client if isinstance(client, dict) else client.__dict__ for client in clients]
+    hits = screen_values(index, clients, min_score())
+    record_hits([values['id'] for values in clients], hits)
+    return hits
+
+
+_worker = {}
+
+
+def _init_worker(entries, threshold):
+    # Spawned workers (macOS/Windows) start without Django configured
+    django.setup()
+    _worker['index'] = WatchlistIndex(entries)
+    _worker['threshold'] = threshold
+
+
+def _screen_chunk(clients):
+    return [values['id'] for values in clients], screen_values(_worker['index'], clients, _worker['threshold'])
+
+
+def _client_chunks(chunk_size):
+    last_id = 0
+    while True:
+        chunk = list(Client.objects.filter(id__gt=last_id).order_by('id').values('id', *SCREENING_FIELDS)[:chunk_size])
+        if not chunk:
+            return
+        last_id = chunk[-1]['id']
+        yield chunk
+
+
+def rescreen_clients(workers=None, chunk_size=1000):
+    """Screen every client against the active watchlists, e.g. after loading a new version.
+
+    The clients are read in id order, ``chunk_size`` at a time, and
+    screened by ``workers`` processes (default SCREENING_WORKERS, else the
+    CPU count), each holding its own copy of the index; this process stores
+    the hits as chunks come back, keeping at most two chunks per worker in
+    flight. Small client bases are screened in-process.
+
+    Returns a report with clients, hits, seconds and clients per second.
+    """
+    started = time.monotonic()
+    entries = index_entries()
+    threshold = min_score()
+    workers = workers or screening_workers()
+    report = {'clients': 0, 'hits': 0, 'entries': len(entries), 'workers': 1}
+
+    def store(client_ids, hits):
+        report['clients'] += len(client_ids)
+        report['hits'] += record_hits(client_ids, hits)
+
+    chunks = _client_chunks(chunk_size)
+    if workers <= 1 or Client.objects.count() < MIN_PARALLEL_CLIENTS:
+        index = WatchlistIndex(entries)
+        for chunk in chunks:
+            store([values['id'] for values in chunk], screen_values(index, chunk, threshold))
+    else:
+        report['workers'] = workers
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(entries, threshold)) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(_screen_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        store(*future.result())
+            for future in pending:
+                store(*future.result())
+
+    seconds = time.monotonic() - started
+    report['seconds'] = round(seconds, 3)
+    report['clients_per_second'] = round(report['clients'] / seconds, 1) if seconds else None
+    return report
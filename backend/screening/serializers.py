@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from .models import ScreeningHit, WatchlistEntry, WatchlistVersion
+
+class WatchlistVersionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WatchlistVersion
+        fields = ['id', 'name', 'list_type', 'source_file', 'sha256', 'entry_count', 'is_active', 'loaded_at']
+
+class WatchlistEntrySerializer(serializers.ModelSerializer):
+    list_name = serializers.CharField(source='version.name', read_only=True)
+    list_type = serializers.CharField(source='version.list_type', read_only=True)
+
+    class Meta:
+        model = WatchlistEntry
+        fields = ['id', 'list_name', 'list_type', 'external_id', 'entity_type', 'name', 'aliases', 'country',
+                  'date_of_birth', 'program']
+
+class ScreeningHitSerializer(serializers.ModelSerializer):
+    entry = WatchlistEntrySerializer(read_only=True)
+    client_reference = serializers.CharField(source='client.reference', read_only=True)
+
+    class Meta:
+        model = ScreeningHit
+        fields = ['id', 'client', 'client_reference', 'field', 'screened_name', 'matched_name', 'score', 'entry',
+                  'status', 'reviewed_by', 'reviewed_at', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+class ReviewHitSerializer(serializers.Serializer):
+    """Serializer for confirming a hit or marking it a false positive"""
+    status = serializers.ChoiceField(choices=['confirmed', 'false_positive', 'pending'])
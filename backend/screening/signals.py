@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from clients.models import Client
+from clients.signals import clients_bulk_created, clients_bulk_updated
+
+from .screener import SCREENING_FIELDS, screen_clients
+
+
+def _enabled():
+    return getattr(settings, 'SCREENING_ON_SAVE', True)
+
+
+def _screen_after_commit(clients):
+    # Screened once the client write has committed; robust=True logs a
+    # screening failure (on the django.db.backends.base logger) instead of
+    # raising it into the code that saved the client
+    clients = list(clients)
+    if clients:
+        transaction.on_commit(lambda: screen_clients(clients), robust=True)
+
+
+@receiver(post_save, sender=Client)
+def screen_saved_client(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _enabled():
+        return
+    if update_fields is None or set(update_fields) & set(SCREENING_FIELDS):
+        _screen_after_commit([instance])
+
+
+@receiver(clients_bulk_created, sender=Client)
+def screen_bulk_created_clients(sender, instances, **kwargs):
+    # clients.signals resolves the ids of bulk-created rows first (registered earlier)
+    if _enabled():
+        _screen_after_commit(obj for obj in instances if obj.pk is not None)
+
+
+@receiver(clients_bulk_updated, sender=Client)
+def screen_bulk_updated_clients(sender, instances, fields=(), **kwargs):
+    if _enabled() and set(fields) & set(SCREENING_FIELDS):
+        _screen_after_commit(instances)
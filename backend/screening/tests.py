@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from clients.models import Client
+
+from .index import WatchlistIndex, split_names
+from .models import ScreeningHit, WatchlistVersion
+from .screener import forget_index
+from .watchlists import load_watchlist
+
+HEADER = "id,name,aliases,type,country,program\n"
+PETROV = "P1,Vladimir Ivanovich Petrov,V. I. Petrov;Vova Petrov,individual,RU,EU sanctions\n"
+ACME = "P2,Acme Shell Holdings Ltd,,entity,PA,OFAC\n"
+DUPONT = "P3,Marie-Claire Dupont,,individual,FR,PEP minister\n"
+KARIMOV = "P4,Ahmed Karimov,,individual,UZ,UN\n"
+
+
+class WatchlistIndexTests(TestCase):
+    def test_search(self):
+        index = WatchlistIndex([(1, ["Vladimir Ivanovich Petrov", "V. I. Petrov"]), (2, ["John Smith"])])
+        self.assertEqual(index.search("Petrov Vladimir", 0.85)[0][0], 1)
+        self.assertEqual(index.search("Vladimir Petrow", 0.85)[0][0], 1)
+        self.assertEqual(index.search("Jon Smith", 0.85)[0][0], 2)
+        # A surname alone is not enough
+        self.assertEqual(index.search("Smith", 0.85), [])
+        self.assertEqual(index.search("Mary Jones", 0.85), [])
+        self.assertEqual(split_names("John Smith; Jane Doe and A. Patel"), ["John Smith", "Jane Doe", "A. Patel"])
+
+
+class ScreeningCycleTests(TestCase):
+    def setUp(self):
+        forget_index()
+        self.addCleanup(forget_index)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def watchlist(self, filename, *rows):
+        path = os.path.join(self.directory, filename)
+        with open(path, "w") as f:
+            f.write(HEADER + "".join(rows))
+        return path
+
+    def save(self, client):
+        # Clients are screened once their write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            client.save()
+        return client
+
+    def test_load_screen_and_carry_reviews_over(self):
+        first = self.watchlist("v1.csv", PETROV, ACME, DUPONT)
+        version, changed = load_watchlist(first, "eu")
+        self.assertEqual((version.entry_count, changed), (3, True))
+        self.assertFalse(load_watchlist(first, "eu")[1])
+        forget_index()
+
+        person = self.save(Client(fullName="Vladimir Petrov"))
+        company = self.save(Client(clientType="corporate", corporateName="ACME Shell Holdings Limited",
+                                   ubo="Marie Claire Dupont; Bob Lee"))
+        self.save(Client(fullName="Nobody Special"))
+        self.assertEqual(sorted(ScreeningHit.objects.values_list("client_id", "field")),
+                         sorted([(person.pk, "fullName"), (company.pk, "corporateName"), (company.pk, "ubo")]))
+
+        ScreeningHit.objects.filter(client=person).update(status="false_positive")
+        # Pending hits no longer found are dropped
+        company.ubo = "Bob Lee"
+        self.save(company)
+        self.assertFalse(ScreeningHit.objects.filter(client=company, field="ubo").exists())
+
+        call_command("load_watchlist", self.watchlist("v2.csv", PETROV, ACME, KARIMOV), "--name", "eu",
+                     "--workers", "1", stdout=StringIO())
+
+        self.assertEqual(WatchlistVersion.objects.filter(name="eu", is_active=True).count(), 1)
+        hits = ScreeningHit.objects.filter(client=person)
+        self.assertEqual(hits.count(), 2)
+        self.assertEqual(hits.get(entry__version__is_active=True).status, "false_positive")
+        self.assertEqual(ScreeningHit.objects.get(client=company, entry__version__is_active=True).status, "pending")
+
+    def test_screening_failure_keeps_the_client(self):
+        load_watchlist(self.watchlist("v1.csv", PETROV), "eu")
+
+        with mock.patch("screening.signals.screen_clients", side_effect=RuntimeError("index unavailable")):
+            # Logged (by the backend, or the test runner here) rather than raised
+            with self.assertLogs("django", "ERROR"):
+                client = self.save(Client(fullName="Vladimir Petrov"))
+
+        self.assertTrue(Client.objects.filter(pk=client.pk).exists())
+        self.assertFalse(ScreeningHit.objects.exists())
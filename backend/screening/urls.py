@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ScreeningHitViewSet, WatchlistVersionViewSet
+
+router = DefaultRouter()
+router.register(r'screening-hits', ScreeningHitViewSet)
+router.register(r'watchlists', WatchlistVersionViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
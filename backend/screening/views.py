@@ -0,0 +1,85 @@
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import ScreeningHit, WatchlistEntry, WatchlistVersion
+from .screener import get_index, min_score
+from .serializers import ReviewHitSerializer, ScreeningHitSerializer, WatchlistEntrySerializer, WatchlistVersionSerializer
+
+
+class WatchlistVersionViewSet(viewsets.ReadOnlyModelViewSet):
+    """Loaded watchlist files, newest first; loaded with ``manage.py load_watchlist``."""
+    queryset = WatchlistVersion.objects.all()
+    serializer_class = WatchlistVersionSerializer
+    cursor_field = 'loaded_at'
+
+    def get_queryset(self):
+        return super().get_queryset().order_by('-loaded_at', '-id')
+
+
+class ScreeningHitViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Client names matching a watchlist entry, best score first.
+
+    ``?status=`` filters by review status (default ``pending``, ``all`` for
+    every hit) and ``?client=`` by client id. Admin and compliance users
+    review hits with POST ``review/``.
+    """
+    queryset = ScreeningHit.objects.all()
+    serializer_class = ScreeningHitSerializer
+    cursor_field = 'score'
+
+    def get_queryset(self):
+        qs = super().get_queryset().select_related('client', 'entry__version').order_by('-score', '-id')
+        if self.action == 'list':
+            status_filter = self.request.query_params.get('status', 'pending')
+            if status_filter != 'all':
+                qs = qs.filter(status=status_filter)
+            client_id = self.request.query_params.get('client')
+            if client_id and client_id.isdigit():
+                qs = qs.filter(client_id=client_id)
+        user = self.request.user
+
+        # Admin and compliance can see all hits
+        if user.role in ['admin', 'compliance']:
+            return qs
+
+        # Regular users only see hits on clients from their distribution channel
+        if user.distribution_channel:
+            return qs.filter(client__distributionChannel=user.distribution_channel)
+
+        # If no distribution channel set, return empty queryset
+        return ScreeningHit.objects.none()
+
+    @action(detail=True, methods=['post'])
+    def review(self, request, pk=None):
+        """Confirm a hit, mark it a false positive, or put it back to pending."""
+        if request.user.role not in ['admin', 'compliance']:
+            return Response({'detail': 'Only admin and compliance users can review screening hits'},
+                            status=status.HTTP_403_FORBIDDEN)
+        serializer = ReviewHitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        hit = self.get_object()
+        hit.status = serializer.validated_data['status']
+        if hit.status == 'pending':
+            hit.reviewed_by = None
+            hit.reviewed_at = None
+        else:
+            hit.reviewed_by = request.user
+            hit.reviewed_at = timezone.now()
+        hit.save(update_fields=['status', 'reviewed_by', 'reviewed_at', 'updated_at'])
+        return Response(self.get_serializer(hit).data)
+
+    @action(detail=False, methods=['get'])
+    def check(self, request):
+        """Screen an arbitrary ``?name=`` against the active watchlists without storing anything."""
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return Response({'detail': 'name is required'}, status=status.HTTP_400_BAD_REQUEST)
+        matches = get_index().search(name, min_score())[:20]
+        entries = WatchlistEntry.objects.select_related('version').in_bulk([entry_id for entry_id, _, _ in matches])
+        results = [
+            {'score': score, 'matched_name': matched, 'entry': WatchlistEntrySerializer(entries[entry_id]).data}
+            for entry_id, score, matched in matches if entry_id in entries
+        ]
+        return Response({'name': name, 'results': results})
@@ -0,0 +1,139 @@
+import csv
+import hashlib
+import os
+import xml.etree.ElementTree as ET
+from itertools import islice
+
+from django.db import transaction
+
+from .models import WatchlistEntry, WatchlistVersion
+
+CSV_COLUMNS = {
+    'external_id': ('id', 'external_id', 'reference', 'reference_number'),
+    'name': ('name', 'full_name'),
+    'aliases': ('aliases', 'alias', 'aka'),
+    'entity_type': ('entity_type', 'type'),
+    'country': ('country', 'nationality'),
+    'date_of_birth': ('dob', 'date_of_birth'),
+    'program': ('program', 'programme', 'position'),
+}
+ENTITY_WORDS = {'entity', 'organisation', 'organization', 'company', 'vessel'}
+
+
+class WatchlistFormatError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv(path):
+    """Entries of a CSV list with a header row.
+
+    A ``name`` column is required; ``aliases`` are separated by semicolons.
+    Other recognised columns are listed in CSV_COLUMNS.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        headers = {h.strip().lower(): h for h in reader.fieldnames or ()}
+        columns = {}
+        for field, names in CSV_COLUMNS.items():
+            columns[field] = next((headers[n] for n in names if n in headers), None)
+        if columns['name'] is None:
+            raise WatchlistFormatError("CSV watchlist needs a 'name' column")
+        for row in reader:
+            values = {field: (row.get(column) or '').strip() if column else '' for field, column in columns.items()}
+            if not values['name']:
+                continue
+            values['aliases'] = [a.strip() for a in values['aliases'].split(';') if a.strip()]
+            values['entity_type'] = 'entity' if values['entity_type'].lower() in ENTITY_WORDS else 'individual'
+            yield values
+
+
+def _text(element, path):
+    found = element.find(path)
+    return (found.text or '').strip() if found is not None and found.text else ''
+
+
+def read_un_xml(path):
+    """Entries of a list in the UN Security Council consolidated list XML format.
+
+    Reads INDIVIDUAL and ENTITY elements incrementally, so large files are
+    not held in memory.
+    """
+    for _, element in ET.iterparse(path, events=('end',)):
+        if element.tag not in ('INDIVIDUAL', 'ENTITY'):
+            continue
+        individual = element.tag == 'INDIVIDUAL'
+        name = ' '.join(filter(None, (_text(element, tag) for tag in
+                                      ('FIRST_NAME', 'SECOND_NAME', 'THIRD_NAME', 'FOURTH_NAME'))))
+        alias_tag = 'INDIVIDUAL_ALIAS' if individual else 'ENTITY_ALIAS'
+        aliases = [a for a in (_text(alias, 'ALIAS_NAME') for alias in element.iter(alias_tag)) if a]
+        birth = element.find('INDIVIDUAL_DATE_OF_BIRTH')
+        if name:
+            yield {
+                'external_id': _text(element, 'REFERENCE_NUMBER') or _text(element, 'DATAID'),
+                'name': name,
+                'aliases': aliases,
+                'entity_type': 'individual' if individual else 'entity',
+                'country': _text(element, 'NATIONALITY/VALUE'),
+                'date_of_birth': (_text(birth, 'DATE') or _text(birth, 'YEAR')) if birth is not None else '',
+                'program': _text(element, 'UN_LIST_TYPE'),
+            }
+        element.clear()
+
+
+READERS = {
+    'csv': read_csv,
+    'xml': read_un_xml,
+}
+
+
+def _activate(version):
+    WatchlistVersion.objects.filter(name=version.name, is_active=True).exclude(pk=version.pk).update(is_active=False)
+    version.is_active = True
+    version.save(update_fields=['entry_count', 'list_type', 'is_active'])
+
+
+def load_watchlist(path, name, list_type='sanctions', file_format=None, force=False, batch_size=1000):
+    """Load a watchlist file as the active version of list ``name``.
+
+    ``file_format`` is ``csv`` or ``xml`` (UN consolidated list), by default
+    taken from the file extension. The previous version is deactivated;
+    hits against it stay for the record. A file already stored for this
+    list is reactivated rather than loaded again.
+
+    Returns ``(version, changed)``, ``changed`` telling whether the active
+    entries changed (always true with ``force``), i.e. whether clients need
+    rescreening.
+    """
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format not in READERS:
+        raise WatchlistFormatError(f"Unsupported watchlist format: {file_format or '(none)'}")
+    sha256 = file_sha256(path)
+
+    with transaction.atomic():
+        version = WatchlistVersion.objects.filter(name=name, sha256=sha256).first()
+        if version is not None:
+            changed = force or not version.is_active
+            version.list_type = list_type
+            _activate(version)
+            return version, changed
+
+        version = WatchlistVersion.objects.create(
+            name=name, list_type=list_type, source_file=os.path.basename(path), sha256=sha256,
+        )
+        entries = READERS[file_format](path)
+        while True:
+            batch = [WatchlistEntry(version=version, **values) for values in islice(entries, batch_size)]
+            if not batch:
+                break
+            WatchlistEntry.objects.bulk_create(batch)
+            version.entry_count += len(batch)
+        _activate(version)
+    return version, True
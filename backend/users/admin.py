@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import CustomUser, UserApproval
+from .models import CustomUser, OutgoingEmail, UserApproval
 
 admin.site.register(CustomUser)
 admin.site.register(UserApproval)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    # Approval mails carry temporary passwords
+    exclude = ('body', 'html_body')
@@ -0,0 +1,157 @@
+import os
+import random
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .authentication import forget_auth_state
+from .email_utils import send_approval_email, send_rejection_email
+from .mail_queue import enqueue_emails
+from .models import CustomUser, UserApproval
+
+# Below this many passwords, starting worker processes costs more than it saves
+MIN_PARALLEL_HASHES = 4
+
+
+def generate_temporary_password(length=12):
+    """Generate a secure temporary password"""
+    characters = string.ascii_letters + string.digits + '!@#$%^&*'
+    # Ensure at least one uppercase, one lowercase, one digit, one special char
+    password = [
+        random.choice(string.ascii_uppercase),
+        random.choice(string.ascii_lowercase),
+        random.choice(string.digits),
+        random.choice('!@#$%^&*'),
+    ]
+    # Fill the rest randomly
+    password += random.choices(characters, k=length - 4)
+    random.shuffle(password)
+    return ''.join(password)
+
+
+def hash_workers():
+    return getattr(settings, 'APPROVAL_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def _init_hash_worker():
+    # Spawned workers (macOS/Windows) start without Django configured
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """Return ``make_password`` of each password, hashing in a process pool.
+
+    PBKDF2 is CPU bound and holds the GIL, so threads would not help; with
+    ``workers`` processes (default APPROVAL_HASH_WORKERS, else the CPU
+    count) the hashes are computed on all cores. Small batches are hashed
+    in-process.
+    """
+    workers = min(workers or hash_workers(), len(passwords))
+    if workers <= 1 or len(passwords) < MIN_PARALLEL_HASHES:
+        return [make_password(p) for p in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def bulk_process_approvals(user_ids, action, approver, rejection_reason='', workers=None):
+    """Approve or reject several pending registrations at once.
+
+    Everything happens in one transaction that first locks the requested
+    approval rows (``select_for_update``), so of two overlapping requests the
+    second waits and then finds the users already processed: nobody is
+    approved twice or gets two mails. Temporary passwords are generated and
+    hashed (``hash_passwords``) only for the locked rows that still need
+    them; the user and approval rows are then written with one
+    ``bulk_update`` each and the notification mails queued with one insert.
+    Users already in the requested state are left alone.
+
+    Returns ``{'results': [...], 'approved', 'rejected', 'unchanged',
+    'not_found', 'seconds', 'hash_seconds', 'users_per_second'}`` with one
+    result per requested id, in request order; approved results carry the
+    temporary password like the single-user endpoint.
+    """
+    started = time.monotonic()
+    target = 'approved' if action == 'approve' else 'rejected'
+    user_ids = list(dict.fromkeys(user_ids))
+    results = {}
+    todo = []
+    hash_seconds = 0
+
+    with transaction.atomic():
+        approvals = {
+            a.user_id: a
+            for a in UserApproval.objects.select_for_update().select_related('user').filter(user_id__in=user_ids)
+        }
+        for user_id in user_ids:
+            approval = approvals.get(user_id)
+            if approval is None:
+                results[user_id] = {'user_id': user_id, 'status': 'not_found'}
+            elif approval.status == target:
+                results[user_id] = {'user_id': user_id, 'email': approval.user.email, 'status': 'unchanged'}
+            else:
+                todo.append(approval)
+
+        if action == 'approve':
+            passwords = [generate_temporary_password() for _ in todo]
+            hash_started = time.monotonic()
+            hashes = hash_passwords(passwords, workers) if todo else []
+            hash_seconds = time.monotonic() - hash_started
+        else:
+            passwords = hashes = [None] * len(todo)
+
+        now = timezone.now()
+        users, emails = [], []
+        for approval, password, hashed in zip(todo, passwords, hashes):
+            user = approval.user
+            user_name = f"{user.first_name} {user.last_name}"
+            approval.status = target
+            approval.approved_at = now
+            approval.approved_by = approver
+            if action == 'approve':
+                user.is_active = True
+                user.is_approved = True
+                user.must_change_password = True
+                user.password = hashed
+                approval.temporary_password = password
+                emails.append(send_approval_email(user.email, user_name, password, save=False))
+                results[user.id] = {'user_id': user.id, 'email': user.email, 'status': target,
+                                    'temporary_password': password}
+            else:
+                user.is_active = False
+                approval.rejection_reason = rejection_reason
+                emails.append(send_rejection_email(user.email, user_name, rejection_reason, save=False))
+                results[user.id] = {'user_id': user.id, 'email': user.email, 'status': target}
+            users.append(user)
+
+        if todo:
+            if action == 'approve':
+                user_fields = ['is_active', 'is_approved', 'must_change_password', 'password']
+                approval_fields = ['status', 'temporary_password', 'approved_at', 'approved_by']
+            else:
+                user_fields = ['is_active']
+                approval_fields = ['status', 'rejection_reason', 'approved_at', 'approved_by']
+            CustomUser.objects.bulk_update(users, user_fields, batch_size=500)
+            UserApproval.objects.bulk_update(todo, approval_fields, batch_size=500)
+            enqueue_emails(emails)
+            # bulk_update sends no post_save
+            forget_auth_state(*(user.pk for user in users))
+
+    seconds = time.monotonic() - started
+    outcomes = [results[user_id] for user_id in user_ids]
+    return {
+        'results': outcomes,
+        'approved': sum(1 for r in outcomes if r['status'] == 'approved'),
+        'rejected': sum(1 for r in outcomes if r['status'] == 'rejected'),
+        'unchanged': sum(1 for r in outcomes if r['status'] == 'unchanged'),
+        'not_found': sum(1 for r in outcomes if r['status'] == 'not_found'),
+        'seconds': round(seconds, 3),
+        'hash_seconds': round(hash_seconds, 3),
+        'users_per_second': round(len(todo) / seconds, 1) if seconds and todo else None,
+    }
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import CustomUser
+
+# Account fields that decide what a request may do. They are read from the
+# cached account state rather than the token, so deactivation and role or
+# channel changes apply before the token expires.
+AUTH_STATE_FIELDS = (
+    'is_active', 'is_approved', 'is_staff', 'is_superuser',
+    'role', 'distribution_channel', 'must_change_password',
+)
+# Claims added by CustomTokenObtainPairSerializer.get_token that describe the user
+CLAIM_FIELDS = {'email': 'email'}
+
+
+def auth_state_key(user_id):
+    return f'users:auth-state:{user_id}'
+
+
+def get_auth_state(user_id):
+    """Return the AUTH_STATE_FIELDS values for a user, or None if there is no such user.
+
+    Cached for USER_AUTH_CACHE_TTL seconds and dropped whenever the user is
+    saved or deleted (users/signals.py).
+    """
+    key = auth_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = CustomUser.objects.filter(pk=user_id).values_list(*AUTH_STATE_FIELDS).first() or ()
+        cache.set(key, state, getattr(settings, 'USER_AUTH_CACHE_TTL', 60))
+    return state or None
+
+
+def forget_auth_state(*user_ids):
+    keys = [auth_state_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Drop them again once committed, in case a request re-cached the old state meanwhile
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not load the user row on every request.
+
+    ``request.user`` is a CustomUser built from the token's user id and
+    claims plus the cached account state (``get_auth_state``), so a request
+    with a warm cache costs no query. Other fields are deferred and loaded on
+    first access. The instance refuses to save without ``update_fields``, as
+    a full save would write the cached state back to the row. Inactive
+    users are refused as with JWTAuthentication. CHECK_REVOKE_TOKEN is
+    honoured, at the cost of loading the password hash (password hashes are
+    not cached).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        values = dict(zip(AUTH_STATE_FIELDS, state), id=user_id)
+        for claim, field in CLAIM_FIELDS.items():
+            if claim in validated_token:
+                values[field] = validated_token[claim]
+        # from_db expects the loaded fields in model order; the rest are deferred
+        field_names = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in values]
+        user = CustomUser.from_db(None, field_names, [values[f] for f in field_names])
+        user.from_auth_state = True
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -1,10 +1,10 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 
+from .mail_queue import enqueue_email
+
 
 def send_registration_notification(user_email, user_name, admin_email='info@myinvoiceonline.net'):
-    """Send email to admin about new registration"""
+    """Queue an email to admin about new registration"""
     subject = f"New User Registration: {user_name}"
     html_message = f"""
     <h2>New User Registration</h2>
@@ -17,23 +17,16 @@ def send_registration_notification(user_email, user_name, admin_email='info@myin
     <p>Please log in to the admin panel to approve or reject this registration.</p>
     """
     
-    try:
-        send_mail(
-            subject,
-            "New user registration pending approval",
-            settings.DEFAULT_FROM_EMAIL,
-            [admin_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Failed to send registration notification: {str(e)}")
-        return False
+    return enqueue_email(
+        subject,
+        "New user registration pending approval",
+        [admin_email],
+        html_message=html_message,
+    )
 
 
-def send_approval_email(user_email, user_name, temporary_password):
-    """Send approval email with temporary password to user"""
+def send_approval_email(user_email, user_name, temporary_password, save=True):
+    """Queue the approval email with temporary password to user"""
     subject = "Your Registration Has Been Approved"
     html_message = f"""
     <h2>Welcome to CDD System!</h2>
@@ -56,23 +49,17 @@ def send_approval_email(user_email, user_name, temporary_password):
     <p><em>CDD System Support Team</em></p>
     """
     
-    try:
-        send_mail(
-            subject,
-            "Your account has been approved. Please log in with the temporary password.",
-            settings.DEFAULT_FROM_EMAIL,
-            [user_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Failed to send approval email: {str(e)}")
-        return False
+    return enqueue_email(
+        subject,
+        "Your account has been approved. Please log in with the temporary password.",
+        [user_email],
+        html_message=html_message,
+        save=save,
+    )
 
 
-def send_rejection_email(user_email, user_name, rejection_reason=''):
-    """Send rejection email to user"""
+def send_rejection_email(user_email, user_name, rejection_reason='', save=True):
+    """Queue the rejection email to user"""
     subject = "Registration Status Update"
     html_message = f"""
     <h2>Registration Decision</h2>
@@ -89,16 +76,10 @@ def send_rejection_email(user_email, user_name, rejection_reason=''):
     <p><em>CDD System Support Team</em></p>
     """
     
-    try:
-        send_mail(
-            subject,
-            "Your registration request has been reviewed.",
-            settings.DEFAULT_FROM_EMAIL,
-            [user_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Failed to send rejection email: {str(e)}")
-        return False
+    return enqueue_email(
+        subject,
+        "Your registration request has been reviewed.",
+        [user_email],
+        html_message=html_message,
+        save=save,
+    )
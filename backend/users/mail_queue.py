@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+MAIL_QUEUE_DEFAULTS = {
+    'MAIL_QUEUE_MAX_ATTEMPTS': 8,
+    'MAIL_QUEUE_BACKOFF_BASE': 30,     # seconds before the first retry
+    'MAIL_QUEUE_BACKOFF_MAX': 3600,    # cap on the retry delay
+}
+
+
+def mail_queue_setting(name):
+    return getattr(settings, name, MAIL_QUEUE_DEFAULTS[name])
+
+
+def enqueue_email(subject, body, to, html_message=None, from_email=None, save=True):
+    """Queue a message for the mail worker and return the OutgoingEmail row.
+
+    Nothing is sent here, so callers never wait on SMTP. Call inside the
+    transaction that made the change the mail is about, so a rolled-back
+    request sends nothing. With ``save=False`` the row is returned unsaved,
+    for ``enqueue_emails``.
+    """
+    email = OutgoingEmail(
+        subject=subject,
+        body=body,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+    if save:
+        email.save()
+    return email
+
+
+def enqueue_emails(emails, batch_size=500):
+    """Queue several unsaved OutgoingEmail rows with one insert per ``batch_size``."""
+    return OutgoingEmail.objects.bulk_create(emails, batch_size=batch_size)
+
+
+def build_message(email, mail_connection=None):
+    message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=mail_connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    base = float(mail_queue_setting('MAIL_QUEUE_BACKOFF_BASE'))
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), float(mail_queue_setting('MAIL_QUEUE_BACKOFF_MAX'))))
+
+
+def _forget_content(email):
+    # Bodies can hold temporary passwords; only pending messages need them
+    email.body = ''
+    email.html_body = ''
+
+
+def _mark_failed(email, exc, now, stats):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if email.attempts >= int(mail_queue_setting('MAIL_QUEUE_MAX_ATTEMPTS')):
+        email.status = 'dead'
+        _forget_content(email)
+        stats['dead'] += 1
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+        stats['failed'] += 1
+
+
+def flush_email_queue(batch_size=50, backend=None):
+    """Send one batch of due queued emails over a single mail connection.
+
+    Messages are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the DB
+    supports it, so several workers can run side by side. The connection is
+    opened once for the batch and each message goes through
+    ``send_messages`` on it; after a failure the connection is reopened so
+    one rejected message does not fail the rest. Failed messages back off
+    exponentially and are marked ``dead`` after MAIL_QUEUE_MAX_ATTEMPTS.
+    Sent and dead messages keep their subject and recipients but not their
+    bodies.
+    """
+    stats = {'claimed': 0, 'sent': 0, 'failed': 0, 'dead': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        qs = OutgoingEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        else:
+            qs = qs.select_for_update()
+        batch = list(qs[:batch_size])
+        stats['claimed'] = len(batch)
+        if not batch:
+            return stats
+
+        mail_connection = get_connection(backend, fail_silently=False)
+        opened = False
+        try:
+            for email in batch:
+                try:
+                    if not opened:
+                        mail_connection.open()
+                        opened = True
+                    if not mail_connection.send_messages([build_message(email, mail_connection)]):
+                        raise RuntimeError("Message was not accepted by the mail backend")
+                except Exception as exc:
+                    _mark_failed(email, exc, now, stats)
+                    # The SMTP session may be unusable after an error
+                    mail_connection.close()
+                    opened = False
+                    continue
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                _forget_content(email)
+                stats['sent'] += 1
+        finally:
+            mail_connection.close()
+
+        OutgoingEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body', 'html_body'],
+        )
+    return stats
@@ -0,0 +1,44 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.mail_queue import flush_email_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails in batches, one mail connection per batch. Use --loop to keep running "
+        "(e.g. under supervisord or systemd); SIGTERM/SIGINT stop it after the current batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to sleep when there is nothing to send.")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--backend', help="Email backend to send through; defaults to EMAIL_BACKEND.")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        if options['loop']:
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        totals = {'sent': 0, 'failed': 0, 'dead': 0}
+        while not self.stopping:
+            close_old_connections()
+            stats = flush_email_queue(batch_size=options['batch_size'], backend=options['backend'])
+            for key in totals:
+                totals[key] += stats[key]
+            if stats['failed'] or stats['dead']:
+                self.stderr.write(f"{stats['failed']} failed, {stats['dead']} dead-lettered")
+            if stats['claimed'] < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(f"Sent {totals['sent']}, failed {totals['failed']}, dead-lettered {totals['dead']}.")
+
+    def stop(self, signum, frame):
+        self.stopping = True
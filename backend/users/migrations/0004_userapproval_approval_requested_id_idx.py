@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_approval_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userapproval',
+            index=models.Index(fields=['requested_at', 'id'], name='approval_requested_id_idx'),
+        ),
+    ]
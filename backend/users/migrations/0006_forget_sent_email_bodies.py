@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def forget_bodies(apps, schema_editor):
+    """Blank the bodies of messages already sent or given up (see users.mail_queue)."""
+    OutgoingEmail = apps.get_model('users', 'OutgoingEmail')
+    OutgoingEmail.objects.filter(status__in=['sent', 'dead']).update(body='', html_body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(forget_bodies, migrations.RunPython.noop),
+    ]
@@ -20,6 +20,21 @@ class CustomUser(AbstractUser):
     registration_date = models.DateTimeField(auto_now_add=True, null=True)
     phone_number = models.CharField(max_length=20, blank=True, help_text="User's mobile/phone number")
 
+    # True on the request.user instances CachedJWTAuthentication builds from
+    # cached account state (users/authentication.py); see save()
+    from_auth_state = False
+
+    def save(self, *args, **kwargs):
+        # A full save would write the possibly stale cached is_active, role
+        # and channel back over an admin's change, and load every deferred
+        # field with its own query
+        if self.from_auth_state and kwargs.get('update_fields') is None:
+            raise ValueError(
+                "This user was built from cached account state; save it with update_fields "
+                "or save a copy loaded from the database."
+            )
+        super().save(*args, **kwargs)
+
 
 class UserApproval(models.Model):
     """Track registration approval workflow"""
@@ -39,6 +54,38 @@ class UserApproval(models.Model):
     
     class Meta:
         ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['requested_at', 'id'], name='approval_requested_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.status}"
+
+
+class OutgoingEmail(models.Model):
+    """A message waiting to be sent by ``manage.py send_queued_email`` (see users/mail_queue.py)."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(help_text="List of recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -33,26 +34,28 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        # Create user but not active yet
-        user = CustomUser.objects.create_user(
-            email=validated_data['email'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name'],
-            phone_number=validated_data.get('phone_number', ''),
-            username=validated_data['email'],
-            password=validated_data['password'],
-            is_active=False,
-            is_approved=False,
-            role=validated_data.get('role', 'user')
-        )
-        
-        # Create approval record
-        UserApproval.objects.create(user=user)
-        
-        # Send notification to admin
-        user_name = f"{user.first_name} {user.last_name}"
-        send_registration_notification(user.email, user_name)
+        # User, approval record and queued notification are saved together
+        with transaction.atomic():
+            # Create user but not active yet
+            user = CustomUser.objects.create_user(
+                email=validated_data['email'],
+                first_name=validated_data['first_name'],
+                last_name=validated_data['last_name'],
+                phone_number=validated_data.get('phone_number', ''),
+                username=validated_data['email'],
+                password=validated_data['password'],
+                is_active=False,
+                is_approved=False,
+                role=validated_data.get('role', 'user')
+            )
         
+            # Create approval record
+            UserApproval.objects.create(user=user)
+
+            # Queue notification to admin
+            user_name = f"{user.first_name} {user.last_name}"
+            send_registration_notification(user.email, user_name)
+
         return user
 
 
@@ -88,6 +91,13 @@ class ApproveUserSerializer(serializers.Serializer):
     rejection_reason = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkApproveUsersSerializer(serializers.Serializer):
+    """Serializer for approving or rejecting several users at once"""
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    rejection_reason = serializers.CharField(required=False, allow_blank=True)
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
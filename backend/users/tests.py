@@ -1,3 +1,199 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend.sql_instrumentation import query_budget
+from clients.models import Client
+
+from .approvals import bulk_process_approvals
+from .email_utils import send_approval_email
+from .mail_queue import enqueue_email, flush_email_queue
+from .models import CustomUser, OutgoingEmail, UserApproval
+
+
+def auth_header(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+class CachedUserSaveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username="clerk", email="clerk@example.com", password="old-password",
+            role="compliance", is_approved=True, must_change_password=True,
+        )
+
+    def test_change_password_writes_only_the_password(self):
+        # Warm the cached account state, then change the role behind its back
+        self.client.get("/api/dashboard/stats/", **auth_header(self.user))
+        CustomUser.objects.filter(pk=self.user.pk).update(role="user")
+
+        response = self.client.post("/api/users/change-password/", {
+            "old_password": "old-password",
+            "new_password": "new-password",
+            "new_password_confirm": "new-password",
+        }, **auth_header(self.user))
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.role, "user")
+        self.assertFalse(self.user.must_change_password)
+        self.assertTrue(self.user.check_password("new-password"))
+
+    def test_full_save_of_token_user_is_refused(self):
+        from .authentication import CachedJWTAuthentication
+
+        authentication = CachedJWTAuthentication()
+        token = authentication.get_validated_token(str(RefreshToken.for_user(self.user).access_token))
+        user = authentication.get_user(token)
+
+        with self.assertRaises(ValueError):
+            user.save()
+        user.first_name = "Ada"
+        user.save(update_fields=["first_name"])
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).first_name, "Ada")
+
+
+class CachedAuthStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username="clerk", password="pw", role="compliance", is_approved=True)
+        Client.objects.create(fullName="Ada", distributionChannel="Agent")
+        Client.objects.create(fullName="Bob", distributionChannel="Branch")
+
+    def stats(self):
+        return self.client.get("/api/dashboard/stats/", **auth_header(self.user))
+
+    def user_queries(self):
+        table = CustomUser._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            response = self.stats()
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries if table in query["sql"]]
+
+    def test_warm_cache_reads_no_user_row(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_role_and_channel_changes_apply_to_the_next_request(self):
+        self.assertEqual(self.stats().json()["totalClients"], 2)
+
+        self.user.role, self.user.distribution_channel = "user", "Agent"
+        self.user.save()
+
+        self.assertEqual(self.stats().json()["totalClients"], 1)
+
+    def test_deactivation_applies_to_the_next_request(self):
+        self.assertEqual(self.stats().status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.stats().status_code, 401)
+
+
+class BulkApprovalTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username="admin", password="pw", role="admin", is_approved=True)
+        self.ids = []
+        for i in range(2):
+            user = CustomUser.objects.create_user(username=f"new{i}", email=f"new{i}@example.com", password="pw",
+                                                  is_active=False)
+            UserApproval.objects.create(user=user)
+            self.ids.append(user.pk)
+
+    def test_repeated_approval_changes_nothing(self):
+        first = bulk_process_approvals(self.ids + [0], "approve", self.admin, workers=1)
+        second = bulk_process_approvals(self.ids, "approve", self.admin, workers=1)
+
+        self.assertEqual((first["approved"], first["not_found"]), (2, 1))
+        self.assertEqual((second["approved"], second["unchanged"]), (0, 2))
+        self.assertNotIn("temporary_password", second["results"][0])
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        user = CustomUser.objects.get(pk=self.ids[0])
+        self.assertTrue(user.check_password(first["results"][0]["temporary_password"]))
+
+    def test_pending_list_reads_users_with_the_page(self):
+        api = APIClient()
+        api.force_authenticate(self.admin)
+
+        with query_budget(5, max_repeats=1):
+            response = api.get("/api/users/approvals/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["user_email"] for row in response.json()}, {"new0@example.com", "new1@example.com"})
+
+
+class RejectingBackend(EmailBackend):
+    """locmem backend that refuses mail to addresses starting with ``bad``."""
+
+    def send_messages(self, messages):
+        if any(address.startswith("bad") for message in messages for address in message.to):
+            raise OSError("550 mailbox unavailable")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    MAIL_QUEUE_MAX_ATTEMPTS=3, MAIL_QUEUE_BACKOFF_BASE=30, MAIL_QUEUE_BACKOFF_MAX=45,
+)
+class MailQueueTests(TestCase):
+    def due(self):
+        # Move every retry to the past instead of waiting for it
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_enqueue_sends_nothing(self):
+        send_approval_email("ada@example.com", "Ada L", "Temp-Pass-1")
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual((email.status, email.to), ("pending", ["ada@example.com"]))
+        self.assertIn("Temp-Pass-1", email.html_body)
+
+    def test_send_forgets_bodies(self):
+        send_approval_email("ada@example.com", "Ada L", "Temp-Pass-1")
+        enqueue_email("Hello", "Plain body", ["bob@example.com"])
+
+        stats = flush_email_queue()
+
+        self.assertEqual((stats["sent"], stats["failed"]), (2, 0))
+        self.assertEqual([m.to for m in mail.outbox], [["ada@example.com"], ["bob@example.com"]])
+        self.assertIn("Temp-Pass-1", mail.outbox[0].alternatives[0][0])
+        self.assertEqual(set(OutgoingEmail.objects.values_list("status", "body", "html_body")), {("sent", "", "")})
+
+    def test_failure_backs_off_then_dead_letters(self):
+        backend = "users.tests.RejectingBackend"
+        enqueue_email("Hello", "Body", ["bad@example.com"])
+        enqueue_email("Hello", "Body", ["good@example.com"])
+
+        stats = flush_email_queue(backend=backend)
+        self.assertEqual((stats["sent"], stats["failed"]), (1, 1))
+        failed = OutgoingEmail.objects.get(to=["bad@example.com"])
+        self.assertEqual((failed.status, failed.attempts, failed.body), ("pending", 1, "Body"))
+        self.assertIn("550", failed.last_error)
+        self.assertGreater(failed.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        # Not due yet
+        self.assertEqual(flush_email_queue(backend=backend)["claimed"], 0)
+
+        self.due()
+        flush_email_queue(backend=backend)
+        failed.refresh_from_db()
+        # Doubled, then capped by MAIL_QUEUE_BACKOFF_MAX
+        self.assertLess(failed.next_attempt_at, timezone.now() + timedelta(seconds=46))
+        self.assertGreater(failed.next_attempt_at, timezone.now() + timedelta(seconds=40))
+
+        self.due()
+        stats = flush_email_queue(backend=backend)
+        failed.refresh_from_db()
+        self.assertEqual(stats["dead"], 1)
+        self.assertEqual((failed.status, failed.attempts, failed.body), ("dead", 3, ""))
+        self.due()
+        self.assertEqual(flush_email_queue(backend=backend)["claimed"], 0)
+        self.assertEqual(len(mail.outbox), 1)
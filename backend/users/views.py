@@ -2,19 +2,20 @@ from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
-import string
-import random
 
 from .serializers import (
     UserRegistrationSerializer,
     UserSerializer, 
     CustomTokenObtainPairSerializer,
     UserApprovalSerializer,
-    ApproveUserSerializer
+    ApproveUserSerializer,
+    BulkApproveUsersSerializer,
 )
 from .models import CustomUser, UserApproval
 from .email_utils import send_approval_email, send_rejection_email
+from .approvals import bulk_process_approvals, generate_temporary_password
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 
@@ -43,11 +44,12 @@ class UserApprovalViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserApproval.objects.all()
     serializer_class = UserApprovalSerializer
     permission_classes = [IsAuthenticated]
+    cursor_field = 'requested_at'
     
     def get_queryset(self):
         # Only superusers/admins can see approvals
         if self.request.user.is_superuser or self.request.user.role == 'admin':
-            return UserApproval.objects.all()
+            return UserApproval.objects.select_related('user')
         return UserApproval.objects.none()
     
     @action(detail=False, methods=['post'])
@@ -79,23 +81,24 @@ class UserApprovalViewSet(viewsets.ReadOnlyModelViewSet):
             # Generate temporary password
             temp_password = self.generate_temporary_password()
             
-            # Update user
-            user.is_active = True
-            user.is_approved = True
-            user.must_change_password = True
-            user.set_password(temp_password)
-            user.save()
+            with transaction.atomic():
+                # Update user
+                user.is_active = True
+                user.is_approved = True
+                user.must_change_password = True
+                user.set_password(temp_password)
+                user.save()
             
-            # Update approval record
-            approval.status = 'approved'
-            approval.temporary_password = temp_password
-            approval.approved_at = timezone.now()
-            approval.approved_by = request.user
-            approval.save()
+                # Update approval record
+                approval.status = 'approved'
+                approval.temporary_password = temp_password
+                approval.approved_at = timezone.now()
+                approval.approved_by = request.user
+                approval.save()
             
-            # Send approval email with temporary password
-            user_name = f"{user.first_name} {user.last_name}"
-            send_approval_email(user.email, user_name, temp_password)
+                # Queue approval email with temporary password
+                user_name = f"{user.first_name} {user.last_name}"
+                send_approval_email(user.email, user_name, temp_password)
             
             return Response({
                 'message': f'User {user.email} has been approved',
@@ -103,40 +106,50 @@ class UserApprovalViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_200_OK)
         
         elif action_type == 'reject':
-            # Update user
-            user.is_active = False
-            user.save()
+            with transaction.atomic():
+                # Update user
+                user.is_active = False
+                user.save()
             
-            # Update approval record
-            approval.status = 'rejected'
-            approval.rejection_reason = rejection_reason
-            approval.approved_at = timezone.now()
-            approval.approved_by = request.user
-            approval.save()
+                # Update approval record
+                approval.status = 'rejected'
+                approval.rejection_reason = rejection_reason
+                approval.approved_at = timezone.now()
+                approval.approved_by = request.user
+                approval.save()
             
-            # Send rejection email
-            user_name = f"{user.first_name} {user.last_name}"
-            send_rejection_email(user.email, user_name, rejection_reason)
+                # Queue rejection email
+                user_name = f"{user.first_name} {user.last_name}"
+                send_rejection_email(user.email, user_name, rejection_reason)
             
             return Response({
                 'message': f'User {user.email} has been rejected'
             }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        """Approve or reject several pending user registrations in one request"""
+        if not (request.user.is_superuser or request.user.role == 'admin'):
+            return Response(
+                {'detail': 'Only admins can approve users'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        serializer = BulkApproveUsersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        report = bulk_process_approvals(
+            serializer.validated_data['user_ids'],
+            serializer.validated_data['action'],
+            request.user,
+            rejection_reason=serializer.validated_data.get('rejection_reason', ''),
+        )
+        return Response(report, status=status.HTTP_200_OK)
+
     @staticmethod
     def generate_temporary_password(length=12):
         """Generate a secure temporary password"""
-        characters = string.ascii_letters + string.digits + '!@#$%^&*'
-        # Ensure at least one uppercase, one lowercase, one digit, one special char
-        password = [
-            random.choice(string.ascii_uppercase),
-            random.choice(string.ascii_lowercase),
-            random.choice(string.digits),
-            random.choice('!@#$%^&*'),
-        ]
-        # Fill the rest randomly
-        password += random.choices(characters, k=length - 4)
-        random.shuffle(password)
-        return ''.join(password)
+        return generate_temporary_password(length)
 
 
 class ChangePasswordView(generics.GenericAPIView):
@@ -173,7 +186,8 @@ class ChangePasswordView(generics.GenericAPIView):
         # Update password
         user.set_password(new_password)
         user.must_change_password = False
-        user.save()
+        # request.user carries cached account state; write only what changed
+        user.save(update_fields=['password', 'must_change_password'])
         
         return Response({
             'message': 'Password changed successfully'
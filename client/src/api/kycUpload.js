@@ -0,0 +1,69 @@
+import axiosInstance from './axios';
+
+const CHUNK_SIZE = 8 * 1024 * 1024;
+const MAX_RETRIES = 5;
+
+const sessionKey = (clientId, file) => `kyc_upload_${clientId}_${file.name}_${file.size}_${file.lastModified}`;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const openSession = async (clientId, file) => {
+    const key = sessionKey(clientId, file);
+    const saved = localStorage.getItem(key);
+    if (saved) {
+        try {
+            const response = await axiosInstance.get(`/api/kyc-uploads/${saved}/`);
+            if (response.data.status === 'open') return response.data;
+        } catch (e) {
+            // Expired or unknown session: start a new one
+        }
+        localStorage.removeItem(key);
+    }
+    const response = await axiosInstance.post('/api/kyc-uploads/', {
+        client: clientId,
+        filename: file.name,
+        size: file.size,
+    });
+    localStorage.setItem(key, response.data.id);
+    return response.data;
+};
+
+// Uploads a KYC file in chunks. An interrupted upload of the same file resumes
+// from the last stored offset instead of starting over.
+export const uploadKycDocument = async (clientId, file, onProgress) => {
+    const session = await openSession(clientId, file);
+    let offset = session.offset;
+    let retries = 0;
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + CHUNK_SIZE);
+        try {
+            const response = await axiosInstance.put(`/api/kyc-uploads/${session.id}/`, chunk, {
+                headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+            });
+            offset = response.data.offset;
+            retries = 0;
+            if (onProgress) onProgress(offset / file.size);
+        } catch (error) {
+            if (error.response?.status === 409) {
+                // Same offset: an earlier attempt of this chunk is still being written
+                if (error.response.data.offset === offset && retries < MAX_RETRIES) {
+                    retries += 1;
+                    await sleep(1000 * Number(error.response.headers['retry-after'] || 1));
+                } else if (error.response.data.offset === offset) {
+                    throw error;
+                }
+                offset = error.response.data.offset;
+            } else if (!error.response && retries < MAX_RETRIES) {
+                retries += 1;
+                await sleep(1000 * 2 ** retries);
+                const status = await axiosInstance.get(`/api/kyc-uploads/${session.id}/`);
+                offset = status.data.offset;
+            } else {
+                throw error;
+            }
+        }
+    }
+    const response = await axiosInstance.post(`/api/kyc-uploads/${session.id}/commit/`);
+    localStorage.removeItem(sessionKey(clientId, file));
+    return response.data;
+};
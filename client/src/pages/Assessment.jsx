@@ -156,8 +156,6 @@ const Assessment = () => {
       const payload = {
         client: client.id,
         status: status === 'submitted' ? 'submitted' : 'pending',
-        risk_level: riskLevel,
-        total_score: totalScore,
       };
       // If we already have a draft mapped, update it instead of creating a new one
       const existingAssessmentId = localStorage.getItem(draftMapKey);
@@ -105,7 +105,7 @@ const Assessments = () => {
       const res = await axiosInstance.post(`/api/assessments/${assessmentId}/push-external/`);
       toast({
         title: 'Pushed to external',
-        description: `Assessment #${res.data?.assessmentId} pushed. External: ${res.data?.externalPushed ? 'yes' : 'no'}`,
+        description: `Assessment #${res.data?.assessmentId} ${res.data?.externalPushed ? 'pushed' : 'queued'} for the external system.`,
       });
     } catch (err) {
       console.error('Push to external failed', err);
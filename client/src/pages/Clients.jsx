@@ -303,6 +303,8 @@ const Clients = () => {
   const [clients, setClients] = useState([]);
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [formData, setFormData] = useState(initialFormData);
+  const [searchQuery, setSearchQuery] = useState("");
+  const [searchResults, setSearchResults] = useState(null);
   const { toast } = useToast();
   const navigate = useNavigate();
   const { user } = useAuth();
@@ -328,6 +330,34 @@ const Clients = () => {
     if (user) loadClients();
   }, [user]);
 
+  // ------------------------------
+  // 🟩 Server-side search (debounced)
+  // ------------------------------
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (q.length < 2) {
+      setSearchResults(null);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axiosInstance.get("/api/clients/search/", {
+          params: { q },
+        });
+        if (!cancelled) setSearchResults(res.data.results);
+      } catch (err) {
+        console.error("Error searching clients:", err);
+      }
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
+
+  const visibleClients = searchResults ?? clients;
+
   // ------------------------------
   // 🟩 Save new client with KYC documents
   // ------------------------------
@@ -387,6 +417,9 @@ const Clients = () => {
     try {
       await axiosInstance.delete(`/api/clients/${clientId}/`);
       setClients(clients.filter((c) => c.id !== clientId));
+      setSearchResults((results) =>
+        results ? results.filter((c) => c.id !== clientId) : results
+      );
 
       toast({
         title: "Deleted",
@@ -491,6 +524,13 @@ const Clients = () => {
           >
             <Card className="border-0 bg-white/80 backdrop-blur-sm">
               <CardContent className="p-4">
+                <div className="mb-4">
+                  <Input
+                    placeholder="Search by name, reference, ID or email..."
+                    value={searchQuery}
+                    onChange={(e) => setSearchQuery(e.target.value)}
+                  />
+                </div>
                 <div className="overflow-x-auto">
                   <table className="w-full text-sm text-left">
                     <thead className="text-xs text-gray-700 uppercase bg-gray-50">
@@ -504,7 +544,7 @@ const Clients = () => {
                       </tr>
                     </thead>
                     <tbody>
-                      {clients.map((client) => (
+                      {visibleClients.map((client) => (
                         <tr
                           key={client.id}
                           className="bg-white border-b hover:bg-gray-50"
@@ -558,11 +598,13 @@ const Clients = () => {
                   </table>
                 </div>
 
-                {clients.length === 0 && (
+                {visibleClients.length === 0 && (
                   <div className="text-center py-12">
                     <User className="w-16 h-16 mx-auto text-gray-300 mb-4" />
                     <p className="text-gray-500">
-                      No clients yet. Add your first client to get started!
+                      {searchResults
+                        ? "No clients match your search."
+                        : "No clients yet. Add your first client to get started!"}
                     </p>
                   </div>
                 )}
@@ -22,37 +22,9 @@ const Dashboard = () => {
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
-        const [clientsRes, assessmentsRes] = await Promise.all([
-          axiosInstance.get("/api/clients/"),
-          axiosInstance.get("/api/assessments/"),
-        ]);
-
-        const clients = clientsRes.data;
-        const assessments = assessmentsRes.data;
-
-        const pending = assessments.filter(
-          (a) => a.status === "pending"
-        ).length;
-        // Normalize risk level from API (backend uses `risk_level`)
-        const getRisk = (a) => a.risk_level ?? a.riskLevel ?? null;
-        const high = assessments.filter((a) => getRisk(a) === "high").length;
-        const medium = assessments.filter((a) => getRisk(a) === "medium").length;
-        const low = assessments.filter((a) => getRisk(a) === "low").length;
-
-        const thirtyDaysAgo = new Date();
-        thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
-        const recent = assessments.filter(
-          (a) => new Date(a.createdAt) > thirtyDaysAgo
-        ).length;
-
-        setStats({
-          totalClients: clients.length,
-          pendingApprovals: pending,
-          highRisk: high,
-          mediumRisk: medium,
-          lowRisk: low,
-          recentAssessments: recent,
-        });
+        // Counts are maintained server-side and already scoped to the user's channel
+        const res = await axiosInstance.get("/api/dashboard/stats/");
+        setStats(res.data);
       } catch (error) {
         console.error("Failed to fetch dashboard data", error);
         // Optionally, show a toast notification for the error
@@ -4,6 +4,7 @@ import { motion } from 'framer-motion';
 import { Upload, FileText, CheckCircle, XCircle, AlertCircle, ArrowLeft } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import axiosInstance from '@/api/axios';
+import { uploadKycDocument } from '@/api/kycUpload';
 
 export default function KycUpload() {
   const navigate = useNavigate();
@@ -47,6 +48,18 @@ export default function KycUpload() {
     }
   };
 
+  // The download endpoint needs the auth header, so open a short-lived signed
+  // link instead: the browser's viewer can then fetch the file (and its byte
+  // ranges) itself, with the server's Content-Type and Content-Disposition
+  const handleView = async (doc) => {
+    try {
+      const response = await axiosInstance.post(`/api/kyc-documents/${doc.id}/signed-url/`);
+      window.open(response.data.url, '_blank', 'noopener,noreferrer');
+    } catch (error) {
+      console.error('Failed to open document:', error);
+    }
+  };
+
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
     setFile(selectedFile);
@@ -74,15 +87,7 @@ export default function KycUpload() {
     setMessage('');
 
     try {
-      const formData = new FormData();
-      formData.append('client', selectedClient);
-      formData.append('document', file);
-
-      const response = await axiosInstance.post('/api/kyc-documents/', formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
+      await uploadKycDocument(selectedClient, file);
 
       setUploadStatus('success');
       setMessage(`Document "${file.name}" uploaded successfully!`);
@@ -270,14 +275,13 @@ export default function KycUpload() {
                           </p>
                         </div>
                       </div>
-                      <a
-                        href={doc.document}
-                        target="_blank"
-                        rel="noopener noreferrer"
+                      <button
+                        type="button"
+                        onClick={() => handleView(doc)}
                         className="px-4 py-2 text-sm font-medium text-blue-600 hover:text-blue-800 hover:bg-blue-50 rounded-lg transition-all"
                       >
                         View
-                      </a>
+                      </button>
                     </motion.div>
                   ))}
                 </div>
@@ -290,8 +294,8 @@ export default function KycUpload() {
               <div className="text-sm text-blue-800">
                 <p className="font-semibold mb-1">Document Organization</p>
                 <p>
-                  Files are automatically organized by client name and upload date. Each document is stored securely
-                  and can be accessed later for compliance and auditing purposes.
+                  Each document is linked to its client and upload date, stored securely, and can only be opened
+                  by users with access to the client, for compliance and auditing purposes.
                 </p>
               </div>
             </div>